@@ -5,3 +5,4 @@ from .cropper import Cropper
 from .paster import Paster
 from .processor import Processor
 from .logger import Logger
+from .worker_pool import WorkerPool
@@ -0,0 +1,55 @@
+import os
+import re
+
+
+class AtomicFile:
+    temp_pattern: str = r'\..+\.\d+\.tmp(\..*)?'
+
+    def __init__(self, path: str):
+        self.path: str = path
+        directory: str
+        file_name: str
+        directory, file_name = os.path.split(path)
+        name: str
+        extension: str
+        name, extension = os.path.splitext(file_name)
+        self.temp_path: str = os.path.join(directory, f'.{name}.{os.getpid()}.tmp{extension}')
+
+    def __enter__(self) -> str:
+        return self.temp_path
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_type is None:
+            self.commit()
+        elif os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        return False
+
+    def commit(self):
+        descriptor: int = os.open(self.temp_path, os.O_RDONLY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+        os.replace(self.temp_path, self.path)
+
+    @staticmethod
+    def write(path: str, data: bytes):
+        with AtomicFile(path) as temp_path:
+            with open(temp_path, 'wb') as file:
+                file.write(data)
+
+    @staticmethod
+    def is_temp(file_name: str) -> bool:
+        return bool(re.fullmatch(AtomicFile.temp_pattern, os.path.basename(file_name)))
+
+    @staticmethod
+    def cleanup(directory: str) -> int:
+        removed_count: int = 0
+        if not os.path.isdir(directory):
+            return removed_count
+        for file_name in os.listdir(directory):
+            if AtomicFile.is_temp(file_name):
+                os.remove(os.path.join(directory, file_name))
+                removed_count += 1
+        return removed_count
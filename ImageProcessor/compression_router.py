@@ -0,0 +1,170 @@
+import aiohttp
+import asyncio
+import mimetypes
+import os
+import typing
+from .compressor import Compressor as LocalCompressor
+from .compressor_tiny_png import Compressor as CompressorTinyPng
+from .errors import Error, TinyPNGAccountError
+from .logger import Logger
+from .progress_bar import ProgressBar
+from .worker_pool import WorkerPool
+
+
+class CompressionRouter:
+    LOCAL: str = 'local'
+    TINY_PNG: str = 'tiny_png'
+    FALLBACK: str = 'fallback'
+
+    def __init__(self,
+                 pool: WorkerPool,
+                 local_compressor: LocalCompressor,
+                 tiny_png_compressor: CompressorTinyPng = None,
+                 output_directory: str = 'output',
+                 png_route: str = 'fallback',
+                 savings_threshold: float = 0.3,
+                 max_uploads: int = 8,
+                 logger: Logger = None):
+        if png_route not in (CompressionRouter.LOCAL, CompressionRouter.TINY_PNG, CompressionRouter.FALLBACK):
+            raise TypeError(f'Unsupported PNG route "{png_route}".\n'
+                            f'Supported:\n'
+                            f'local\n'
+                            f'tiny_png\n'
+                            f'fallback')
+        self.pool: WorkerPool = pool
+        self.local_compressor: LocalCompressor = local_compressor
+        self.tiny_png_compressor: CompressorTinyPng or None = tiny_png_compressor
+        self.output_directory: str = output_directory
+        self.png_route: str = png_route
+        self.savings_threshold: float = savings_threshold
+        self.max_uploads: int = max_uploads
+        self.logger: Logger or None = logger
+        self.report: typing.Dict[str, int] = {'local': 0, 'tiny_png': 0, 'api_calls': 0}
+        self.__tiny_png_available: bool = tiny_png_compressor is not None
+        self.__local_slots: asyncio.Semaphore or None = None
+        self.__upload_slots: asyncio.Semaphore or None = None
+        self.__rotation_lock: asyncio.Lock or None = None
+        self.__retired_sessions: typing.List[aiohttp.ClientSession] = []
+
+    async def compress_all(self, files: list, progress: ProgressBar = None) -> list:
+        self.report = {'local': 0, 'tiny_png': 0, 'api_calls': 0}
+        self.__local_slots = asyncio.Semaphore(self.pool.max_pending_tasks)
+        self.__upload_slots = asyncio.Semaphore(self.max_uploads)
+        self.__rotation_lock = asyncio.Lock()
+        self.__retired_sessions = []
+        if any(self.get_route(file) != CompressionRouter.LOCAL for file in files):
+            try:
+                await self.tiny_png_compressor.create_web_session()
+            except (RuntimeError, Error, aiohttp.ClientError) as err:
+                self.__tiny_png_available = False
+                self.__write_error(f'\n{err}\nPNG images are compressed locally.')
+        tasks: typing.List[asyncio.Future] = [asyncio.ensure_future(self.compress(file, progress)) for file in files]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            await self.__close_sessions()
+
+    async def compress(self, path: str, progress: ProgressBar = None) -> str:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        route: str = self.get_route(path)
+        input_size: int = await loop.run_in_executor(None, os.path.getsize, path)
+        output_path: str or None = None
+        if route != CompressionRouter.TINY_PNG:
+            output_path = await self.__compress_local(path)
+        if route == CompressionRouter.LOCAL:
+            return self.__finish(input_size, output_path, CompressionRouter.LOCAL, progress)
+        if route == CompressionRouter.FALLBACK:
+            output_size: int = await loop.run_in_executor(None, os.path.getsize, output_path)
+            if 1 - output_size / max(input_size, 1) >= self.savings_threshold:
+                return self.__finish(input_size, output_path, CompressionRouter.LOCAL, progress)
+        tiny_png_output_path: str or None = await self.__compress_tiny_png(path)
+        if tiny_png_output_path is None:
+            if output_path is None:
+                output_path = await self.__compress_local(path)
+            return self.__finish(input_size, output_path, CompressionRouter.LOCAL, progress)
+        final_path: str
+        final_path, route = await loop.run_in_executor(None, CompressionRouter.select_output, path, output_path,
+                                                       tiny_png_output_path, self.output_directory)
+        return self.__finish(input_size, final_path, route, progress)
+
+    def get_route(self, path: str) -> str:
+        if not self.__tiny_png_available or mimetypes.guess_type(path)[0] != 'image/png':
+            return CompressionRouter.LOCAL
+        return self.png_route
+
+    @staticmethod
+    def select_output(path: str, output_path: str or None, tiny_png_output_path: str,
+                      output_directory: str) -> typing.Tuple[str, str]:
+        if output_path is not None and os.path.getsize(output_path) <= os.path.getsize(tiny_png_output_path):
+            os.remove(tiny_png_output_path)
+            return output_path, CompressionRouter.LOCAL
+        final_path: str = f'{output_directory}/{os.path.basename(path)}'
+        os.replace(tiny_png_output_path, final_path)
+        if output_path is not None and os.path.abspath(output_path) != os.path.abspath(final_path):
+            os.remove(output_path)
+        return final_path, CompressionRouter.TINY_PNG
+
+    async def __compress_local(self, path: str) -> str:
+        cost: int = 0
+        if self.pool.memory_budget is not None:
+            cost = await asyncio.get_running_loop().run_in_executor(None, WorkerPool.estimate_memory, path)
+        async with self.__local_slots:
+            return await self.pool.apply(self.local_compressor.compress, (path,), cost)
+
+    async def __compress_tiny_png(self, path: str) -> str or None:
+        async with self.__upload_slots:
+            while True:
+                if not self.__tiny_png_available:
+                    return None
+                session: aiohttp.ClientSession = self.tiny_png_compressor.session
+                self.report['api_calls'] += 1
+                try:
+                    await self.tiny_png_compressor.compress(path)
+                except TinyPNGAccountError as err:
+                    await self.__rotate_key(session, err.message)
+                    continue
+                except (Error, aiohttp.ClientError) as err:
+                    self.__write_error(f'\n{path} was not compressed by TinyPNG: {err}')
+                    return None
+                break
+        output_path: str = f'{self.tiny_png_compressor.output_directory}/{os.path.basename(path)}'
+        if not await asyncio.get_running_loop().run_in_executor(None, os.path.exists, output_path):
+            return None
+        return output_path
+
+    async def __rotate_key(self, session: aiohttp.ClientSession, message: str):
+        async with self.__rotation_lock:
+            if not self.__tiny_png_available or self.tiny_png_compressor.session is not session:
+                return
+            self.__write_error(f'{message}\nSwitching to the next API key.')
+            self.__retired_sessions.append(session)
+            try:
+                await self.tiny_png_compressor.create_web_session()
+            except (RuntimeError, Error, aiohttp.ClientError) as err:
+                self.__tiny_png_available = False
+                self.__write_error(f'\n{err}\nRemaining PNG images are compressed locally.')
+
+    async def __close_sessions(self):
+        sessions: typing.List[aiohttp.ClientSession] = self.__retired_sessions
+        if getattr(self.tiny_png_compressor, 'session', None) is not None:
+            sessions = sessions + [self.tiny_png_compressor.session]
+        for session in sessions:
+            if not session.closed:
+                await session.close()
+        self.__retired_sessions = []
+
+    def __finish(self, input_size: int, output_path: str, route: str, progress: ProgressBar or None) -> str:
+        self.report[route] += 1
+        if progress is not None:
+            progress.inc(size=input_size)
+            progress.show()
+        return output_path
+
+    def __write_error(self, text: str):
+        print(text)
+        if self.logger is not None:
+            self.logger.error_message(text)
@@ -3,7 +3,6 @@ from PIL import Image
 import mozjpeg_lossless_optimization
 import typing
 import PIL.Image
-from PIL.JpegImagePlugin import JpegImageFile
 from SSIM_PIL import compare_ssim
 import math
 import subprocess
@@ -11,19 +10,49 @@ import re
 import mimetypes
 import os
 import pathlib
+import time
+import numpy
 from .logger import Logger
+from .atomic_file import AtomicFile
+from .image_io import ImageIO
+from .encoders import Encoder, JpegEncoder
+from .png_encoder import PngEncoder
 from .progress_bar import ProgressBar
 
 
 class Compressor:
+    ssim_proxies: typing.Tuple[str, ...] = ('resize', 'downscale', 'patches', 'full')
+    patch_size: int = 32
+    __luminance_table: typing.Tuple[int, ...] = (16, 11, 10, 16, 24, 40, 51, 61,
+                                                 12, 12, 14, 19, 26, 58, 60, 55,
+                                                 14, 13, 16, 24, 40, 57, 69, 56,
+                                                 14, 17, 22, 29, 51, 87, 80, 62,
+                                                 18, 22, 37, 56, 68, 109, 103, 77,
+                                                 24, 35, 55, 64, 81, 104, 113, 92,
+                                                 49, 64, 78, 87, 103, 121, 120, 101,
+                                                 72, 92, 95, 98, 112, 100, 103, 99)
+    __chrominance_table: typing.Tuple[int, ...] = (17, 18, 24, 47, 99, 99, 99, 99,
+                                                   18, 21, 26, 66, 99, 99, 99, 99,
+                                                   24, 26, 56, 99, 99, 99, 99, 99,
+                                                   47, 66, 99, 99, 99, 99, 99, 99,
+                                                   99, 99, 99, 99, 99, 99, 99, 99,
+                                                   99, 99, 99, 99, 99, 99, 99, 99,
+                                                   99, 99, 99, 99, 99, 99, 99, 99,
+                                                   99, 99, 99, 99, 99, 99, 99, 99)
+
     def __init__(self,
                  output_directory: str = None,
                  quality: float = None,
                  compressor: str = None,
                  dynamic_quality_range: typing.Tuple[int, int] = (80, 85),
                  use_gpu: bool = False,
-                 logger: Logger = None):
-        self.__supported_types: typing.Tuple[str, ...] = ('jpeg',)
+                 logger: Logger = None,
+                 output_formats: typing.Tuple[str, ...] = ('jpeg',),
+                 encoder_speed: typing.Dict[str, int] = None,
+                 png_quantize: bool = True,
+                 ssim_proxy: str = 'resize',
+                 ssim_sample_budget: int = 160000):
+        self.__supported_types: typing.Tuple[str, ...] = ('jpeg', 'png')
         self.__quality: float or None = quality
         if compressor not in ('mozjpeg', 'leanify', None):
             raise TypeError(f'Unsupported compressor "{compressor}".\n'
@@ -35,6 +64,21 @@ class Compressor:
         if dynamic_quality_range[0] >= dynamic_quality_range[1]:
             raise TypeError('The first value "dynamic_quality_range" must be < the second value.')
         self.__dynamic_quality_range: typing.Tuple[int, int] = dynamic_quality_range
+        if ssim_proxy not in self.ssim_proxies:
+            raise TypeError(f'Unsupported SSIM proxy "{ssim_proxy}".\n'
+                            f'Supported:\n' + '\n'.join(self.ssim_proxies))
+        self.__ssim_proxy: str = ssim_proxy
+        self.__ssim_sample_budget: int = ssim_sample_budget
+        if len(output_formats) == 0:
+            raise TypeError('At least one output format required.')
+        if encoder_speed is None:
+            encoder_speed: dict = dict()
+        self.__encoders: typing.List[Encoder] = [Encoder.create(name, encoder_speed.get(name))
+                                                 for name in output_formats]
+        self.__png_encoders: typing.List[Encoder] = [PngEncoder(encoder_speed.get('png'), png_quantize,
+                                                                use_gpu=use_gpu,
+                                                                ssim_sample_budget=ssim_sample_budget)]
+        self.__png_encoders += [encoder for encoder in self.__encoders if not isinstance(encoder, JpegEncoder)]
         self.__output_directory: str = output_directory
         self.__use_gpu: bool = use_gpu
         self.__logger: Logger = logger
@@ -45,36 +89,148 @@ class Compressor:
     def compress(self, path: str, progress: ProgressBar = None) -> str:
         if not os.path.exists(path):
             raise RuntimeError('File not found!')
-        file_type: str = str(mimetypes.guess_type(path)[0])
-        if not bool(re.fullmatch('.*/jpeg', file_type)):
+        if not self.is_compression_supported(path):
+            file_type: str = str(mimetypes.guess_type(path)[0])
             raise TypeError(f'Compressor does not support "{file_type}" type.')
-        if self.__output_directory is not None:
-            output_path: str = f'{self.__output_directory}/{os.path.basename(path)}'
-        else:
-            output_path: str = path
         input_size: int = os.path.getsize(path)
-        jpeg_io: BytesIO = BytesIO()
-        with Image.open(path, "r") as image:
-            if self.__quality is None:
-                quality, default_ssim = self.__get_dynamic_quality_for_jpeg(image)
-            image.convert("RGB").save(jpeg_io, format="JPEG", quality=quality, optimize=False, progressive=True)
-        jpeg_io.seek(0)
-        jpeg_bytes: bytes = jpeg_io.read()
-        if self.__compressor == 'mozjpeg':
-            jpeg_bytes = mozjpeg_lossless_optimization.optimize(jpeg_bytes)
-        with open(output_path, "wb") as output_file:
-            output_file.write(jpeg_bytes)
-        if self.__compressor == 'leanify':
-            subprocess.run([pathlib.Path('ImageProcessor/bin/Leanify.exe'), output_path],
-                           shell=True,
-                           capture_output=True)
+        with ImageIO.read(path) as input_data:
+            encoder: Encoder
+            data: bytes
+            source_format: str
+            encoder, data, source_format = self.__compress(input_data)
+        output_path: str = self.__get_output_path(path, source_format, encoder)
+        with AtomicFile(output_path) as temp_path:
+            with open(temp_path, "wb") as output_file:
+                output_file.write(data)
+            ImageIO.count(bytes_written=len(data))
+            if self.__compressor == 'leanify' and isinstance(encoder, JpegEncoder):
+                subprocess.run([pathlib.Path('ImageProcessor/bin/Leanify.exe'), temp_path],
+                               shell=True,
+                               capture_output=True)
         if progress is not None:
-            progress.inc()
+            progress.inc(size=input_size)
             progress.show()
         if self.__logger is not None:
             self.__logger.compressing_massage(path, input_size, os.path.getsize(output_path))
         return output_path
 
+    def compress_data(self, data: bytes, name: str) -> typing.Tuple[bytes, str]:
+        if not self.is_compression_supported(name):
+            file_type: str = str(mimetypes.guess_type(name)[0])
+            raise TypeError(f'Compressor does not support "{file_type}" type.')
+        encoder: Encoder
+        output_data: bytes
+        source_format: str
+        encoder, output_data, source_format = self.__compress(data)
+        if self.__logger is not None:
+            self.__logger.compressing_massage(name, len(data), len(output_data))
+        return output_data, self.__get_output_name(name, source_format, encoder)
+
+    def encode(self, image: PIL.Image.Image, quality: int = None, image_format: str = None,
+               source_data: bytes = None) -> typing.Tuple[Encoder, bytes]:
+        selected_encoder: Encoder or None = None
+        selected_data: bytes or None = None
+        if image_format is None:
+            image_format: str = image.format
+        if quality is None:
+            quality: int or None = self.__quality
+        source_quality: int or None = None
+        if image_format == 'JPEG' and image.mode in ('RGB', 'L'):
+            source_quality = self.estimate_jpeg_quality(image)
+        encoders: typing.List[Encoder] = self.__png_encoders if image_format == 'PNG' else self.__encoders
+        for encoder in encoders:
+            encoder: Encoder
+            reuse_source: bool = quality is None and source_data is not None and source_quality is not None and \
+                isinstance(encoder, JpegEncoder)
+            if reuse_source and source_quality < self.__dynamic_quality_range[0]:
+                data: bytes = ImageIO.to_bytes(source_data)
+            else:
+                prepared_image: PIL.Image.Image = encoder.prepare(image)
+                encoder_quality: int or None = quality
+                if encoder_quality is None and not encoder.lossless:
+                    max_quality: int or None = source_quality if isinstance(encoder, JpegEncoder) else None
+                    encoder_quality, default_ssim = self.__get_dynamic_quality(prepared_image, encoder, max_quality)
+                data: bytes = encoder.encode(prepared_image, encoder_quality)
+                if reuse_source and len(data) >= len(source_data):
+                    data = ImageIO.to_bytes(source_data)
+            if self.__compressor == 'mozjpeg' and isinstance(encoder, JpegEncoder):
+                data = mozjpeg_lossless_optimization.optimize(data)
+            if selected_data is None or len(data) < len(selected_data):
+                selected_encoder = encoder
+                selected_data = data
+        return selected_encoder, selected_data
+
+    @staticmethod
+    def estimate_jpeg_quality(image: PIL.Image.Image) -> int or None:
+        tables: dict or None = getattr(image, 'quantization', None)
+        if not tables or 0 not in tables:
+            return None
+        standard_tables: typing.Tuple[typing.Tuple[int, ...], ...] = (Compressor.__luminance_table,
+                                                                       Compressor.__chrominance_table)
+        table_sum: int = 0
+        standard_sum: int = 0
+        for index, standard_table in enumerate(standard_tables):
+            if index in tables:
+                table_sum += sum(tables[index])
+                standard_sum += sum(standard_table)
+        scale: float = table_sum * 100 / standard_sum
+        if scale <= 0:
+            return None
+        if scale <= 100:
+            quality: float = (200 - scale) / 2
+        else:
+            quality: float = 5000 / scale
+        return min(max(round(quality), 1), 100)
+
+    def benchmark_ssim_proxy(self, path: str,
+                             strategies: typing.List[typing.Tuple[str, int]]) -> typing.List[typing.Tuple[int, float]]:
+        encoder: Encoder = next((encoder for encoder in self.__encoders if not encoder.lossless),
+                                JpegEncoder())
+        results: typing.List[typing.Tuple[int, float]] = []
+        with Image.open(path) as image:
+            prepared_image: PIL.Image.Image = encoder.prepare(image)
+            for ssim_proxy, ssim_sample_budget in strategies:
+                timer: float = time.perf_counter()
+                quality: int
+                quality, _ = self.__get_dynamic_quality(prepared_image, encoder, None, ssim_proxy, ssim_sample_budget)
+                results.append((quality, time.perf_counter() - timer))
+        return results
+
+    @staticmethod
+    def get_proxy_image(image: PIL.Image.Image, ssim_proxy: str, ssim_sample_budget: int) -> PIL.Image.Image:
+        if ssim_proxy == 'resize':
+            return image.resize((400, 400))
+        if ssim_proxy == 'full' or image.width * image.height <= ssim_sample_budget:
+            return image
+        if ssim_proxy == 'downscale':
+            scale: float = math.sqrt(ssim_sample_budget / (image.width * image.height))
+            return image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                                Image.Resampling.LANCZOS)
+        return Compressor.get_patch_mosaic(image, ssim_sample_budget)
+
+    @staticmethod
+    def get_patch_mosaic(image: PIL.Image.Image, ssim_sample_budget: int) -> PIL.Image.Image:
+        size: int = Compressor.patch_size
+        columns: int = image.width // size
+        rows: int = image.height // size
+        count: int = min(columns * rows, max(1, ssim_sample_budget // size ** 2))
+        if count == 0 or count == columns * rows:
+            return image
+        gray: numpy.ndarray = numpy.asarray(image.convert('L'), dtype=numpy.float32)[:rows * size, :columns * size]
+        variances: numpy.ndarray = gray.reshape(rows, size, columns, size).var(axis=(1, 3)).ravel()
+        order: numpy.ndarray = numpy.argsort(variances, kind='stable')
+        selected: numpy.ndarray = order[numpy.linspace(0, len(order) - 1, count).round().astype(int)]
+        mosaic_columns: int = math.ceil(math.sqrt(count))
+        mosaic_rows: int = math.ceil(count / mosaic_columns)
+        mosaic: PIL.Image.Image = Image.new(image.mode, (mosaic_columns * size, mosaic_rows * size))
+        for position in range(mosaic_columns * mosaic_rows):
+            row: int
+            column: int
+            row, column = divmod(int(selected[position % count]), columns)
+            mosaic.paste(image.crop((column * size, row * size, (column + 1) * size, (row + 1) * size)),
+                         ((position % mosaic_columns) * size, (position // mosaic_columns) * size))
+        return mosaic
+
     def is_compression_supported(self, file_name: str) -> bool:
         result: bool = False
         for t in self.__supported_types:
@@ -85,18 +241,43 @@ class Compressor:
     def get_supported_types(self):
         return self.__supported_types
 
-    def __get_dynamic_quality_for_jpeg(self, original_image: JpegImageFile) -> typing.Tuple[int or None, float or None]:
+    def __compress(self, data: bytes) -> typing.Tuple[Encoder, bytes, str]:
+        with ImageIO.open_image(data) as image:
+            encoder: Encoder
+            output_data: bytes
+            encoder, output_data = self.encode(image, source_data=data)
+            return encoder, output_data, image.format
+
+    def __get_output_path(self, path: str, source_format: str, encoder: Encoder) -> str:
+        if self.__output_directory is not None:
+            output_path: str = f'{self.__output_directory}/{os.path.basename(path)}'
+        else:
+            output_path: str = path
+        return self.__get_output_name(output_path, source_format, encoder)
+
+    @staticmethod
+    def __get_output_name(name: str, source_format: str, encoder: Encoder) -> str:
+        if encoder.format != source_format:
+            return f'{os.path.splitext(name)[0]}{encoder.extension}'
+        return name
+
+    def __get_dynamic_quality(self, original_image: PIL.Image.Image, encoder: Encoder, max_quality: int = None,
+                              ssim_proxy: str = None,
+                              ssim_sample_budget: int = None) -> typing.Tuple[int or None, float or None]:
         ssim_goal: float = 0.95
         height: int = self.__dynamic_quality_range[1]
         low: int = self.__dynamic_quality_range[0]
-        image: PIL.Image.Image = original_image.resize((400, 400))
-        normalized_ssim: float = self.__get_ssim_at_quality(image, 95, self.__use_gpu)
+        if max_quality is not None and low < max_quality < height:
+            height = max_quality
+        image: PIL.Image.Image = self.get_proxy_image(original_image, ssim_proxy or self.__ssim_proxy,
+                                                      ssim_sample_budget or self.__ssim_sample_budget)
+        normalized_ssim: float = self.__get_ssim_at_quality(image, 95, encoder, self.__use_gpu)
         selected_quality: int or None = None
         selected_ssim: int or None = None
         for i in range(self.__ssim_iteration_count(low, height)):
             i: int
             curr_quality: int = (low + height) // 2
-            curr_ssim: float = self.__get_ssim_at_quality(image, curr_quality, self.__use_gpu)
+            curr_ssim: float = self.__get_ssim_at_quality(image, curr_quality, encoder, self.__use_gpu)
             ssim_ratio: float = curr_ssim / normalized_ssim
             if ssim_ratio >= ssim_goal:
                 selected_quality = curr_quality
@@ -107,15 +288,16 @@ class Compressor:
         if selected_quality:
             return selected_quality, selected_ssim
         else:
-            default_ssim: float = self.__get_ssim_at_quality(image, height, self.__use_gpu)
+            default_ssim: float = self.__get_ssim_at_quality(image, height, encoder, self.__use_gpu)
             return height, default_ssim
 
     @staticmethod
-    def __get_ssim_at_quality(image: PIL.Image.Image, quality: int, use_gpu: bool = False) -> float:
+    def __get_ssim_at_quality(image: PIL.Image.Image, quality: int, encoder: Encoder, use_gpu: bool = False) -> float:
         ssim_photo: BytesIO = BytesIO()
-        image.save(ssim_photo, format="JPEG", quality=quality, progressive=True)
+        encoder.save(image, ssim_photo, quality)
         ssim_photo.seek(0)
-        ssim_score: float = compare_ssim(image, PIL.Image.open(ssim_photo), GPU=use_gpu)
+        with PIL.Image.open(ssim_photo) as compressed_image:
+            ssim_score: float = compare_ssim(image, compressed_image, GPU=use_gpu)
         return ssim_score
 
     @staticmethod
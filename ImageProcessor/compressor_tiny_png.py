@@ -8,6 +8,7 @@ from .cycle_iterator import CycleIterator
 from .errors import Error, TinyPNGAccountError
 from .progress_bar import ProgressBar
 from .logger import Logger
+from .atomic_file import AtomicFile
 
 
 class Compressor:
@@ -59,7 +60,7 @@ class Compressor:
         if self.logger is not None:
             self.logger.compressing_massage(path, input_size, os.path.getsize(output_path))
         if progress is not None:
-            progress.inc()
+            progress.inc(size=input_size)
             progress.show()
 
     def is_compression_supported(self, file_name: str) -> bool:
@@ -96,9 +97,10 @@ class Compressor:
     async def __download_image(self, url: str, output_path: str):
         response: aiohttp.ClientResponse = await self.session.get(url)
         if response.status == 200:
-            with open(output_path, 'wb') as file:
-                data: bytes = await response.read()
-                file.write(data)
+            data: bytes = await response.read()
+            with AtomicFile(output_path) as temp_path:
+                with open(temp_path, 'wb') as file:
+                    file.write(data)
         else:
             error_text: str = f'\nError downloading image. Status code: {response.status}'
             print(error_text)
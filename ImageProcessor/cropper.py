@@ -1,8 +1,10 @@
 import os
+import typing
 import cv2
-from numpy import ndarray, asarray, uint8
+from numpy import ndarray
 import math
 from .logger import Logger
+from .image_io import ImageIO
 
 
 class Cropper:
@@ -20,23 +22,31 @@ class Cropper:
                 os.mkdir(output_directory)
 
     def crop_image(self, path: str, ratio: float = None, auto_orientation: bool = None) -> str:
-        if not ratio:
-            ratio: float = self.ratio
-            if not self.ratio:
-                raise RuntimeError('Ratio not set!')
+        if not ratio and not self.ratio:
+            raise RuntimeError('Ratio not set!')
         if not os.path.exists(path):
             raise RuntimeError('File not found!')
-        if auto_orientation is None:
-            auto_orientation: bool = self.auto_orientation
         if self.output_directory is not None:
             output_path: str = f'{self.output_directory}/{os.path.basename(path)}'
         else:
             output_path: str = path
-        with open(path, 'rb') as file:
-            data: bytes = bytearray(file.read())
-        data: ndarray = asarray(data, dtype=uint8)
-        img: ndarray = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
-        input_size: int = os.path.getsize(path)
+        with ImageIO.read(path) as data:
+            output_data: ndarray = self.__crop(data, path, ratio, auto_orientation)
+        ImageIO.write(output_path, output_data)
+        return output_path
+
+    def crop_data(self, data: bytes, name: str, ratio: float = None,
+                  auto_orientation: bool = None) -> typing.Tuple[bytes, str]:
+        return ImageIO.to_bytes(self.__crop(data, name, ratio, auto_orientation)), name
+
+    def __crop(self, data: bytes, name: str, ratio: float = None, auto_orientation: bool = None) -> ndarray:
+        if not ratio:
+            ratio: float = self.ratio
+            if not self.ratio:
+                raise RuntimeError('Ratio not set!')
+        if auto_orientation is None:
+            auto_orientation: bool = self.auto_orientation
+        img: ndarray = ImageIO.decode_array(data)
         height: int
         width: int
         channels: int
@@ -48,20 +58,17 @@ class Cropper:
         target_height: int
         target_width, target_height = Cropper.get_new_size(width, height, ratio)
         if target_height is None and target_width is None:
-            _, im_buf_arr = cv2.imencode(".jpg", img)
-            im_buf_arr.tofile(output_path)
-            return output_path
+            return ImageIO.encode_array(img)
         contour: dict = self.get_contour(img)
         if (contour['width'] < width or contour['height'] < height) and self.logger is not None:
-            self.logger.write(f'\nWARNING: Cropping {path} could be affected important elements')
+            self.logger.write(f'\nWARNING: Cropping {name} could be affected important elements')
         crop_data: dict = Cropper.get_crop_coordinates((width, height), (target_width, target_height), contour)
         crop = img[crop_data['y_start']:crop_data['y_finish'], crop_data['x_start']:crop_data['x_finish']]
-        _, im_buf_arr = cv2.imencode(".jpg", crop)
-        im_buf_arr.tofile(output_path)
+        output_data: ndarray = ImageIO.encode_array(crop)
         if self.logger is not None:
-            self.logger.cropping_message(path, (height, width), (target_height, target_width),
-                                         input_size, os.path.getsize(output_path))
-        return output_path
+            self.logger.cropping_message(name, (height, width), (target_height, target_width),
+                                         len(data), output_data.nbytes)
+        return output_data
 
     @staticmethod
     def get_contour(img: ndarray) -> dict:
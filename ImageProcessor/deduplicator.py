@@ -0,0 +1,145 @@
+import collections
+import hashlib
+import os
+import shutil
+import typing
+import PIL.Image
+from PIL import Image, ImageChops
+from SSIM_PIL import compare_ssim
+from .atomic_file import AtomicFile
+
+
+class Deduplicator:
+    block_grid: typing.Tuple[int, int] = (64, 64)
+    max_block_difference: int = 8
+
+    def __init__(self, mode: str = 'exact', perceptual_threshold: int = 0, ssim_threshold: float = 0.95):
+        if mode not in ('exact', 'perceptual'):
+            raise TypeError(f'Unsupported deduplication mode "{mode}".\n'
+                            f'Supported:\n'
+                            f'exact\n'
+                            f'perceptual')
+        self.mode: str = mode
+        self.perceptual_threshold: int = perceptual_threshold
+        self.ssim_threshold: float = ssim_threshold
+        self.report: dict = {'files': 0, 'unique': 0, 'duplicates': 0, 'saved_bytes': 0}
+
+    def find_duplicates(self, files: list, map_function: typing.Callable = None) -> typing.Dict[str, str]:
+        if map_function is None:
+            map_function = lambda function, items: list(map(function, items))
+        duplicates: typing.Dict[str, str] = dict()
+        files_by_size: typing.Dict[int, list] = collections.defaultdict(list)
+        for file in files:
+            files_by_size[os.path.getsize(file)].append(file)
+        candidates: list = [file for group in files_by_size.values() if len(group) > 1 for file in group]
+        representatives: typing.Dict[tuple, str] = dict()
+        for file, content_hash in zip(candidates, map_function(Deduplicator.get_content_hash, candidates)):
+            key: tuple = (os.path.getsize(file), content_hash)
+            if key in representatives:
+                duplicates[file] = representatives[key]
+            else:
+                representatives[key] = file
+        if self.mode == 'perceptual':
+            duplicates.update(self.__find_perceptual_duplicates([file for file in files if file not in duplicates],
+                                                                map_function))
+        self.report = {'files': len(files),
+                       'unique': len(files) - len(duplicates),
+                       'duplicates': len(duplicates),
+                       'saved_bytes': sum(os.path.getsize(file) for file in duplicates)}
+        return duplicates
+
+    def __find_perceptual_duplicates(self, files: list, map_function: typing.Callable) -> typing.Dict[str, str]:
+        signatures: typing.Dict[str, tuple] = {file: signature for file, signature
+                                               in zip(files, map_function(Deduplicator.get_perceptual_hash, files))
+                                               if signature is not None}
+        buckets: typing.Dict[tuple, typing.List[typing.Tuple[int, str]]] = collections.defaultdict(list)
+        rejected: typing.Dict[str, set] = collections.defaultdict(set)
+        duplicates: typing.Dict[str, str] = dict()
+        pending: list = list(signatures)
+        while len(pending) != 0:
+            pairs: typing.List[typing.Tuple[str, str]] = []
+            for file in pending:
+                representatives: typing.List[typing.Tuple[int, str]] = buckets[signatures[file][:-1]]
+                representative: str or None = self.__find_similar(representatives, signatures[file][-1],
+                                                                  rejected[file])
+                if representative is not None:
+                    pairs.append((file, representative))
+                else:
+                    representatives.append((signatures[file][-1], file))
+            pending = []
+            for (file, representative), similarity in zip(pairs, map_function(Deduplicator.get_similarity, pairs)):
+                if similarity >= self.ssim_threshold:
+                    duplicates[file] = representative
+                else:
+                    rejected[file].add(representative)
+                    pending.append(file)
+        return duplicates
+
+    def __find_similar(self, representatives: typing.List[typing.Tuple[int, str]], perceptual_hash: int,
+                       rejected: set) -> str or None:
+        for representative_hash, file in representatives:
+            if file not in rejected and bin(representative_hash ^ perceptual_hash).count('1') <= \
+                    self.perceptual_threshold:
+                return file
+        return None
+
+    @staticmethod
+    def link_duplicate(output_path: str, duplicate_path: str, output_directory: str = None) -> str:
+        duplicate_name: str = os.path.splitext(os.path.basename(duplicate_path))[0] + os.path.splitext(output_path)[1]
+        if output_directory is not None:
+            duplicate_output_path: str = f'{output_directory}/{duplicate_name}'
+        else:
+            duplicate_output_path: str = os.path.join(os.path.dirname(duplicate_path), duplicate_name)
+        if os.path.abspath(duplicate_output_path) == os.path.abspath(output_path):
+            return duplicate_output_path
+        with AtomicFile(duplicate_output_path) as temp_path:
+            try:
+                os.link(output_path, temp_path)
+            except OSError:
+                shutil.copyfile(output_path, temp_path)
+        return duplicate_output_path
+
+    @staticmethod
+    def get_content_hash(path: str) -> str:
+        content_hash = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 ** 2), b''):
+                content_hash.update(chunk)
+        return content_hash.hexdigest()
+
+    @staticmethod
+    def get_perceptual_hash(path: str) -> typing.Tuple[str, int, int, str, int] or None:
+        try:
+            with Image.open(path) as image:
+                signature: tuple = (str(image.format), image.width, image.height, image.mode)
+                image.draft('L', (64, 64))
+                pixels: list = list(image.convert('L').resize((9, 8), Image.Resampling.LANCZOS).getdata())
+        except (OSError, ValueError):
+            return None
+        perceptual_hash: int = 0
+        for row in range(8):
+            for column in range(8):
+                perceptual_hash = (perceptual_hash << 1) | (pixels[row * 9 + column] > pixels[row * 9 + column + 1])
+        return (*signature, perceptual_hash)
+
+    @staticmethod
+    def get_similarity(paths: typing.Tuple[str, str]) -> float:
+        try:
+            with Image.open(paths[0]) as first_image, Image.open(paths[1]) as second_image:
+                if first_image.size != second_image.size or first_image.mode != second_image.mode:
+                    return 0.0
+                first_rgb: PIL.Image.Image = first_image.convert('RGB')
+                second_rgb: PIL.Image.Image = second_image.convert('RGB')
+                block_difference: PIL.Image.Image = ImageChops.difference(
+                    first_rgb.resize(Deduplicator.block_grid, Image.Resampling.BOX),
+                    second_rgb.resize(Deduplicator.block_grid, Image.Resampling.BOX))
+                if max(high for _, high in block_difference.getextrema()) > Deduplicator.max_block_difference:
+                    return 0.0
+                similarity: float = compare_ssim(first_rgb, second_rgb, GPU=False)
+                if 'A' in first_image.getbands():
+                    first_alpha: PIL.Image.Image = first_image.getchannel('A')
+                    second_alpha: PIL.Image.Image = second_image.getchannel('A')
+                    similarity = min(similarity, compare_ssim(first_alpha, second_alpha, GPU=False))
+        except (OSError, ValueError):
+            return 0.0
+        return similarity
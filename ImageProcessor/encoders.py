@@ -0,0 +1,104 @@
+import importlib
+import typing
+from io import BytesIO
+import PIL.Image
+from PIL import Image
+
+
+class Encoder:
+    name: str = ''
+    format: str = ''
+    extension: str = ''
+    lossless: bool = False
+
+    def __init__(self, speed: int = None):
+        if speed is not None and not 0 <= speed <= 10:
+            raise TypeError(f'Encoder speed must be in range 0..10, got {speed}.')
+        self.speed: int or None = speed
+
+    def prepare(self, image: PIL.Image.Image) -> PIL.Image.Image:
+        if image.mode in ('RGB', 'RGBA'):
+            return image
+        if image.mode in ('LA', 'PA') or 'transparency' in image.info:
+            return image.convert('RGBA')
+        return image.convert('RGB')
+
+    def get_save_options(self) -> dict:
+        return dict()
+
+    def save(self, image: PIL.Image.Image, output: typing.BinaryIO, quality: int = None):
+        options: dict = self.get_save_options()
+        if quality is not None and not self.lossless:
+            options['quality'] = quality
+        image.save(output, format=self.format, **options)
+
+    def encode(self, image: PIL.Image.Image, quality: int = None) -> bytes:
+        output: BytesIO = BytesIO()
+        self.save(image, output, quality)
+        return output.getvalue()
+
+    @staticmethod
+    def is_available() -> bool:
+        return True
+
+    @staticmethod
+    def create(name: str, speed: int = None) -> 'Encoder':
+        encoders: typing.Dict[str, typing.Type[Encoder]] = {encoder.name: encoder for encoder in
+                                                             (JpegEncoder, WebPEncoder, WebPLosslessEncoder,
+                                                              AvifEncoder)}
+        if name not in encoders:
+            raise TypeError(f'Unsupported output format "{name}".\n'
+                            f'Supported:\n' + '\n'.join(encoders))
+        if not encoders[name].is_available():
+            raise TypeError(f'Output format "{name}" is not supported by the installed Pillow build.')
+        return encoders[name](speed)
+
+
+class JpegEncoder(Encoder):
+    name: str = 'jpeg'
+    format: str = 'JPEG'
+    extension: str = '.jpg'
+
+    def prepare(self, image: PIL.Image.Image) -> PIL.Image.Image:
+        return image.convert('RGB')
+
+    def get_save_options(self) -> dict:
+        return {'optimize': self.speed is not None and self.speed < 5, 'progressive': True}
+
+
+class WebPEncoder(Encoder):
+    name: str = 'webp'
+    format: str = 'WEBP'
+    extension: str = '.webp'
+
+    def get_save_options(self) -> dict:
+        options: dict = {'lossless': self.lossless}
+        if self.speed is not None:
+            options['method'] = round(6 - self.speed * 0.6)
+        return options
+
+
+class WebPLosslessEncoder(WebPEncoder):
+    name: str = 'webp_lossless'
+    lossless: bool = True
+
+
+class AvifEncoder(Encoder):
+    name: str = 'avif'
+    format: str = 'AVIF'
+    extension: str = '.avif'
+
+    def get_save_options(self) -> dict:
+        options: dict = dict()
+        if self.speed is not None:
+            options['speed'] = self.speed
+        return options
+
+    @staticmethod
+    def is_available() -> bool:
+        try:
+            importlib.import_module('pillow_avif')
+        except ImportError:
+            pass
+        Image.init()
+        return 'AVIF' in Image.SAVE
@@ -0,0 +1,71 @@
+import math
+import os
+import random
+import statistics
+import time
+import typing
+from PIL import Image
+from .image_io import ImageIO
+
+
+class Estimator:
+    def __init__(self, sample_size: int = 32, confidence: float = 0.95, seed: int = None):
+        if not 0 < confidence < 1:
+            raise TypeError('"confidence" must be in range (0, 1).')
+        self.sample_size: int = sample_size
+        self.confidence: float = confidence
+        self.__random: random.Random = random.Random(seed)
+
+    def select_sample(self, files: list, probes: typing.List[typing.Tuple[str, int]]) -> typing.Dict[str, tuple]:
+        populations: typing.Dict[str, list] = dict()
+        for file, probe in zip(files, probes):
+            populations.setdefault(self.get_stratum(*probe), []).append(file)
+        strata: typing.Dict[str, tuple] = dict()
+        for stratum, population in populations.items():
+            sample_count: int = min(len(population), max(1, round(self.sample_size * len(population) / len(files))))
+            strata[stratum] = (population, self.__random.sample(population, sample_count))
+        return strata
+
+    def extrapolate(self, strata: typing.Dict[str, tuple],
+                    values: typing.Dict[str, float]) -> typing.Tuple[float, float, float]:
+        all_values: typing.List[float] = [values[file] for population, sample in strata.values() for file in sample
+                                          if file in values]
+        pooled_variance: float = statistics.variance(all_values) if len(all_values) > 1 else 0.0
+        total: float = 0.0
+        variance: float = 0.0
+        for population, sample in strata.values():
+            sample_values: typing.List[float] = [values[file] for file in sample if file in values]
+            if len(sample_values) == 0:
+                continue
+            if len(sample_values) > 1:
+                stratum_variance: float = statistics.variance(sample_values)
+            else:
+                stratum_variance: float = pooled_variance
+            total += len(population) * statistics.mean(sample_values)
+            variance += len(population) ** 2 * stratum_variance / len(sample_values) * \
+                (1 - len(sample_values) / len(population))
+        margin: float = statistics.NormalDist().inv_cdf((1 + self.confidence) / 2) * math.sqrt(variance)
+        return total, max(total - margin, 0.0), total + margin
+
+    @staticmethod
+    def get_stratum(image_format: str, pixels: int) -> str:
+        if pixels <= 0:
+            return f'{image_format} unknown size'
+        return f'{image_format} <={2 ** math.floor(math.log2(pixels / 1000 ** 2) + 1):g}MP'
+
+    @staticmethod
+    def probe(path: str) -> typing.Tuple[str, int]:
+        try:
+            with Image.open(path) as image:
+                return str(image.format).lower(), image.width * image.height
+        except (OSError, ValueError):
+            return os.path.splitext(path)[1].lower().lstrip('.') or 'unknown', 0
+
+    @staticmethod
+    def measure(path: str, functions: typing.List[typing.Callable]) -> typing.Tuple[float, int]:
+        name: str = os.path.basename(path)
+        with ImageIO.read(path) as data:
+            timer: float = time.perf_counter()
+            for function in functions:
+                data, name = function(data, name)
+            return time.perf_counter() - timer, len(data)
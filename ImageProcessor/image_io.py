@@ -0,0 +1,143 @@
+import contextlib
+import mmap
+import os
+import threading
+import time
+import tracemalloc
+import typing
+from io import BytesIO
+import cv2
+import numpy
+import PIL.Image
+from PIL import Image
+from .atomic_file import AtomicFile
+
+
+class ImageIO:
+    statistics: typing.Dict[str, int] = {'images_read': 0, 'bytes_read': 0, 'bytes_streamed': 0, 'bytes_copied': 0,
+                                         'bytes_written': 0}
+    __lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def read(path: str) -> typing.Iterator[mmap.mmap or bytes]:
+        with open(path, 'rb') as file:
+            size: int = os.fstat(file.fileno()).st_size
+            ImageIO.count(images_read=1, bytes_read=size)
+            buffer: mmap.mmap or None = None
+            if size != 0:
+                try:
+                    buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    buffer = None
+            if buffer is None:
+                data: bytes = file.read()
+                ImageIO.count(bytes_copied=len(data))
+                yield data
+                return
+            try:
+                yield buffer
+            finally:
+                ImageIO.count(bytes_streamed=buffer.tell())
+                buffer.close()
+
+    @staticmethod
+    def open_image(data: bytes or mmap.mmap or memoryview) -> PIL.Image.Image:
+        if isinstance(data, mmap.mmap):
+            ImageIO.count(bytes_streamed=data.tell())
+            data.seek(0)
+            return Image.open(data)
+        if not isinstance(data, bytes):
+            ImageIO.count(bytes_copied=memoryview(data).nbytes)
+        return Image.open(BytesIO(data))
+
+    @staticmethod
+    def decode_array(data: bytes or mmap.mmap or memoryview, flags: int = cv2.IMREAD_UNCHANGED) -> numpy.ndarray:
+        buffer: numpy.ndarray = numpy.frombuffer(data, dtype=numpy.uint8)
+        try:
+            return cv2.imdecode(buffer, flags)
+        finally:
+            del buffer
+
+    @staticmethod
+    def encode_array(image: numpy.ndarray, extension: str = '.jpg') -> numpy.ndarray:
+        success: bool
+        encoded: numpy.ndarray
+        success, encoded = cv2.imencode(extension, image)
+        if not success:
+            raise RuntimeError(f'Image could not be encoded as "{extension}".')
+        return encoded
+
+    @staticmethod
+    def encode_image(image: PIL.Image.Image, image_format: str, **options) -> bytes:
+        output: BytesIO = BytesIO()
+        image.save(output, format=image_format, **options)
+        return output.getvalue()
+
+    @staticmethod
+    def to_bytes(data: bytes or mmap.mmap or memoryview or numpy.ndarray) -> bytes:
+        if isinstance(data, bytes):
+            return data
+        output: bytes = memoryview(data).tobytes()
+        ImageIO.count(bytes_copied=len(output))
+        return output
+
+    @staticmethod
+    def write(path: str, data: bytes or mmap.mmap or memoryview or numpy.ndarray):
+        view: memoryview = memoryview(data)
+        try:
+            with AtomicFile(path) as temp_path:
+                with open(temp_path, 'wb') as file:
+                    file.write(view)
+            ImageIO.count(bytes_written=view.nbytes)
+        finally:
+            view.release()
+
+    @staticmethod
+    def count(**counters: int):
+        with ImageIO.__lock:
+            for name, value in counters.items():
+                ImageIO.statistics[name] += value
+
+    @staticmethod
+    def reset_statistics() -> typing.Dict[str, int]:
+        with ImageIO.__lock:
+            statistics: typing.Dict[str, int] = ImageIO.statistics.copy()
+            for name in ImageIO.statistics:
+                ImageIO.statistics[name] = 0
+        return statistics
+
+    @staticmethod
+    def measure(function: typing.Callable, *args) -> typing.Tuple[typing.Any, typing.Dict[str, int]]:
+        ImageIO.reset_statistics()
+        tracing: bool = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        start: int = tracemalloc.get_traced_memory()[0]
+        try:
+            result: typing.Any = function(*args)
+            statistics: typing.Dict[str, int] = ImageIO.reset_statistics()
+            statistics['peak_allocated'] = tracemalloc.get_traced_memory()[1] - start
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+        return result, statistics
+
+    @staticmethod
+    def benchmark_decoders(paths: typing.List[str], repeat: int = 3) -> typing.Dict[str, typing.Dict[str, float]]:
+        timings: typing.Dict[str, typing.Dict[str, float]] = dict()
+        for path in paths:
+            with ImageIO.read(path) as data:
+                with ImageIO.open_image(data) as image:
+                    image_format: str = str(image.format)
+                timing: typing.Dict[str, float] = timings.setdefault(image_format, {'pil': 0.0, 'opencv': 0.0})
+                for _ in range(repeat):
+                    timer: float = time.perf_counter()
+                    with ImageIO.open_image(data) as image:
+                        image.load()
+                    timing['pil'] += time.perf_counter() - timer
+                    timer = time.perf_counter()
+                    ImageIO.decode_array(data)
+                    timing['opencv'] += time.perf_counter() - timer
+        return timings
@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import typing
+from .atomic_file import AtomicFile
+from .journal import Journal
+from .processor import Processor
+from .progress_bar import ProgressBar
+from .stage_chain import StageChain
+from .worker_pool import WorkerPool, TaskResult
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+class JobRunner:
+    pool_options: typing.Tuple[str, ...] = ('processes', 'max_tasks_per_child', 'max_worker_rss', 'memory_budget',
+                                            'pool')
+
+    def __init__(self, jobs: typing.List[dict], pool: WorkerPool = None, processes: int = None,
+                 memory_budget: int = None, resume: bool = False):
+        if len(jobs) == 0:
+            raise TypeError('At least one job required.')
+        names: typing.List[str] = [job.get('name', f'job-{index}') for index, job in enumerate(jobs)]
+        duplicate_names: typing.List[str] = sorted({name for name in names if names.count(name) > 1})
+        if len(duplicate_names) != 0:
+            raise TypeError(f'Job names must be unique, duplicated: {", ".join(duplicate_names)}.')
+        self.resume: bool = resume
+        self.pool: WorkerPool = pool if pool is not None else WorkerPool(processes, memory_budget=memory_budget)
+        self.jobs: typing.List[dict] = [self.__create_job(index, job) for index, job in enumerate(jobs)]
+        self.metrics: dict = dict()
+        self.__lock: threading.Lock = threading.Lock()
+        self.progress: ProgressBar or None = None
+
+    def run(self) -> dict:
+        self.progress = ProgressBar(sum(len(job['files']) for job in self.jobs))
+        self.progress.show()
+        timer: float = time.perf_counter()
+        completed: queue.Queue = queue.Queue()
+        pending_count: int = 0
+        active_jobs: typing.List[dict] = [job for job in self.jobs if len(job['files']) != 0]
+        for job in self.jobs:
+            skipped_text: str = f', {job["skipped"]} already done' if job['skipped'] != 0 else ''
+            self.__write(job, f'\nJob "{job["name"]}" queued: {len(job["files"])} images, weight {job["weight"]}'
+                              f'{skipped_text}.')
+        while len(active_jobs) != 0:
+            job: dict = min(active_jobs, key=lambda item: (item['pass'], item['index']))
+            file: str = job['files'][job['submitted']]
+            job['submitted'] += 1
+            job['pass'] += 1 / job['weight']
+            if job['submitted'] == len(job['files']):
+                active_jobs.remove(job)
+            if job['started'] is None:
+                job['started'] = time.perf_counter()
+            cost: int = WorkerPool.estimate_memory(file) if self.pool.memory_budget is not None else 0
+            result: TaskResult = self.pool.apply_async(JobRunner.execute, (*self.__get_task(job, file), file), cost)
+            result.add_done_callback(lambda task_result, job=job, file=file: completed.put((job, file, task_result)))
+            pending_count += 1
+            while not completed.empty():
+                self.__on_task_done(*completed.get())
+                pending_count -= 1
+        for _ in range(pending_count):
+            self.__on_task_done(*completed.get())
+        self.progress.finish()
+        elapsed: float = time.perf_counter() - timer
+        busy_time: float = sum(job['busy_time'] for job in self.jobs)
+        self.metrics = {'elapsed': elapsed,
+                        'images_count': sum(job['done'] for job in self.jobs),
+                        'failed_count': sum(job['failed'] for job in self.jobs),
+                        'skipped_count': sum(job['skipped'] for job in self.jobs),
+                        'utilization': busy_time / max(elapsed * self.pool.processes, 1e-9),
+                        'jobs': {job['name']: self.get_job_metrics(job) for job in self.jobs}}
+        print(f'\nAll jobs complete in {ProgressBar.format_time(elapsed)}, '
+              f'worker utilization {round(self.metrics["utilization"] * 100, 1)}%.')
+        return self.metrics
+
+    def get_status(self) -> typing.Dict[str, typing.Dict[str, int]]:
+        with self.__lock:
+            return {job['name']: {'total': len(job['files']), 'submitted': job['submitted'], 'done': job['done'],
+                                  'failed': job['failed'], 'skipped': job['skipped']} for job in self.jobs}
+
+    def close(self):
+        self.pool.close()
+
+    def __create_job(self, index: int, job: dict) -> dict:
+        if 'stages' not in job:
+            raise TypeError(f'Job {index} has no "stages".')
+        pool_options: typing.List[str] = [name for name in JobRunner.pool_options if name in job.get('processor', ())]
+        if len(pool_options) != 0:
+            raise TypeError(f'Job {index} sets worker pool options in "processor": {", ".join(pool_options)}.\n'
+                            f'All jobs share the pool of the runner, configure it with "processes" and '
+                            f'"memory_budget" of JobRunner instead.')
+        weight: float = float(job.get('weight', 1))
+        if weight <= 0:
+            raise TypeError(f'Weight of job {index} must be > 0.')
+        name: str = job.get('name', f'job-{index}')
+        processor: Processor = Processor(**job.get('processor', dict()), pool=self.pool)
+        chain: StageChain = processor.create_chain(job['stages'], job.get('output_directory'))
+        files: list = processor.get_files(job.get('files'))
+        journal: Journal or None = None
+        completed_outputs: typing.Dict[str, str] = dict()
+        if processor.use_journal or self.resume:
+            journal = Journal(f'{chain.output_directory}/.journal/{name}.jsonl', self.resume,
+                              Journal.get_key('chain', StageChain.run, (job.get('processor', dict()), job['stages'])))
+            if self.resume:
+                AtomicFile.cleanup(chain.output_directory)
+                for file in files:
+                    completed_output: str or None = journal.get_completed_output(file)
+                    if completed_output is not None:
+                        completed_outputs[file] = completed_output
+            files = [file for file in files if file not in completed_outputs]
+            journal.queue(files)
+        return {'index': index,
+                'name': name,
+                'weight': weight,
+                'processor': processor,
+                'chain': chain,
+                'journal': journal,
+                'files': files,
+                'skipped': len(completed_outputs),
+                'pass': 0.0,
+                'submitted': 0,
+                'done': 0,
+                'failed': 0,
+                'input_weight': 0,
+                'output_weight': 0,
+                'busy_time': 0.0,
+                'started': None,
+                'finished': None}
+
+    def __get_task(self, job: dict, file: str) -> typing.Tuple[typing.Callable, tuple]:
+        journal: Journal or None = job['journal']
+        if journal is not None:
+            return Journal.run_task, (journal.path, journal.key, file, job['chain'].run, ())
+        return job['chain'].run, (file,)
+
+    def __on_task_done(self, job: dict, file: str, result: TaskResult):
+        input_size: int = 0
+        error: Exception or None = None
+        with self.__lock:
+            try:
+                elapsed: float
+                output_size: int
+                _, elapsed, input_size, output_size = result.get(0)
+            except Exception as err:
+                error = err
+                job['failed'] += 1
+            else:
+                job['done'] += 1
+                job['busy_time'] += elapsed
+                job['input_weight'] += input_size
+                job['output_weight'] += output_size
+            finished: bool = job['done'] + job['failed'] == len(job['files'])
+            if finished:
+                job['finished'] = time.perf_counter()
+        if error is not None:
+            self.__write(job, f'\n{file} was not processed: {error!r}', True)
+        self.progress.inc(size=input_size)
+        self.progress.show()
+        if finished:
+            metrics: dict = self.get_job_metrics(job)
+            self.__write(job, f'\nJob "{job["name"]}" complete: {metrics["images_count"]} images, '
+                              f'{metrics["failed_count"]} failed, {ProgressBar.format_time(metrics["elapsed"])}, '
+                              f'{round(metrics["images_per_second"], 2)} img/s, '
+                              f'{round(metrics["output_weight"] / 1024 ** 2, 2)}MB.')
+
+    @staticmethod
+    def get_job_metrics(job: dict) -> dict:
+        elapsed: float = (job['finished'] or time.perf_counter()) - (job['started'] or time.perf_counter())
+        return {'images_count': job['done'],
+                'failed_count': job['failed'],
+                'skipped_count': job['skipped'],
+                'input_weight': job['input_weight'],
+                'output_weight': job['output_weight'],
+                'elapsed': elapsed,
+                'busy_time': job['busy_time'],
+                'images_per_second': job['done'] / max(elapsed, 1e-9)}
+
+    @staticmethod
+    def __write(job: dict, text: str, error: bool = False):
+        print(text)
+        logger = job['processor'].logger
+        if logger is not None:
+            if error:
+                logger.error_message(text)
+            else:
+                logger.write(text)
+
+    @staticmethod
+    def execute(function: typing.Callable, args: tuple, path: str) -> typing.Tuple[str, float, int, int]:
+        timer: float = time.perf_counter()
+        output_path: str = function(*args)
+        elapsed: float = time.perf_counter() - timer
+        return output_path, elapsed, os.path.getsize(path), os.path.getsize(output_path)
+
+    @staticmethod
+    def load(path: str) -> typing.List[dict]:
+        with open(path, 'r', encoding='utf-8') as file:
+            if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+                if yaml is None:
+                    raise RuntimeError('YAML job files require the "PyYAML" package.')
+                document: dict or list = yaml.safe_load(file)
+            else:
+                document: dict or list = json.load(file)
+        if isinstance(document, dict):
+            document = document.get('jobs', [])
+        return document
+
+
+if __name__ == '__main__':
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='Run a list of jobs on one worker pool.')
+    parser.add_argument('jobs', help='JSON or YAML file with the list of jobs.')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--memory-budget', type=int, default=None)
+    parser.add_argument('--resume', action='store_true')
+    arguments: argparse.Namespace = parser.parse_args()
+    runner: JobRunner = JobRunner(JobRunner.load(arguments.jobs), processes=arguments.processes,
+                                  memory_budget=arguments.memory_budget, resume=arguments.resume)
+    try:
+        runner.run()
+    finally:
+        runner.close()
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import time
+import typing
+
+
+class Journal:
+    QUEUED: str = 'queued'
+    STARTED: str = 'started'
+    DONE: str = 'done'
+    FAILED: str = 'failed'
+
+    def __init__(self, path: str, resume: bool = False, key: str = ''):
+        self.path: str = path
+        self.key: str = key
+        self.tasks: dict = dict()
+        directory: str = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        if resume and os.path.exists(path):
+            self.__load()
+        else:
+            open(path, 'w').close()
+
+    def queue(self, tasks: list):
+        records: list = [Journal.create_record(task, Journal.QUEUED) for task in tasks]
+        Journal.write(self.path, records)
+        for record in records:
+            self.tasks[record['task']] = record
+
+    def failed(self, task: str, error: Exception):
+        record: dict = Journal.create_record(task, Journal.FAILED, error=repr(error))
+        Journal.write(self.path, [record])
+        self.tasks[task] = record
+
+    def get_completed_output(self, task: str) -> str or None:
+        record: dict or None = self.tasks.get(task)
+        if record is None or record['state'] != Journal.DONE or record.get('key') != self.key:
+            return None
+        output_path: str = record['output']
+        if not os.path.exists(output_path) or Journal.get_checksum(output_path) != record['checksum']:
+            return None
+        return output_path
+
+    def __load(self):
+        with open(self.path, 'r', encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    record: dict = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.tasks[record['task']] = record
+
+    @staticmethod
+    def run_task(path: str, key: str, task: str, function: typing.Callable, args: tuple) -> str:
+        Journal.write(path, [Journal.create_record(task, Journal.STARTED)])
+        try:
+            output_path: str = function(task, *args)
+        except Exception as err:
+            Journal.write(path, [Journal.create_record(task, Journal.FAILED, error=repr(err))])
+            raise
+        Journal.write(path, [Journal.create_record(task, Journal.DONE, output_path,
+                                                   Journal.get_checksum(output_path), key=key)])
+        return output_path
+
+    @staticmethod
+    def create_record(task: str, state: str, output: str = None, checksum: str = None, error: str = None,
+                      key: str = None) -> dict:
+        record: dict = {'task': task, 'state': state, 'time': time.time()}
+        if output is not None:
+            record['output'] = output
+        if checksum is not None:
+            record['checksum'] = checksum
+        if error is not None:
+            record['error'] = error
+        if key is not None:
+            record['key'] = key
+        return record
+
+    @staticmethod
+    def write(path: str, records: list):
+        data: str = ''.join(f'{json.dumps(record)}\n' for record in records)
+        with open(path, 'a', encoding='utf-8') as journal:
+            journal.write(data)
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    @staticmethod
+    def get_key(stage: str, function: typing.Callable, args: tuple) -> str:
+        instance: typing.Any = getattr(function, '__self__', None)
+        settings: dict = {name: value for name, value in getattr(instance, '__dict__', dict()).items()
+                          if isinstance(value, (str, int, float, bool, tuple, list, dict, type(None)))}
+        data: str = json.dumps([stage, getattr(function, '__name__', ''), args, settings], sort_keys=True,
+                               default=lambda value: type(value).__name__)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get_checksum(path: str) -> str:
+        checksum = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 ** 2), b''):
+                checksum.update(chunk)
+        return checksum.hexdigest()
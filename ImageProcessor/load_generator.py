@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import collections
+import math
+import random
+import time
+import typing
+import aiohttp
+
+
+class LoadGenerator:
+    def __init__(self,
+                 url: str,
+                 paths: typing.List[str],
+                 requests_count: int = 1000,
+                 concurrency: int = 32,
+                 widths: typing.Tuple[int or None, ...] = (320,),
+                 heights: typing.Tuple[int or None, ...] = (None,),
+                 quality: int = None,
+                 seed: int = 0):
+        self.url: str = url.rstrip('/')
+        self.paths: typing.List[str] = paths
+        self.requests_count: int = requests_count
+        self.concurrency: int = concurrency
+        self.widths: typing.Tuple[int or None, ...] = widths
+        self.heights: typing.Tuple[int or None, ...] = heights
+        self.quality: int or None = quality
+        self.random: random.Random = random.Random(seed)
+
+    async def run(self) -> dict:
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(self.requests_count):
+            queue.put_nowait(self.__create_url())
+        latencies: typing.List[float] = []
+        statuses: collections.Counter = collections.Counter()
+        connector: aiohttp.TCPConnector = aiohttp.TCPConnector(limit=self.concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            start_time: float = time.perf_counter()
+            await asyncio.gather(*[self.__worker(session, queue, latencies, statuses)
+                                   for _ in range(self.concurrency)])
+            elapsed: float = time.perf_counter() - start_time
+        return self.get_statistics(latencies, statuses, elapsed)
+
+    async def __worker(self, session: aiohttp.ClientSession, queue: asyncio.Queue,
+                       latencies: typing.List[float], statuses: collections.Counter):
+        while not queue.empty():
+            url: str = queue.get_nowait()
+            start_time: float = time.perf_counter()
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+                    statuses[response.status] += 1
+            except aiohttp.ClientError as err:
+                statuses[type(err).__name__] += 1
+            latencies.append(time.perf_counter() - start_time)
+
+    def __create_url(self) -> str:
+        parameters: typing.List[str] = []
+        width: int or None = self.random.choice(self.widths)
+        height: int or None = self.random.choice(self.heights)
+        for name, value in (('w', width), ('h', height), ('q', self.quality)):
+            if value is not None:
+                parameters.append(f'{name}={value}')
+        query: str = f'?{"&".join(parameters)}' if parameters else ''
+        return f'{self.url}/{self.random.choice(self.paths)}{query}'
+
+    @staticmethod
+    def get_statistics(latencies: typing.List[float], statuses: collections.Counter, elapsed: float) -> dict:
+        latencies = sorted(latencies)
+        return {'requests': len(latencies),
+                'statuses': dict(statuses),
+                'requests_per_second': len(latencies) / max(elapsed, 1e-9),
+                'p50': LoadGenerator.get_percentile(latencies, 50),
+                'p90': LoadGenerator.get_percentile(latencies, 90),
+                'p99': LoadGenerator.get_percentile(latencies, 99),
+                'max': latencies[-1] if latencies else 0.0}
+
+    @staticmethod
+    def get_percentile(sorted_values: typing.List[float], percentile: float) -> float:
+        if not sorted_values:
+            return 0.0
+        index: int = max(0, math.ceil(percentile / 100 * len(sorted_values)) - 1)
+        return sorted_values[index]
+
+
+if __name__ == '__main__':
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='Load generator for the rendition server.')
+    parser.add_argument('url', help='Server URL, for example http://127.0.0.1:8080')
+    parser.add_argument('paths', nargs='+', help='Image paths relative to the server directory.')
+    parser.add_argument('-n', '--requests', type=int, default=1000)
+    parser.add_argument('-c', '--concurrency', type=int, default=32)
+    parser.add_argument('-w', '--widths', type=int, nargs='+', default=[320])
+    parser.add_argument('--heights', type=int, nargs='+', default=None)
+    parser.add_argument('-q', '--quality', type=int, default=None)
+    arguments: argparse.Namespace = parser.parse_args()
+    generator: LoadGenerator = LoadGenerator(arguments.url, arguments.paths, arguments.requests,
+                                             arguments.concurrency, tuple(arguments.widths),
+                                             tuple(arguments.heights) if arguments.heights else (None,),
+                                             arguments.quality)
+    report: dict = asyncio.run(generator.run())
+    print(f'Requests: {report["requests"]} {report["statuses"]}\n'
+          f'Throughput: {round(report["requests_per_second"], 1)} req/s\n'
+          f'Latency: p50 {round(report["p50"] * 1000, 1)}ms '
+          f'| p90 {round(report["p90"] * 1000, 1)}ms '
+          f'| p99 {round(report["p99"] * 1000, 1)}ms '
+          f'| max {round(report["max"] * 1000, 1)}ms')
@@ -1,6 +1,8 @@
 import os
+import typing
 from PIL import Image
 from .logger import Logger
+from .image_io import ImageIO
 
 
 class Paster:
@@ -16,39 +18,48 @@ class Paster:
                 os.mkdir(output_directory)
 
     def make_image(self, path: str, ratio: float = None) -> str:
-        if not ratio:
-            ratio: float = self.ratio
-            if not self.ratio:
-                raise RuntimeError('Ratio not set!')
+        if not ratio and not self.ratio:
+            raise RuntimeError('Ratio not set!')
         if not os.path.exists(path):
             raise RuntimeError('File not found!')
         if self.output_directory is not None:
             output_path: str = f'{self.output_directory}/{os.path.basename(path)}'
         else:
             output_path: str = path
-        input_size: int = os.path.getsize(path)
+        with ImageIO.read(path) as data:
+            output_data: bytes
+            output_data, _ = self.make_image_data(data, path, ratio)
+        ImageIO.write(output_path, output_data)
+        return output_path
+
+    def make_image_data(self, data: bytes, name: str, ratio: float = None) -> typing.Tuple[bytes, str]:
+        if not ratio:
+            ratio: float = self.ratio
+            if not self.ratio:
+                raise RuntimeError('Ratio not set!')
         height: int
         width: int
-        original_image: Image = Image.open(path)
-        width, height = original_image.size
         target_width: int
         target_height: int
-        target_width, target_height = self.get_new_size(width, height, ratio)
-        new_image: Image = Image.new("RGB", (target_width, target_height), (255, 255, 255))
-        if target_width == width:
-            x: int = 0
-        else:
-            x: int = int((target_width-width)/2)
-        if target_height == height:
-            y: int = 0
-        else:
-            y: int = int((target_width-width)/2)
-        new_image.paste(original_image, (x, y))
-        new_image.save(output_path)
+        with ImageIO.open_image(data) as original_image:
+            width, height = original_image.size
+            target_width, target_height = self.get_new_size(width, height, ratio)
+            new_image: Image = Image.new("RGB", (target_width, target_height), (255, 255, 255))
+            if target_width == width:
+                x: int = 0
+            else:
+                x: int = int((target_width-width)/2)
+            if target_height == height:
+                y: int = 0
+            else:
+                y: int = int((target_width-width)/2)
+            new_image.paste(original_image, (x, y))
+            output_data: bytes = ImageIO.encode_image(
+                new_image, Image.registered_extensions().get(os.path.splitext(name)[1].lower(), original_image.format))
         if self.logger is not None:
-            self.logger.cropping_message(path, (height, width), (target_height, target_width),
-                                         input_size, os.path.getsize(output_path))
-        return output_path
+            self.logger.cropping_message(name, (height, width), (target_height, target_width),
+                                         len(data), len(output_data))
+        return output_data, name
 
     @staticmethod
     def get_new_size(width: float, height: float, ratio: float) -> tuple:
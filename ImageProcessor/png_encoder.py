@@ -0,0 +1,259 @@
+import struct
+import typing
+import zlib
+import numpy
+from numpy import ndarray
+import PIL.Image
+from SSIM_PIL import compare_ssim
+from .encoders import Encoder
+
+
+class PngEncoder(Encoder):
+    name: str = 'png'
+    format: str = 'PNG'
+    extension: str = '.png'
+    lossless: bool = True
+    signature: bytes = b'\x89PNG\r\n\x1a\n'
+    filter_types: typing.Tuple[str, ...] = ('none', 'sub', 'up', 'average', 'paeth')
+    zlib_strategies: typing.Dict[str, int] = {'default': zlib.Z_DEFAULT_STRATEGY,
+                                              'filtered': zlib.Z_FILTERED,
+                                              'rle': zlib.Z_RLE}
+    sixteen_bit_modes: typing.Tuple[str, ...] = ('I;16', 'I;16L', 'I;16B', 'I')
+    sample_bands: typing.Tuple[int, int] = (8, 16)
+    palette_sizes: typing.Tuple[int, ...] = (256, 128, 64, 32, 16, 4, 2)
+
+    def __init__(self, speed: int = None, quantize: bool = True, ssim_goal: float = 0.98,
+                 max_colors: int = 256, use_gpu: bool = False, ssim_sample_budget: int = 160000):
+        super().__init__(speed)
+        if not 2 <= max_colors <= 256:
+            raise TypeError('The "max_colors" value must be in range 2..256.')
+        self.quantize: bool = quantize
+        self.ssim_goal: float = ssim_goal
+        self.max_colors: int = max_colors
+        self.use_gpu: bool = use_gpu
+        self.ssim_sample_budget: int = ssim_sample_budget
+        if speed is not None and speed < 4:
+            self.filter_strategies: typing.Tuple[str, ...] or None = self.filter_types + ('adaptive',)
+            self.zlib_strategy_names: typing.Tuple[str, ...] or None = tuple(self.zlib_strategies)
+        elif speed is not None and speed < 7:
+            self.filter_strategies: typing.Tuple[str, ...] or None = ('none', 'paeth', 'adaptive')
+            self.zlib_strategy_names: typing.Tuple[str, ...] or None = ('default', 'filtered', 'rle')
+        else:
+            self.filter_strategies: typing.Tuple[str, ...] or None = None
+            self.zlib_strategy_names: typing.Tuple[str, ...] or None = None
+        self.compression_level: int = 9 if speed is None or speed < 9 else 6
+
+    def prepare(self, image: PIL.Image.Image) -> PIL.Image.Image:
+        if image.mode in ('1', 'L', 'P', 'RGB', 'RGBA', 'LA'):
+            image.load()
+            return image
+        if image.mode in self.sixteen_bit_modes:
+            low: int
+            high: int
+            low, high = image.getextrema()
+            if 0 <= low and high <= 65535:
+                return image
+        return super().prepare(image)
+
+    def save(self, image: PIL.Image.Image, output: typing.BinaryIO, quality: int = None):
+        output.write(self.encode(image, quality))
+
+    def encode(self, image: PIL.Image.Image, quality: int = None) -> bytes:
+        image = self.__reduce(self.prepare(image))
+        data: bytes = self.__write_png(image)
+        if self.quantize and image.mode in ('RGB', 'RGBA'):
+            quantized_image: PIL.Image.Image or None = self.__quantize(image)
+            if quantized_image is not None:
+                quantized_data: bytes = self.__write_png(quantized_image)
+                if len(quantized_data) < len(data):
+                    return quantized_data
+        return data
+
+    def __reduce(self, image: PIL.Image.Image) -> PIL.Image.Image:
+        if image.mode == '1':
+            return image.convert('L')
+        if image.mode in self.sixteen_bit_modes:
+            pixels: ndarray = numpy.asarray(image)
+            if pixels.max() <= 255:
+                return PIL.Image.fromarray(pixels.astype(numpy.uint8), 'L')
+            return image
+        if image.mode in ('RGBA', 'LA') and image.getextrema()[-1][0] == 255:
+            image = image.convert(image.mode[:-1])
+        if image.mode == 'RGB':
+            pixels: ndarray = numpy.asarray(image)
+            if (pixels[:, :, 0] == pixels[:, :, 1]).all() and (pixels[:, :, 1] == pixels[:, :, 2]).all():
+                return image.convert('L')
+        if image.mode in ('RGB', 'RGBA') and image.getcolors(256) is not None:
+            return self.__to_palette(image)
+        return image
+
+    def __quantize(self, image: PIL.Image.Image) -> PIL.Image.Image or None:
+        from .compressor import Compressor
+        proxy_image: PIL.Image.Image = Compressor.get_patch_mosaic(image, self.ssim_sample_budget)
+        palette_sizes: typing.List[int] = [self.max_colors] + [colors for colors in self.palette_sizes
+                                                               if colors < self.max_colors]
+        selected_colors: int or None = None
+        low: int = 0
+        height: int = len(palette_sizes) - 1
+        while low <= height:
+            index: int = (low + height) // 2 if selected_colors is not None else low
+            colors: int = palette_sizes[index]
+            if self.__get_ssim(proxy_image, self.__quantize_colors(proxy_image, colors)) >= self.ssim_goal:
+                selected_colors = colors
+                low = index + 1
+            elif selected_colors is None:
+                return None
+            else:
+                height = index - 1
+        return self.__quantize_colors(image, selected_colors)
+
+    @staticmethod
+    def __quantize_colors(image: PIL.Image.Image, colors: int) -> PIL.Image.Image:
+        method: PIL.Image.Quantize = PIL.Image.Quantize.FASTOCTREE if image.mode == 'RGBA' \
+            else PIL.Image.Quantize.MEDIANCUT
+        return image.quantize(colors, method=method, dither=PIL.Image.Dither.FLOYDSTEINBERG)
+
+    def __get_ssim(self, original_image: PIL.Image.Image, quantized_image: PIL.Image.Image) -> float:
+        converted_image: PIL.Image.Image = quantized_image.convert(original_image.mode)
+        ssim: float = compare_ssim(original_image.convert('RGB'), converted_image.convert('RGB'), GPU=self.use_gpu)
+        if original_image.mode == 'RGBA':
+            ssim = min(ssim, compare_ssim(original_image.getchannel('A'), converted_image.getchannel('A'),
+                                          GPU=self.use_gpu))
+        return ssim
+
+    def __write_png(self, image: PIL.Image.Image) -> bytes:
+        color_types: typing.Dict[str, int] = {'L': 0, 'RGB': 2, 'P': 3, 'LA': 4, 'RGBA': 6, 'I;16': 0, 'I;16L': 0,
+                                              'I;16B': 0, 'I': 0}
+        width: int
+        height: int
+        width, height = image.size
+        chunks: typing.List[bytes] = []
+        bit_depth: int = 8
+        if image.mode in self.sixteen_bit_modes:
+            pixels: ndarray = numpy.asarray(image).astype('>u2').view(numpy.uint8)
+            bit_depth = 16
+        else:
+            pixels: ndarray = numpy.asarray(image, dtype=numpy.uint8)
+        if image.mode == 'P':
+            colors_count: int = int(pixels.max()) + 1
+            bit_depth = next(depth for depth in (1, 2, 4, 8) if colors_count <= 2 ** depth)
+            palette: ndarray = self.__get_palette(image, colors_count)
+            chunks.append(self.__create_chunk(b'PLTE', palette[:, :3].tobytes()))
+            alpha: ndarray = palette[:, 3]
+            if (alpha != 255).any():
+                last_transparent: int = int(numpy.nonzero(alpha != 255)[0][-1])
+                chunks.append(self.__create_chunk(b'tRNS', alpha[:last_transparent + 1].tobytes()))
+        rows: ndarray = self.__pack_rows(pixels.reshape(height, -1), bit_depth)
+        bytes_per_pixel: int = max(1, (pixels.shape[2] if pixels.ndim == 3 else 1) * bit_depth // 8)
+        if image.mode in self.sixteen_bit_modes:
+            bytes_per_pixel = 2
+        header: bytes = struct.pack('>IIBBBBB', width, height, bit_depth, color_types[image.mode], 0, 0, 0)
+        return self.signature + \
+            self.__create_chunk(b'IHDR', header) + \
+            b''.join(chunks) + \
+            self.__create_chunk(b'IDAT', self.__compress_rows(rows, bytes_per_pixel)) + \
+            self.__create_chunk(b'IEND', b'')
+
+    def __compress_rows(self, rows: ndarray, bytes_per_pixel: int) -> bytes:
+        if self.filter_strategies is None:
+            data: ndarray = self.__select_adaptive_rows(self.get_filtered_rows(rows, bytes_per_pixel))
+            return self.__deflate(data.tobytes(), self.__select_zlib_strategy(data))
+        filtered_rows: typing.Dict[str, ndarray] = self.get_filtered_rows(rows, bytes_per_pixel)
+        selected_data: bytes or None = None
+        for filter_strategy in self.filter_strategies:
+            if filter_strategy == 'adaptive':
+                data: bytes = self.__select_adaptive_rows(filtered_rows).tobytes()
+            else:
+                data: bytes = self.__prepend_filter_type(filtered_rows[filter_strategy],
+                                                         self.filter_types.index(filter_strategy)).tobytes()
+            for strategy_name in self.zlib_strategy_names:
+                compressed_data: bytes = self.__deflate(data, strategy_name)
+                if selected_data is None or len(compressed_data) < len(selected_data):
+                    selected_data = compressed_data
+        return selected_data
+
+    def __select_zlib_strategy(self, data: ndarray) -> str:
+        band_count: int
+        band_height: int
+        band_count, band_height = self.sample_bands
+        if data.shape[0] <= band_count * band_height:
+            sample: bytes = data.tobytes()
+        else:
+            starts: ndarray = numpy.linspace(0, data.shape[0] - band_height, band_count).astype(int)
+            sample: bytes = b''.join(data[start:start + band_height].tobytes() for start in starts)
+        return min(self.zlib_strategies, key=lambda strategy_name: len(self.__deflate(sample, strategy_name)))
+
+    def __deflate(self, data: bytes, strategy_name: str) -> bytes:
+        compressor = zlib.compressobj(self.compression_level, zlib.DEFLATED, 15, 9,
+                                      self.zlib_strategies[strategy_name])
+        return compressor.compress(data) + compressor.flush()
+
+    def __select_adaptive_rows(self, filtered_rows: typing.Dict[str, ndarray]) -> ndarray:
+        stacked_rows: ndarray = numpy.stack([filtered_rows[name] for name in self.filter_types])
+        costs: ndarray = numpy.minimum(stacked_rows, 256 - stacked_rows.astype(numpy.int16)).sum(axis=2)
+        selected_types: ndarray = costs.argmin(axis=0)
+        selected_rows: ndarray = stacked_rows[selected_types, numpy.arange(stacked_rows.shape[1])]
+        return numpy.hstack((selected_types.astype(numpy.uint8)[:, None], selected_rows))
+
+    @staticmethod
+    def get_filtered_rows(rows: ndarray, bytes_per_pixel: int) -> typing.Dict[str, ndarray]:
+        x: ndarray = rows.astype(numpy.int16)
+        a: ndarray = numpy.zeros_like(x)
+        a[:, bytes_per_pixel:] = x[:, :-bytes_per_pixel]
+        b: ndarray = numpy.zeros_like(x)
+        b[1:] = x[:-1]
+        c: ndarray = numpy.zeros_like(x)
+        c[1:] = a[:-1]
+        p: ndarray = a + b - c
+        pa: ndarray = numpy.abs(p - a)
+        pb: ndarray = numpy.abs(p - b)
+        pc: ndarray = numpy.abs(p - c)
+        paeth: ndarray = numpy.where((pa <= pb) & (pa <= pc), a, numpy.where(pb <= pc, b, c))
+        return {'none': rows,
+                'sub': (x - a).astype(numpy.uint8),
+                'up': (x - b).astype(numpy.uint8),
+                'average': (x - ((a + b) >> 1)).astype(numpy.uint8),
+                'paeth': (x - paeth).astype(numpy.uint8)}
+
+    @staticmethod
+    def __prepend_filter_type(rows: ndarray, filter_type: int) -> ndarray:
+        return numpy.hstack((numpy.full((rows.shape[0], 1), filter_type, dtype=numpy.uint8), rows))
+
+    @staticmethod
+    def __pack_rows(rows: ndarray, bit_depth: int) -> ndarray:
+        if bit_depth >= 8:
+            return rows
+        pixels_per_byte: int = 8 // bit_depth
+        padding: int = -rows.shape[1] % pixels_per_byte
+        rows = numpy.pad(rows, ((0, 0), (0, padding))).reshape(rows.shape[0], -1, pixels_per_byte)
+        shifts: ndarray = numpy.arange(pixels_per_byte - 1, -1, -1, dtype=numpy.uint8) * bit_depth
+        return numpy.bitwise_or.reduce(rows << shifts, axis=2).astype(numpy.uint8)
+
+    @staticmethod
+    def __to_palette(image: PIL.Image.Image) -> PIL.Image.Image:
+        pixels: ndarray = numpy.asarray(image).reshape(-1, len(image.getbands()))
+        colors: ndarray
+        indexes: ndarray
+        colors, indexes = numpy.unique(pixels, axis=0, return_inverse=True)
+        palette_image: PIL.Image.Image = PIL.Image.frombytes('P', image.size, indexes.astype(numpy.uint8).tobytes())
+        palette_image.putpalette(colors.tobytes(), rawmode=image.mode)
+        return palette_image
+
+    @staticmethod
+    def __get_palette(image: PIL.Image.Image, colors_count: int) -> ndarray:
+        palette: ndarray = numpy.zeros((colors_count, 4), dtype=numpy.uint8)
+        palette[:, 3] = 255
+        raw_palette: list = image.getpalette('RGBA')[:colors_count * 4]
+        palette[:len(raw_palette) // 4] = numpy.array(raw_palette, dtype=numpy.uint8).reshape(-1, 4)
+        transparency: int or bytes or None = image.info.get('transparency')
+        if isinstance(transparency, int) and transparency < colors_count:
+            palette[transparency, 3] = 0
+        elif isinstance(transparency, bytes):
+            alpha: ndarray = numpy.frombuffer(transparency, dtype=numpy.uint8)[:colors_count]
+            palette[:len(alpha), 3] = alpha
+        return palette
+
+    @staticmethod
+    def __create_chunk(chunk_type: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + chunk_type + data + \
+            struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff)
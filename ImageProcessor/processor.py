@@ -1,10 +1,11 @@
+import queue
 import types
 import typing
 import re
 import os
 import mimetypes
 import asyncio
-import multiprocessing
+import time
 from .resizer import Resizer
 from .cropper import Cropper
 from .paster import Paster
@@ -13,10 +14,23 @@ from .compressor import Compressor as LocalCompressor
 from .progress_bar import ProgressBar
 from .logger import Logger
 from .errors import TinyPNGAccountError
+from .journal import Journal
+from .atomic_file import AtomicFile
+from .worker_pool import WorkerPool, TaskResult
+from .spool import JobSpool, LeaseSpool
+from .storage import Storage
+from .deduplicator import Deduplicator
+from .estimator import Estimator
+from .profiler import Profiler
+from .compression_router import CompressionRouter
+from .stage_chain import StageChain
+from .watcher import Watcher
 
 
 class Processor:
     progress: ProgressBar
+    __stage_names: typing.Dict[str, str] = {'resize': 'Resize', 'crop': 'Crop', 'paste': 'Paste',
+                                            'compress': 'Compression'}
 
     def __init__(self,
                  output_directory: str = 'output',
@@ -33,9 +47,32 @@ class Processor:
                  dynamic_quality_range: typing.Tuple[int, int] = (80, 85),
                  use_gpu_for_compress: bool = False,
                  tiny_png_api_key: list or str = None,
-                 write_log: bool = False):
-        self.__mp_pool: multiprocessing.Pool = multiprocessing.Pool()
+                 write_log: bool = False,
+                 use_journal: bool = False,
+                 output_formats: typing.Tuple[str, ...] = ('jpeg',),
+                 encoder_speed: typing.Dict[str, int] = None,
+                 png_quantize: bool = True,
+                 ssim_proxy: str = 'resize',
+                 ssim_sample_budget: int = 160000,
+                 processes: int = None,
+                 max_tasks_per_child: int = None,
+                 max_worker_rss: int = None,
+                 memory_budget: int = None,
+                 deduplicate: str or None = None,
+                 perceptual_threshold: int = 0,
+                 perceptual_ssim_threshold: float = 0.95,
+                 profile_fraction: float = None,
+                 profile_mode: str = 'sampling',
+                 profile_interval: float = 0.005,
+                 pool: WorkerPool = None):
+        self.__options: dict = {name: value for name, value in locals().items()
+                                if name not in ('self', 'pool', 'tiny_png_api_key')}
+        if pool is None:
+            pool = WorkerPool(processes, max_tasks_per_child, max_worker_rss, memory_budget)
+        self.__pool: WorkerPool = pool
         self.directory: str = directory
+        self.output_directory: str = output_directory
+        self.use_journal: bool = use_journal
         self.has_key_error: bool = False
         if write_log:
             self.logger: Logger = Logger(f'{output_directory}/log.txt')
@@ -47,146 +84,677 @@ class Processor:
         self.paster: Paster = Paster(output_directory, ratio, self.logger)
         if tiny_png_api_key is not None:
             self.tiny_png_compressor: CompressorTinyPng = CompressorTinyPng(tiny_png_api_key, logger=self.logger)
-        self.local_compressor: LocalCompressor = LocalCompressor(output_directory,
-                                                                 quality,
-                                                                 compressor,
-                                                                 dynamic_quality_range,
-                                                                 use_gpu_for_compress,
-                                                                 self.logger)
+        self.__local_compressor_options: dict = {'quality': quality,
+                                                 'compressor': compressor,
+                                                 'dynamic_quality_range': dynamic_quality_range,
+                                                 'use_gpu': use_gpu_for_compress,
+                                                 'output_formats': output_formats,
+                                                 'encoder_speed': encoder_speed,
+                                                 'png_quantize': png_quantize,
+                                                 'ssim_proxy': ssim_proxy,
+                                                 'ssim_sample_budget': ssim_sample_budget}
+        self.local_compressor: LocalCompressor = LocalCompressor(output_directory, logger=self.logger,
+                                                                 **self.__local_compressor_options)
+        if profile_fraction is not None:
+            self.profiler: Profiler or None = Profiler(f'{output_directory}/.profile', profile_fraction, profile_mode,
+                                                       profile_interval)
+        else:
+            self.profiler: Profiler or None = None
+        if deduplicate is not None:
+            self.deduplicator: Deduplicator or None = Deduplicator(deduplicate, perceptual_threshold,
+                                                                   perceptual_ssim_threshold)
+        else:
+            self.deduplicator: Deduplicator or None = None
 
     def resize_all(self, files: list = None, width: int = None, height: int = None, stretch: bool = None,
-                   save_proportions: bool = None, auto_orientation: bool = None) -> list:
-        if files is None:
-            files: list = list(filter(self.is_image, os.listdir(self.directory)))
-            files = list(map(lambda f: f'{self.directory}/{f}', files))
-        if self.logger is not None:
-            self.logger.start_resizing(len(files), self.get_overall_size(files))
-        print('Resize in progress...')
-        self.progress: ProgressBar = ProgressBar(len(files))
-        self.progress.show()
-        output_files: list = []
-        results: list = []
-        overall_output_weight: int = 0
-        for file in files:
-            results.append(self.__mp_pool.apply_async(self.resizer.resize, (file, width, height, stretch,
-                                                                            save_proportions, auto_orientation)))
-        for result in results:
-            file: str = result.get(timeout=10)
-            self.progress.inc()
-            self.progress.show()
-            overall_output_weight += os.path.getsize(file)
-            output_files.append(file)
-        if self.logger is not None:
-            self.logger.stop_resizing(overall_output_weight)
-        return output_files
+                   save_proportions: bool = None, auto_orientation: bool = None, resume: bool = False) -> list:
+        return self.__run_all('resize', self.resizer.resize, files,
+                              (width, height, stretch, save_proportions, auto_orientation), resume)
 
-    def crop_all(self, files: list = None, ratio: float = None, auto_orientation: bool = None):
-        if files is None:
-            files: list = list(filter(self.is_image, os.listdir(self.directory)))
-            files = list(map(lambda f: f'{self.directory}/{f}', files))
-        if self.logger is not None:
-            self.logger.start_cropping(len(files), self.get_overall_size(files))
-        print('Crop in progress...')
-        self.progress: ProgressBar = ProgressBar(len(files))
-        self.progress.show()
-        output_files: list = []
-        results: list = []
-        overall_output_weight: int = 0
-        for file in files:
-            results.append(self.__mp_pool.apply_async(self.cropper.crop_image, (file, ratio, auto_orientation)))
-        for result in results:
-            file: str = result.get(timeout=10)
-            self.progress.inc()
-            self.progress.show()
-            overall_output_weight += os.path.getsize(file)
-            output_files.append(file)
-        if self.logger is not None:
-            self.logger.stop_cropping(overall_output_weight)
-        return output_files
+    def crop_all(self, files: list = None, ratio: float = None, auto_orientation: bool = None, resume: bool = False):
+        return self.__run_all('crop', self.cropper.crop_image, files, (ratio, auto_orientation), resume)
 
-    def paste_all(self, files: list = None, ratio: float = None):
-        if files is None:
-            files: list = list(filter(self.is_image, os.listdir(self.directory)))
-            files = list(map(lambda f: f'{self.directory}/{f}', files))
-        if self.logger is not None:
-            self.logger.start_pasting(len(files), self.get_overall_size(files))
-        print('Paste in progress...')
-        self.progress: ProgressBar = ProgressBar(len(files))
-        self.progress.show()
-        output_files: list = []
-        results: list = []
-        overall_output_weight: int = 0
-        for file in files:
-            results.append(self.__mp_pool.apply_async(self.paster.make_image, (file, ratio)))
-        for result in results:
-            file: str = result.get(timeout=10)
-            self.progress.inc()
-            self.progress.show()
-            overall_output_weight += os.path.getsize(file)
-            output_files.append(file)
-        if self.logger is not None:
-            self.logger.stop_pasting(overall_output_weight)
-        return output_files
+    def paste_all(self, files: list = None, ratio: float = None, resume: bool = False):
+        return self.__run_all('paste', self.paster.make_image, files, (ratio,), resume)
 
-    def compress_all(self, files: list = None) -> list:
-        if files is None:
-            files: list = list(filter(self.is_image, os.listdir(self.directory)))
-            files = list(map(lambda f: f'{self.directory}/{f}', files))
-        files = self.__validate_files_to_compress(files, self.local_compressor)
-        if self.logger is not None:
-            self.logger.start_compressing(len(files), self.get_overall_size(files))
-        print('Compression in progress...')
-        self.progress: ProgressBar = ProgressBar(len(files))
-        self.progress.show()
-        output_files: list = []
-        results: list = []
-        overall_output_weight: int = 0
-        for file in files:
-            results.append(self.__mp_pool.apply_async(self.local_compressor.compress, (file,)))
-        for result in results:
-            file: str = result.get(timeout=10)
-            self.progress.inc()
-            self.progress.show()
-            overall_output_weight += os.path.getsize(file)
-            output_files.append(file)
-        if self.logger is not None:
-            self.logger.stop_compressing(overall_output_weight)
-        return output_files
+    def compress_all(self, files: list = None, resume: bool = False) -> list:
+        return self.__run_all('compress', self.local_compressor.compress, files, (), resume)
 
     def compress_all_tiny_png(self, files: list = None):
-        if not hasattr(self, 'compressor'):
+        self.__run_coroutine(self.acompress_all_tiny_png(files))
+
+    async def aresize_all(self, files: list = None, width: int = None, height: int = None, stretch: bool = None,
+                          save_proportions: bool = None, auto_orientation: bool = None, resume: bool = False) -> list:
+        return await self.__arun_all('resize', self.resizer.resize, files,
+                                     (width, height, stretch, save_proportions, auto_orientation), resume)
+
+    async def acrop_all(self, files: list = None, ratio: float = None, auto_orientation: bool = None,
+                        resume: bool = False) -> list:
+        return await self.__arun_all('crop', self.cropper.crop_image, files, (ratio, auto_orientation), resume)
+
+    async def apaste_all(self, files: list = None, ratio: float = None, resume: bool = False) -> list:
+        return await self.__arun_all('paste', self.paster.make_image, files, (ratio,), resume)
+
+    async def acompress_all(self, files: list = None, resume: bool = False) -> list:
+        return await self.__arun_all('compress', self.local_compressor.compress, files, (), resume)
+
+    async def acompress_all_tiny_png(self, files: list = None):
+        if not hasattr(self, 'tiny_png_compressor'):
             raise AttributeError('"tiny_png_api_key" must be defined when instantiating "Processor" class.')
-        if files is None:
-            files: list = list(filter(self.is_image, os.listdir(self.directory)))
-            files = list(map(lambda f: f'{self.directory}/{f}', files))
-        files = self.__validate_files_to_compress(files, self.tiny_png_compressor)
-        if self.logger is not None:
-            self.logger.start_compressing(len(files), self.get_overall_size(files))
-        asyncio.get_event_loop().run_until_complete(self.async_compress_all_tiny_png(files))
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(None, self.__start_all, 'compress', files, self.tiny_png_compressor, False)
+        duplicates: typing.Dict[str, str] = await loop.run_in_executor(None, self.__find_duplicates, files)
+        await self.async_compress_all_tiny_png([file for file in files if file not in duplicates])
+        await loop.run_in_executor(None, self.__link_tiny_png_duplicates, duplicates)
+        await loop.run_in_executor(None, self.__stop_all, 'compress', None)
+
+    def __link_tiny_png_duplicates(self, duplicates: typing.Dict[str, str]):
+        output_directory: str or None = self.tiny_png_compressor.output_directory
+        for duplicate, representative in duplicates.items():
+            if output_directory is not None:
+                output_path: str = f'{output_directory}/{os.path.basename(representative)}'
+            else:
+                output_path: str = representative
+            Deduplicator.link_duplicate(output_path, duplicate, output_directory)
+
+    def compress_all_routed(self, files: list = None, png_route: str = 'fallback', savings_threshold: float = 0.3,
+                            max_uploads: int = 8) -> list:
+        return self.__run_coroutine(self.acompress_all_routed(files, png_route, savings_threshold, max_uploads))
+
+    async def acompress_all_routed(self, files: list = None, png_route: str = 'fallback',
+                                   savings_threshold: float = 0.3, max_uploads: int = 8) -> list:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(None, self.__start_all, 'compress', files, self.local_compressor, False)
+        tiny_png_compressor: CompressorTinyPng or None = None
+        if hasattr(self, 'tiny_png_compressor'):
+            tiny_png_compressor = CompressorTinyPng(self.tiny_png_compressor.api_keys.list.copy(),
+                                                    f'{self.output_directory}/.tiny_png', logger=self.logger)
+        router: CompressionRouter = CompressionRouter(self.__pool, self.local_compressor, tiny_png_compressor,
+                                                      self.output_directory, png_route, savings_threshold,
+                                                      max_uploads, self.logger)
+        duplicates: typing.Dict[str, str] = await loop.run_in_executor(None, self.__find_duplicates, files)
+        unique_files: list = [file for file in files if file not in duplicates]
+        print('Compression in progress...')
+        progress: ProgressBar = ProgressBar(len(unique_files))
+        self.progress: ProgressBar = progress
+        progress.show()
+        unique_output_files: list = await router.compress_all(unique_files, progress)
+        progress.finish()
+        if tiny_png_compressor is not None:
+            await loop.run_in_executor(None, self.__remove_empty_directory, tiny_png_compressor.output_directory)
+        output_files: list
+        overall_output_weight: int
+        output_files, overall_output_weight = await loop.run_in_executor(
+            None, self.__link_duplicates, files, duplicates, unique_files, unique_output_files, None)
+        text: str = f'\nRouted: {router.report["local"]} local, {router.report["tiny_png"]} TinyPNG, ' \
+                    f'{router.report["api_calls"]} API calls.'
+        print(text)
         if self.logger is not None:
-            self.logger.stop_compressing()
+            self.logger.write(text)
+        await loop.run_in_executor(None, self.__stop_all, 'compress', overall_output_weight)
+        self.routing_report: typing.Dict[str, int] = router.report
+        return output_files
 
-    async def async_compress_all_tiny_png(self, files: list, continuation: bool = False):
+    async def async_compress_all_tiny_png(self, files: list, continuation: bool = False,
+                                          progress: ProgressBar = None):
         self.tiny_png_compressor.compressed_files = set()
         if not hasattr(self.tiny_png_compressor, 'session') or self.tiny_png_compressor.session.closed:
             await self.tiny_png_compressor.create_web_session()
         if not continuation:
             print('\nCompress in progress...')
-            self.progress: ProgressBar = ProgressBar(len(files))
-            self.progress.show()
+            progress = ProgressBar(len(files))
+            self.progress: ProgressBar = progress
+            progress.show()
+        elif progress is None:
+            progress = self.progress
         tasks: set = set()
         for file in files:
             tasks.add(
-                asyncio.create_task(self.exception_wrapper(self.tiny_png_compressor.compress(file, self.progress))))
-        await asyncio.wait(tasks)
+                asyncio.create_task(self.exception_wrapper(self.tiny_png_compressor.compress(file, progress))))
+        try:
+            await asyncio.wait(tasks)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            await self.tiny_png_compressor.session.close()
+            raise
         if self.has_key_error:
             await self.tiny_png_compressor.session.close()
             self.has_key_error = False
         not_processed_files: list = self.__check_compressed_files(files)
         if len(not_processed_files) != 0:
-            await self.async_compress_all_tiny_png(not_processed_files, True)
+            await self.async_compress_all_tiny_png(not_processed_files, True, progress)
         else:
             await self.tiny_png_compressor.session.close()
+            progress.finish()
+
+    def distribute_all(self, stage: str, spool_path: str, files: list = None, args: tuple = (),
+                       wait: bool = True, lease_time: float = 60.0) -> list or int or str:
+        self.__get_stage(stage)
+        files = self.__get_files(files)
+        if stage == 'compress':
+            files = self.__validate_files_to_compress(files, self.local_compressor)
+        options: dict = {**self.__options, 'write_log': False, 'use_journal': False,
+                         'output_directory': os.path.abspath(self.output_directory),
+                         'directory': os.path.abspath(self.directory) if self.directory else self.directory}
+        spool: JobSpool or LeaseSpool = JobSpool.open(spool_path, lease_time)
+        try:
+            job_id: int or str = spool.enqueue(stage, options, [os.path.abspath(file) for file in files], args)
+            if not wait:
+                return job_id
+            print(f'Distributed {stage} in progress...')
+            self.progress: ProgressBar = ProgressBar(len(files))
+            results: typing.List[tuple] = spool.wait(job_id, progress=self.progress)
+            self.progress.finish()
+        finally:
+            spool.close()
+        for path, state, output, error in results:
+            if state == JobSpool.FAILED:
+                error_text: str = f'\n{path} was not processed: {error}'
+                print(error_text)
+                if self.logger is not None:
+                    self.logger.error_message(error_text)
+        return [output for path, state, output, error in results if state == JobSpool.DONE]
+
+    def process_file(self, stage: str, file: str, args: tuple = ()) -> str:
+        return self.__get_stage(stage)(file, *args)
+
+    def create_chain(self, stages: typing.List[str or dict], output_directory: str = None) -> StageChain:
+        chain_stages: typing.List[typing.Tuple[typing.Callable, dict]] = []
+        for stage in stages:
+            if isinstance(stage, str):
+                stage = {'stage': stage}
+            options: dict = {name: value for name, value in stage.items() if name != 'stage'}
+            chain_stages.append((self.__get_stage(stage['stage'], True), options))
+        return StageChain(output_directory if output_directory is not None else self.output_directory, chain_stages)
+
+    def watch(self, stages: typing.List[str or dict], output_directory: str = None, debounce: float = 0.5,
+              poll_interval: float = 1.0, process_existing: bool = False,
+              on_output: typing.Callable[[str, str], None] = None) -> Watcher:
+        watcher: Watcher = Watcher(self.create_chain(stages, output_directory), self.__pool, self.directory or '.',
+                                   debounce, poll_interval, process_existing=process_existing, on_output=on_output,
+                                   logger=self.logger)
+        print(f'Watching {os.path.abspath(self.directory or ".")}...')
+        self.watcher: Watcher = watcher
+        watcher.run()
+        return watcher
+
+    def get_files(self, files: list = None) -> list:
+        return self.__get_files(files)
+
+    def process_storage(self, stage: str, source: Storage, destination: Storage, keys: list = None,
+                        args: tuple = ()) -> list:
+        function: typing.Callable = self.__get_stage(stage, True)
+        if keys is None:
+            keys: list = [key for key in source.list() if self.is_image(key)]
+        if stage == 'compress':
+            keys = self.__validate_files_to_compress(keys, self.local_compressor)
+        print(f'Storage {stage} in progress...')
+        self.progress: ProgressBar = ProgressBar(len(keys))
+        self.progress.show()
+        output_keys: typing.Dict[int, str] = dict()
+        writes: list = []
+        completed: queue.Queue = queue.Queue()
+        pending_count: int = 0
+        positions: typing.Dict[str, int] = {key: index for index, key in enumerate(keys)}
+        for key, data in source.prefetch(keys):
+            index: int = positions[key]
+            cost: int = WorkerPool.estimate_memory(data) if self.__pool.memory_budget is not None else 0
+            result: TaskResult = self.__track_progress(self.__pool.apply_async(function, (data, key, *args), cost),
+                                                       len(data))
+            result.add_done_callback(lambda task_result, index=index: completed.put((index, task_result)))
+            pending_count += 1
+            while not completed.empty():
+                self.__store_result(destination, *completed.get(), output_keys, writes)
+                pending_count -= 1
+        while pending_count != 0:
+            self.__store_result(destination, *completed.get(), output_keys, writes)
+            pending_count -= 1
+        for write in writes:
+            write.result()
+        self.progress.finish()
+        return [output_keys[index] for index in sorted(output_keys)]
+
+    @staticmethod
+    def __store_result(destination: Storage, index: int, result: TaskResult, output_keys: typing.Dict[int, str],
+                       writes: list):
+        output_data: bytes
+        output_key: str
+        output_data, output_key = result.get()
+        writes.append(destination.write_async(output_key, output_data))
+        output_keys[index] = output_key
+
+    def benchmark_png(self, files: list = None, output_directory: str = 'png_benchmark') -> dict:
+        files = [file for file in self.__get_files(files) if mimetypes.guess_type(file)[0] == 'image/png']
+        input_weight: int = self.get_overall_size(files)
+        report: dict = dict()
+        os.makedirs(output_directory, exist_ok=True)
+        print('PNG benchmark in progress...')
+        local_compressor: LocalCompressor = LocalCompressor(f'{output_directory}/local',
+                                                            **self.__local_compressor_options)
+        timer: float = time.perf_counter()
+        results: list = [self.__pool.apply_async(local_compressor.compress, (file,)) for file in files]
+        output_weight: int = sum(os.path.getsize(result.get()) for result in results)
+        report['local'] = self.__create_benchmark_entry(len(files), input_weight, output_weight,
+                                                        time.perf_counter() - timer)
+        if hasattr(self, 'tiny_png_compressor'):
+            tiny_png_compressor: CompressorTinyPng = CompressorTinyPng(self.tiny_png_compressor.api_keys.list.copy(),
+                                                                       f'{output_directory}/tiny_png')
+            timer = time.perf_counter()
+            asyncio.run(self.__benchmark_tiny_png(tiny_png_compressor, files))
+            output_weight = self.get_overall_size([f'{output_directory}/tiny_png/{os.path.basename(file)}'
+                                                   for file in tiny_png_compressor.compressed_files])
+            report['tiny_png'] = self.__create_benchmark_entry(len(tiny_png_compressor.compressed_files),
+                                                               self.get_overall_size(
+                                                                   list(tiny_png_compressor.compressed_files)),
+                                                               output_weight, time.perf_counter() - timer)
+        for name, entry in report.items():
+            text: str = f'\n{Logger.format_string(name, 10, "right")}' \
+                        f'| {Logger.format_string(str(entry["images_count"]), 6, "left")} images ' \
+                        f'| {Logger.format_string(str(round(entry["output_weight"] / 1024 ** 2, 2)), 9, "left")}MB ' \
+                        f'| -{round(100 - entry["output_weight"] / max(entry["input_weight"], 1) * 100, 2)}% ' \
+                        f'| {round(entry["images_per_second"], 2)} img/s ' \
+                        f'| {round(entry["megabytes_per_second"], 2)} MB/s'
+            print(text)
+            if self.logger is not None:
+                self.logger.write(text)
+        return report
+
+    def estimate(self, files: list = None, stages: typing.Tuple[str, ...] = ('compress',), sample_size: int = 32,
+                 worker_counts: typing.Tuple[int, ...] = None, confidence: float = 0.95, seed: int = None) -> dict:
+        if 'tiny_png' in stages and not hasattr(self, 'tiny_png_compressor'):
+            raise AttributeError('"tiny_png_api_key" must be defined when instantiating "Processor" class.')
+        files = self.__get_files(files)
+        duplicates: typing.Dict[str, str] = self.__find_duplicates(files)
+        files = [file for file in files if file not in duplicates]
+        if 'compress' in stages:
+            files = [file for file in files if self.local_compressor.is_compression_supported(file)]
+        if worker_counts is None:
+            worker_counts = tuple(sorted({1, 2, 4, 8, 16, self.__pool.processes}))
+        functions: typing.List[typing.Callable] = [self.__get_stage(stage, True) for stage in stages
+                                                   if stage != 'tiny_png']
+        for stage in stages:
+            self.__check_stage_options(stage)
+        print('Estimation in progress...')
+        estimator: Estimator = Estimator(sample_size, confidence, seed)
+        strata: typing.Dict[str, tuple] = estimator.select_sample(files, self.__map(Estimator.probe, files))
+        sample: list = [file for population, sample_files in strata.values() for file in sample_files]
+        report: dict = {'images_count': len(files),
+                        'sample_size': len(sample),
+                        'strata': {stratum: len(population) for stratum, (population, _) in strata.items()},
+                        'input_weight': self.get_overall_size(files)}
+        if len(functions) != 0:
+            results: typing.Dict[str, TaskResult] = {file: self.__pool.apply_async(Estimator.measure, (file, functions))
+                                                     for file in sample}
+            measurements: typing.Dict[str, typing.Tuple[float, int]] = dict()
+            report['failed_samples'] = 0
+            for file, result in results.items():
+                try:
+                    measurements[file] = result.get()
+                except Exception as err:
+                    report['failed_samples'] += 1
+                    error_text: str = f'\n{file} could not be sampled: {err!r}'
+                    print(error_text)
+                    if self.logger is not None:
+                        self.logger.error_message(error_text)
+            cpu_time: typing.Tuple[float, float, float] = estimator.extrapolate(
+                strata, {file: elapsed for file, (elapsed, _) in measurements.items()})
+            max_image_time: float = max((elapsed for elapsed, _ in measurements.values()), default=0.0)
+            report['cpu_time'] = cpu_time
+            report['max_image_time'] = max_image_time
+            report['wall_time'] = {worker_count: tuple(
+                max(value / max(1, min(worker_count, os.cpu_count() or 1, len(files))), max_image_time)
+                for value in cpu_time) for worker_count in worker_counts}
+            report['output_weight'] = estimator.extrapolate(
+                strata, {file: output_size for file, (_, output_size) in measurements.items()})
+        if 'tiny_png' in stages:
+            report['api_calls'] = len([file for file in files
+                                       if self.tiny_png_compressor.is_compression_supported(file)])
+        self.__print_estimate(report)
+        return report
+
+    def __print_estimate(self, report: dict):
+        lines: typing.List[str] = [f'\n{report["images_count"]} images '
+                                   f'({round(report["input_weight"] / 1024 ** 2, 2)}MB), '
+                                   f'{report["sample_size"]} sampled from {len(report["strata"])} strata']
+        if 'cpu_time' in report:
+            for worker_count, (wall_time, low, high) in report['wall_time'].items():
+                lines.append(f'{Logger.format_string(str(worker_count), 4, "left")} workers '
+                             f'| {Logger.format_string(ProgressBar.format_time(wall_time), 9, "left")} '
+                             f'({ProgressBar.format_time(low)} - {ProgressBar.format_time(high)})')
+            output_weight: typing.Tuple[float, float, float] = report['output_weight']
+            lines.append(f'Output: {round(output_weight[0] / 1024 ** 2, 2)}MB '
+                         f'({round(output_weight[1] / 1024 ** 2, 2)} - {round(output_weight[2] / 1024 ** 2, 2)}MB)')
+            if report['failed_samples'] != 0:
+                lines.append(f'Failed samples: {report["failed_samples"]}')
+        if 'api_calls' in report:
+            lines.append(f'TinyPNG API calls: {report["api_calls"]}')
+        text: str = '\n'.join(lines)
+        print(text)
+        if self.logger is not None:
+            self.logger.write(text)
+
+    def benchmark_ssim_proxy(self, files: list = None,
+                             ssim_proxies: typing.Tuple[str, ...] = ('resize', 'downscale', 'patches'),
+                             ssim_sample_budgets: typing.Tuple[int, ...] = (40000, 160000, 640000)) -> dict:
+        files = [file for file in self.__get_files(files) if mimetypes.guess_type(file)[0] == 'image/jpeg']
+        strategies: typing.List[typing.Tuple[str, int]] = [('full', 0)]
+        for ssim_proxy in ssim_proxies:
+            if ssim_proxy in ('resize', 'full'):
+                strategies.append((ssim_proxy, 0))
+            else:
+                strategies += [(ssim_proxy, ssim_sample_budget) for ssim_sample_budget in ssim_sample_budgets]
+        strategies = list(dict.fromkeys(strategies))
+        print('SSIM proxy benchmark in progress...')
+        results: list = self.__map(self.local_compressor.benchmark_ssim_proxy, files, (strategies,))
+        report: dict = dict()
+        for index, (ssim_proxy, ssim_sample_budget) in enumerate(strategies):
+            name: str = f'{ssim_proxy} {ssim_sample_budget}' if ssim_sample_budget else ssim_proxy
+            errors: typing.List[int] = [abs(result[index][0] - result[0][0]) for result in results]
+            elapsed: float = sum(result[index][1] for result in results)
+            report[name] = {'images_count': len(files),
+                            'agreement': errors.count(0) / max(len(errors), 1),
+                            'within_one': len([error for error in errors if error <= 1]) / max(len(errors), 1),
+                            'mean_error': sum(errors) / max(len(errors), 1),
+                            'elapsed': elapsed}
+        for name, entry in report.items():
+            text: str = f'\n{Logger.format_string(name, 16, "right")}' \
+                        f'| {Logger.format_string(str(round(entry["agreement"] * 100, 1)), 5, "left")}% exact ' \
+                        f'| {Logger.format_string(str(round(entry["within_one"] * 100, 1)), 5, "left")}% within 1 ' \
+                        f'| mean error {round(entry["mean_error"], 2)} ' \
+                        f'| {round(entry["elapsed"], 2)}s'
+            print(text)
+            if self.logger is not None:
+                self.logger.write(text)
+        return report
+
+    async def __benchmark_tiny_png(self, compressor: CompressorTinyPng, files: list):
+        await compressor.create_web_session()
+        await asyncio.wait([asyncio.create_task(self.exception_wrapper(compressor.compress(file)))
+                            for file in files])
+        await compressor.session.close()
+
+    @staticmethod
+    def __create_benchmark_entry(images_count: int, input_weight: int, output_weight: int, elapsed: float) -> dict:
+        elapsed = max(elapsed, 1e-9)
+        return {'images_count': images_count,
+                'input_weight': input_weight,
+                'output_weight': output_weight,
+                'elapsed': elapsed,
+                'images_per_second': images_count / elapsed,
+                'megabytes_per_second': input_weight / 1024 ** 2 / elapsed}
+
+    def __run_all(self, stage: str, function: typing.Callable, files: list or None, args: tuple,
+                  resume: bool = False) -> list:
+        files = self.__start_all(stage, files, self.local_compressor)
+        output_files: list
+        overall_output_weight: int
+        output_files, overall_output_weight = self.__process_all(stage, function, files, args, resume)
+        self.__stop_all(stage, overall_output_weight)
+        return output_files
+
+    async def __arun_all(self, stage: str, function: typing.Callable, files: list or None, args: tuple,
+                         resume: bool = False) -> list:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(None, self.__start_all, stage, files, self.local_compressor)
+        output_files: list
+        overall_output_weight: int
+        output_files, overall_output_weight = await self.__aprocess_all(stage, function, files, args, resume)
+        await loop.run_in_executor(None, self.__stop_all, stage, overall_output_weight)
+        return output_files
+
+    def __start_all(self, stage: str, files: list or None, compressor: CompressorTinyPng or LocalCompressor,
+                    show_message: bool = True) -> list:
+        files = self.__get_files(files)
+        if stage == 'compress':
+            files = self.__validate_files_to_compress(files, compressor)
+        if self.logger is not None:
+            start: typing.Callable = {'resize': self.logger.start_resizing,
+                                      'crop': self.logger.start_cropping,
+                                      'paste': self.logger.start_pasting,
+                                      'compress': self.logger.start_compressing}[stage]
+            start(len(files), self.get_overall_size(files))
+        if show_message:
+            print(f'{Processor.__stage_names[stage]} in progress...')
+        return files
+
+    def __stop_all(self, stage: str, overall_output_weight: int or None):
+        if self.logger is not None:
+            stop: typing.Callable = {'resize': self.logger.stop_resizing,
+                                     'crop': self.logger.stop_cropping,
+                                     'paste': self.logger.stop_pasting,
+                                     'compress': self.logger.stop_compressing}[stage]
+            stop(overall_output_weight)
+
+    @staticmethod
+    def __remove_empty_directory(directory: str):
+        if os.path.isdir(directory) and len(os.listdir(directory)) == 0:
+            os.rmdir(directory)
+
+    def __process_all(self, stage: str, function: typing.Callable, files: list, args: tuple,
+                      resume: bool = False) -> typing.Tuple[list, int]:
+        duplicates: typing.Dict[str, str] = self.__find_duplicates(files)
+        unique_files: list = [file for file in files if file not in duplicates]
+        unique_output_files: list
+        overall_output_weight: int
+        unique_output_files, overall_output_weight = self.__process_unique(stage, function, unique_files, args,
+                                                                           resume)
+        return self.__link_duplicates(files, duplicates, unique_files, unique_output_files, overall_output_weight)
+
+    async def __aprocess_all(self, stage: str, function: typing.Callable, files: list, args: tuple,
+                             resume: bool = False) -> typing.Tuple[list, int]:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        duplicates: typing.Dict[str, str] = await loop.run_in_executor(None, self.__find_duplicates, files)
+        unique_files: list = [file for file in files if file not in duplicates]
+        unique_output_files: list
+        overall_output_weight: int
+        unique_output_files, overall_output_weight = await self.__aprocess_unique(stage, function, unique_files,
+                                                                                  args, resume)
+        return await loop.run_in_executor(None, self.__link_duplicates, files, duplicates, unique_files,
+                                          unique_output_files, overall_output_weight)
+
+    def __link_duplicates(self, files: list, duplicates: typing.Dict[str, str], unique_files: list,
+                          unique_output_files: list, overall_output_weight: int or None) -> typing.Tuple[list, int]:
+        if overall_output_weight is None:
+            overall_output_weight = self.get_overall_size(unique_output_files)
+        if len(duplicates) == 0:
+            return unique_output_files, overall_output_weight
+        outputs: typing.Dict[str, str] = dict(zip(unique_files, unique_output_files))
+        output_files: list = []
+        for file in files:
+            if file in duplicates:
+                output_file: str = Deduplicator.link_duplicate(outputs[duplicates[file]], file,
+                                                               self.output_directory)
+                overall_output_weight += os.path.getsize(output_file)
+            else:
+                output_file: str = outputs[file]
+            output_files.append(output_file)
+        return output_files, overall_output_weight
+
+    def __find_duplicates(self, files: list) -> typing.Dict[str, str]:
+        if self.deduplicator is None:
+            return dict()
+        duplicates: typing.Dict[str, str] = self.deduplicator.find_duplicates(files, self.__map)
+        report: dict = self.deduplicator.report
+        text: str = f'\nDeduplication: {report["unique"]} unique of {report["files"]} images, ' \
+                    f'{report["duplicates"]} duplicates ' \
+                    f'({round(report["saved_bytes"] / 1024 ** 2, 2)}MB) will not be processed again.'
+        print(text)
+        if self.logger is not None:
+            self.logger.write(text)
+        return duplicates
+
+    def __map(self, function: typing.Callable, items: list, args: tuple = ()) -> list:
+        results: typing.List[TaskResult] = [self.__pool.apply_async(function, (item, *args)) for item in items]
+        return [result.get() for result in results]
+
+    def __process_unique(self, stage: str, function: typing.Callable, files: list, args: tuple,
+                         resume: bool = False) -> typing.Tuple[list, int]:
+        journal: Journal or None
+        completed_outputs: typing.Dict[str, str]
+        journal, completed_outputs = self.__start_stage(stage, function, files, args, resume)
+        self.progress: ProgressBar = ProgressBar(len(files))
+        self.progress.show()
+        output_files: list = []
+        results: list = []
+        overall_output_weight: int = 0
+        for file in files:
+            if file in completed_outputs:
+                results.append(completed_outputs[file])
+                self.__on_task_done(os.path.getsize(file))
+                continue
+            task_function: typing.Callable
+            task_args: tuple
+            task_function, task_args = self.__get_task(file, function, args, journal)
+            result: TaskResult = self.__pool.apply_async(task_function, task_args, self.__estimate_memory(file))
+            results.append(self.__track_progress(result, os.path.getsize(file)))
+        for file, result in zip(files, results):
+            if isinstance(result, str):
+                output_file: str = result
+            else:
+                try:
+                    output_file: str = result.get()
+                except Exception as err:
+                    if journal is not None:
+                        journal.failed(file, err)
+                    raise
+            overall_output_weight += os.path.getsize(output_file)
+            output_files.append(output_file)
+        self.progress.finish()
+        self.__finish_stage()
+        return output_files, overall_output_weight
+
+    async def __aprocess_unique(self, stage: str, function: typing.Callable, files: list, args: tuple,
+                                resume: bool = False) -> typing.Tuple[list, int]:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        journal: Journal or None
+        completed_outputs: typing.Dict[str, str]
+        journal, completed_outputs = await loop.run_in_executor(None, self.__start_stage, stage, function, files,
+                                                                args, resume)
+        progress: ProgressBar = ProgressBar(len(files))
+        self.progress: ProgressBar = progress
+        progress.show()
+        slots: asyncio.Semaphore = asyncio.Semaphore(self.__pool.max_pending_tasks)
+        tasks: typing.List[asyncio.Future] = [
+            asyncio.ensure_future(self.__aprocess_file(file, function, args, journal, completed_outputs.get(file),
+                                                       slots, progress))
+            for file in files]
+        try:
+            output_files: list = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        progress.finish()
+        await loop.run_in_executor(None, self.__finish_stage)
+        return output_files, await loop.run_in_executor(None, self.get_overall_size, output_files)
+
+    async def __aprocess_file(self, file: str, function: typing.Callable, args: tuple, journal: Journal or None,
+                              completed_output: str or None, slots: asyncio.Semaphore, progress: ProgressBar) -> str:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        input_size: int = await loop.run_in_executor(None, os.path.getsize, file)
+        if completed_output is None:
+            task_function: typing.Callable
+            task_args: tuple
+            task_function, task_args = self.__get_task(file, function, args, journal)
+            async with slots:
+                cost: int = await loop.run_in_executor(None, self.__estimate_memory, file)
+                try:
+                    completed_output = await self.__pool.apply(task_function, task_args, cost)
+                except Exception as err:
+                    if journal is not None:
+                        await loop.run_in_executor(None, journal.failed, file, err)
+                    raise
+        progress.inc(size=input_size)
+        progress.show()
+        return completed_output
+
+    def __start_stage(self, stage: str, function: typing.Callable, files: list, args: tuple,
+                      resume: bool = False) -> typing.Tuple[Journal or None, typing.Dict[str, str]]:
+        journal: Journal or None = None
+        completed_outputs: typing.Dict[str, str] = dict()
+        if self.use_journal or resume:
+            journal = Journal(f'{self.output_directory}/.journal/{stage}.jsonl', resume,
+                              Journal.get_key(stage, function, args))
+            if resume:
+                AtomicFile.cleanup(self.output_directory)
+                for file in files:
+                    completed_output: str or None = journal.get_completed_output(file)
+                    if completed_output is not None:
+                        completed_outputs[file] = completed_output
+            journal.queue([file for file in files if file not in completed_outputs])
+        if self.profiler is not None:
+            self.profiler.start(stage)
+        return journal, completed_outputs
+
+    def __get_task(self, file: str, function: typing.Callable, args: tuple,
+                   journal: Journal or None) -> typing.Tuple[typing.Callable, tuple]:
+        if self.profiler is not None:
+            function, args = self.profiler.wrap(function, args)
+        if journal is not None:
+            return Journal.run_task, (journal.path, journal.key, file, function, args)
+        return function, (file, *args)
+
+    def __finish_stage(self):
+        if self.profiler is not None:
+            text: str = f'\nProfile: {self.profiler.merge()}'
+            print(text)
+            if self.logger is not None:
+                self.logger.write(text)
+
+    @staticmethod
+    def __run_coroutine(coroutine: typing.Coroutine) -> typing.Any:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        coroutine.close()
+        raise RuntimeError('Blocking methods of "Processor" cannot be called from a running event loop, '
+                           'await their "a" counterparts instead (e.g. "acompress_all_tiny_png").')
+
+    def __track_progress(self, result: TaskResult, input_size: int) -> TaskResult:
+        result.add_done_callback(lambda task_result: self.__on_task_done(input_size, task_result.successful()))
+        return result
+
+    def __on_task_done(self, input_size: int, successful: bool = True):
+        if successful:
+            self.progress.inc(size=input_size)
+            self.progress.show()
+
+    def __get_stage(self, stage: str, data: bool = False) -> typing.Callable:
+        if data:
+            stages: typing.Dict[str, typing.Callable] = {'resize': self.resizer.resize_data,
+                                                         'crop': self.cropper.crop_data,
+                                                         'paste': self.paster.make_image_data,
+                                                         'compress': self.local_compressor.compress_data}
+        else:
+            stages: typing.Dict[str, typing.Callable] = {'resize': self.resizer.resize,
+                                                         'crop': self.cropper.crop_image,
+                                                         'paste': self.paster.make_image,
+                                                         'compress': self.local_compressor.compress}
+        if stage not in stages:
+            raise TypeError(f'Unsupported stage "{stage}". Supported: {", ".join(stages)}.')
+        return stages[stage]
+
+    def __check_stage_options(self, stage: str):
+        if stage == 'resize':
+            self.resizer.get_target_size((1, 1))
+        elif stage == 'crop' and not self.cropper.ratio:
+            raise RuntimeError('Ratio not set!')
+        elif stage == 'paste' and not self.paster.ratio:
+            raise RuntimeError('Ratio not set!')
+
+    def __estimate_memory(self, file: str) -> int:
+        if self.__pool.memory_budget is None:
+            return 0
+        return WorkerPool.estimate_memory(file)
+
+    def __get_files(self, files: list or None) -> list:
+        if files is None:
+            files: list = list(filter(lambda f: self.is_image(f) and not AtomicFile.is_temp(f),
+                                      os.listdir(self.directory)))
+            files = list(map(lambda f: f'{self.directory}/{f}', files))
+        return files
 
     def __check_compressed_files(self, files: list) -> list:
         files_set: set = set(files)
@@ -0,0 +1,166 @@
+import collections
+import cProfile
+import json
+import os
+import pstats
+import random
+import signal
+import tempfile
+import time
+import typing
+from io import BytesIO
+from PIL import Image
+from .atomic_file import AtomicFile
+
+
+class Profiler:
+    def __init__(self, directory: str, fraction: float = 0.1, mode: str = 'sampling', interval: float = 0.005,
+                 seed: int = None):
+        if not 0 < fraction <= 1:
+            raise TypeError('Profiled fraction of tasks must be in range (0, 1].')
+        if mode not in ('sampling', 'deterministic'):
+            raise TypeError(f'Unsupported profiling mode "{mode}".\n'
+                            f'Supported:\n'
+                            f'sampling\n'
+                            f'deterministic')
+        if mode == 'sampling' and not hasattr(signal, 'setitimer'):
+            mode = 'deterministic'
+        self.directory: str = directory
+        self.fraction: float = fraction
+        self.mode: str = mode
+        self.interval: float = interval
+        self.run_directory: str or None = None
+        self.__random: random.Random = random.Random(seed)
+
+    def start(self, stage: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        self.run_directory = tempfile.mkdtemp(prefix=f'{stage}-{time.strftime("%Y%m%d-%H%M%S")}-',
+                                              dir=self.directory)
+        os.mkdir(f'{self.run_directory}/tasks')
+        return self.run_directory
+
+    def wrap(self, function: typing.Callable, args: tuple) -> typing.Tuple[typing.Callable, tuple]:
+        if self.run_directory is None or self.__random.random() >= self.fraction:
+            return function, args
+        return Profiler.run_task, (f'{self.run_directory}/tasks', self.mode, self.interval, function, args)
+
+    def merge(self) -> str:
+        tasks_directory: str = f'{self.run_directory}/tasks'
+        stacks: typing.Counter[str] = collections.Counter()
+        tasks: typing.List[dict] = []
+        profiles: typing.List[str] = []
+        for file_name in sorted(os.listdir(tasks_directory)):
+            path: str = f'{tasks_directory}/{file_name}'
+            if file_name.endswith('.prof'):
+                profiles.append(path)
+            if not file_name.endswith('.json') or AtomicFile.is_temp(file_name):
+                continue
+            with open(path, 'r', encoding='utf-8') as file:
+                task: dict = json.load(file)
+            tag: str = f'{task["format"]};{self.get_size_tag(task["width"], task["height"])}'
+            for stack, weight in task.pop('stacks').items():
+                stacks[f'{tag};{stack}'] += weight
+            tasks.append(task)
+        collapsed_path: str = f'{self.run_directory}/profile.collapsed'
+        AtomicFile.write(collapsed_path, ''.join(f'{stack} {weight}\n' for stack, weight in sorted(stacks.items()))
+                         .encode('utf-8'))
+        tasks.sort(key=lambda task: task['elapsed'], reverse=True)
+        AtomicFile.write(f'{self.run_directory}/tasks.json', json.dumps(tasks, indent=2).encode('utf-8'))
+        if len(profiles) != 0:
+            pstats.Stats(*profiles).dump_stats(f'{self.run_directory}/profile.prof')
+        self.run_directory = None
+        return collapsed_path
+
+    @staticmethod
+    def run_task(source: str or bytes, directory: str, mode: str, interval: float, function: typing.Callable,
+                 args: tuple):
+        stacks: typing.Counter[str] = collections.Counter()
+        profile: cProfile.Profile or None = None
+        previous_handler = None
+        timer: float = time.perf_counter()
+        try:
+            if mode == 'sampling':
+                previous_handler = signal.signal(signal.SIGPROF,
+                                                 lambda signum, frame: Profiler.__sample(stacks, frame))
+                signal.setitimer(signal.ITIMER_PROF, interval, interval)
+                return function(source, *args)
+            profile = cProfile.Profile()
+            return profile.runcall(function, source, *args)
+        finally:
+            elapsed: float = time.perf_counter() - timer
+            if mode == 'sampling':
+                signal.setitimer(signal.ITIMER_PROF, 0)
+                signal.signal(signal.SIGPROF, previous_handler)
+            Profiler.__write_task(directory, source, elapsed, stacks, profile)
+
+    @staticmethod
+    def __sample(stacks: typing.Counter[str], frame):
+        frames: typing.List[str] = []
+        while frame is not None and frame.f_code is not Profiler.run_task.__code__:
+            frames.append(f'{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:'
+                          f'{frame.f_code.co_firstlineno})')
+            frame = frame.f_back
+        if len(frames) != 0:
+            stacks[';'.join(reversed(frames))] += 1
+
+    @staticmethod
+    def __write_task(directory: str, source: str or bytes, elapsed: float, stacks: typing.Counter[str],
+                     profile: cProfile.Profile or None):
+        name: str = f'{os.getpid()}-{time.monotonic_ns()}'
+        if profile is not None:
+            profile.dump_stats(f'{directory}/{name}.prof')
+            stacks = Profiler.get_collapsed_stacks(profile)
+        image_format: str = 'unknown'
+        width: int = 0
+        height: int = 0
+        try:
+            with Image.open(BytesIO(source) if isinstance(source, bytes) else source) as image:
+                image_format = str(image.format).lower()
+                width, height = image.size
+        except (OSError, ValueError):
+            pass
+        task: dict = {'file': source if isinstance(source, str) else None,
+                      'input_size': len(source) if isinstance(source, bytes) else os.path.getsize(source),
+                      'format': image_format,
+                      'width': width,
+                      'height': height,
+                      'elapsed': elapsed,
+                      'stacks': dict(stacks)}
+        AtomicFile.write(f'{directory}/{name}.json', json.dumps(task).encode('utf-8'))
+
+    @staticmethod
+    def get_collapsed_stacks(profile: cProfile.Profile) -> typing.Counter[str]:
+        stats: dict = pstats.Stats(profile).stats
+        stacks: typing.Counter[str] = collections.Counter()
+        for function, (_, _, total_time, _, _) in stats.items():
+            weight: int = round(total_time * 1000 ** 2)
+            if weight == 0:
+                continue
+            stack: list = [function]
+            while len(stack) < 64:
+                callers: list = [caller for caller in stats[stack[-1]][4] if caller in stats and caller not in stack]
+                if len(callers) == 0:
+                    break
+                stack.append(max(callers, key=lambda caller: stats[caller][3]))
+            stacks[';'.join(Profiler.__format_function(item) for item in reversed(stack))] += weight
+        return stacks
+
+    @staticmethod
+    def __format_function(function: typing.Tuple[str, int, str]) -> str:
+        file_name: str
+        line: int
+        name: str
+        file_name, line, name = function
+        if file_name == '~':
+            return name
+        return f'{name} ({os.path.basename(file_name)}:{line})'
+
+    @staticmethod
+    def get_size_tag(width: int, height: int) -> str:
+        if width * height == 0:
+            return 'unknown size'
+        megapixels: float = width * height / 1000 ** 2
+        for limit in (0.5, 2, 8, 24):
+            if megapixels <= limit:
+                return f'<={limit}MP'
+        return '>24MP'
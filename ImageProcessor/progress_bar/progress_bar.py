@@ -1,25 +1,82 @@
 import sys
 import math
+import time
+import threading
+import typing
 
 
 class ProgressBar:
-    def __init__(self, max_count: int):
+    def __init__(self, max_count: int, refresh_interval: float = 0.2, log_interval: float = 10.0,
+                 stream: typing.TextIO = None):
         self.counter: int = 0
         self.max_count: int = max_count
+        self.processed_bytes: int = 0
+        self.stream: typing.TextIO = stream if stream is not None else sys.stdout
+        self.is_tty: bool = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self.refresh_interval: float = refresh_interval if self.is_tty else log_interval
+        self.start_time: float = time.perf_counter()
+        self.__last_show_time: float or None = None
+        self.__last_state: typing.Tuple[int, int, int] or None = None
+        self.__lock: threading.Lock = threading.Lock()
 
-    def inc(self, step: int = 1):
-        self.counter += step
+    def inc(self, step: int = 1, size: int = 0):
+        with self.__lock:
+            self.counter += step
+            self.processed_bytes += size
 
     def update_max_count(self, step: int = 1):
-        self.max_count += step
+        with self.__lock:
+            self.max_count += step
 
     def reset(self):
-        self.counter = 0
-
-    def show(self):
-        progress: float = self.counter / self.max_count
-        points_count: int = math.floor(progress * 25)
-        sys.stdout.write(
-            f"\rProgress: [{'#' * points_count}{'_' * (25 - points_count)}] "
-            f"{str(round(progress * 10000) / 100)}%")
-        sys.stdout.flush()
+        with self.__lock:
+            self.counter = 0
+            self.processed_bytes = 0
+            self.start_time = time.perf_counter()
+            self.__last_state = None
+
+    def show(self, force: bool = False):
+        now: float = time.perf_counter()
+        with self.__lock:
+            if not force and self.__last_show_time is not None and self.counter < self.max_count and \
+                    now - self.__last_show_time < self.refresh_interval:
+                return
+            state: typing.Tuple[int, int, int] = (self.counter, self.max_count, self.processed_bytes)
+            if state == self.__last_state and self.counter >= self.max_count:
+                return
+            self.__last_show_time = now
+            self.__last_state = state
+            progress: float = self.counter / self.max_count if self.max_count else 1.0
+            elapsed: float = max(now - self.start_time, 1e-9)
+            images_per_second: float = self.counter / elapsed
+            megabytes_per_second: float = self.processed_bytes / (1024 ** 2) / elapsed
+            if images_per_second > 0:
+                eta: str = self.format_time((self.max_count - self.counter) / images_per_second)
+            else:
+                eta: str = '--:--'
+            statistics: str = f"{round(images_per_second, 1)} img/s | {round(megabytes_per_second, 2)} MB/s | ETA {eta}"
+            if self.is_tty:
+                points_count: int = math.floor(progress * 25)
+                self.stream.write(
+                    f"\rProgress: [{'#' * points_count}{'_' * (25 - points_count)}] "
+                    f"{str(round(progress * 10000) / 100)}% | {statistics}")
+            else:
+                self.stream.write(f"Progress: {self.counter}/{self.max_count} "
+                                  f"{str(round(progress * 10000) / 100)}% | {statistics}\n")
+            self.stream.flush()
+
+    def finish(self):
+        self.show(True)
+        if self.is_tty:
+            self.stream.write('\n')
+            self.stream.flush()
+
+    @staticmethod
+    def format_time(seconds: float) -> str:
+        minutes: int
+        minutes, seconds = divmod(int(seconds), 60)
+        hours: int
+        hours, minutes = divmod(minutes, 60)
+        if hours:
+            return f'{hours}:{minutes:02d}:{seconds:02d}'
+        return f'{minutes:02d}:{seconds:02d}'
@@ -0,0 +1,100 @@
+import collections
+import os
+import threading
+import typing
+from .atomic_file import AtomicFile
+
+
+class MemoryCache:
+    def __init__(self, max_size: int = 64 * 1024 ** 2):
+        self.max_size: int = max_size
+        self.size: int = 0
+        self.__entries: collections.OrderedDict = collections.OrderedDict()
+
+    def get(self, key: str) -> typing.Tuple[bytes, str] or None:
+        entry: typing.Tuple[bytes, str] or None = self.__entries.get(key)
+        if entry is not None:
+            self.__entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, data: bytes, content_type: str):
+        if len(data) > self.max_size:
+            return
+        if key in self.__entries:
+            self.size -= len(self.__entries.pop(key)[0])
+        self.__entries[key] = (data, content_type)
+        self.size += len(data)
+        while self.size > self.max_size:
+            self.size -= len(self.__entries.popitem(last=False)[1][0])
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+class DiskCache:
+    def __init__(self, directory: str, max_size: int = 1024 ** 3):
+        self.directory: str = directory
+        self.max_size: int = max_size
+        self.size: int = 0
+        self.__entries: collections.OrderedDict = collections.OrderedDict()
+        self.__lock: threading.Lock = threading.Lock()
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        AtomicFile.cleanup(directory)
+        files: list = [entry for entry in os.scandir(directory) if entry.is_file()]
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in files:
+            key: str
+            extension: str
+            key, extension = os.path.splitext(entry.name)
+            self.__entries[key] = (entry.name, entry.stat().st_size)
+            self.size += entry.stat().st_size
+
+    def get(self, key: str) -> typing.Tuple[bytes, str] or None:
+        with self.__lock:
+            entry: typing.Tuple[str, int] or None = self.__entries.get(key)
+            if entry is None:
+                return None
+            self.__entries.move_to_end(key)
+        path: str = os.path.join(self.directory, entry[0])
+        try:
+            with open(path, 'rb') as file:
+                data: bytes = file.read()
+        except FileNotFoundError:
+            with self.__lock:
+                self.__forget(key)
+            return None
+        os.utime(path)
+        return data, self.get_content_type(entry[0])
+
+    def put(self, key: str, data: bytes, extension: str):
+        if len(data) > self.max_size:
+            return
+        file_name: str = f'{key}{extension}'
+        with AtomicFile(os.path.join(self.directory, file_name)) as temp_path:
+            with open(temp_path, 'wb') as file:
+                file.write(data)
+        with self.__lock:
+            self.__forget(key)
+            self.__entries[key] = (file_name, len(data))
+            self.size += len(data)
+            while self.size > self.max_size:
+                evicted_key: str = next(iter(self.__entries))
+                evicted_file_name: str = self.__entries[evicted_key][0]
+                self.__forget(evicted_key)
+                try:
+                    os.remove(os.path.join(self.directory, evicted_file_name))
+                except FileNotFoundError:
+                    pass
+
+    def __forget(self, key: str):
+        entry: typing.Tuple[str, int] or None = self.__entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @staticmethod
+    def get_content_type(file_name: str) -> str:
+        return f'image/{os.path.splitext(file_name)[1][1:].replace("jpg", "jpeg")}'
@@ -1,6 +1,8 @@
 from PIL import Image
 import os
+import typing
 from .logger import Logger
+from .image_io import ImageIO
 
 
 class Resizer:
@@ -27,6 +29,43 @@ class Resizer:
                stretch: bool = None, save_proportions: bool = None, auto_orientation: bool = None) -> str:
         if not os.path.exists(path):
             raise RuntimeError('File not found!')
+        if self.output_directory is not None:
+            output_path: str = f'{self.output_directory}/{os.path.basename(path)}'
+        else:
+            output_path: str = path
+        with ImageIO.read(path) as data:
+            output_data: bytes
+            output_data, _ = self.resize_data(data, path, width, height, stretch, save_proportions,
+                                              auto_orientation)
+        ImageIO.write(output_path, output_data)
+        return output_path
+
+    def resize_data(self, data: bytes, name: str, width: int = None, height: int = None, stretch: bool = None,
+                    save_proportions: bool = None, auto_orientation: bool = None) -> typing.Tuple[bytes, str]:
+        with ImageIO.open_image(data) as original_image:
+            w, h = original_image.size
+            image_format: str = Image.registered_extensions().get(os.path.splitext(name)[1].lower(),
+                                                                  original_image.format)
+            image: Image = self.resize_image(original_image, width, height, stretch, save_proportions,
+                                             auto_orientation)
+            width, height = image.size
+            output_data: bytes = ImageIO.encode_image(image, image_format)
+        if self.logger is not None:
+            self.logger.resizing_message(name, (h, w), (height, width), len(data), len(output_data))
+        return output_data, name
+
+    def resize_image(self, image: Image, width: int = None, height: int = None,
+                     stretch: bool = None, save_proportions: bool = None, auto_orientation: bool = None) -> Image:
+        if stretch is None:
+            stretch: bool = self.stretch
+        w, h = image.size
+        width, height = self.get_target_size((w, h), width, height, stretch, save_proportions, auto_orientation)
+        if (w * h > width * height) or stretch:
+            return image.resize((width, height))
+        return image
+
+    def get_target_size(self, size: tuple, width: int = None, height: int = None,
+                        stretch: bool = None, save_proportions: bool = None, auto_orientation: bool = None) -> tuple:
         if auto_orientation is None:
             auto_orientation: bool = self.auto_orientation
         if stretch is None:
@@ -40,13 +79,7 @@ class Resizer:
             height: int = self.height
         if width is None and height is None:
             raise RuntimeError('Width or height required!')
-        if self.output_directory is not None:
-            output_path: str = f'{self.output_directory}/{os.path.basename(path)}'
-        else:
-            output_path: str = path
-        input_size: int = os.path.getsize(path)
-        original_image: Image = Image.open(path)
-        w, h = original_image.size
+        w, h = size
         ratio: float = w / h
         if save_proportions:
             if width is None:
@@ -72,9 +105,4 @@ class Resizer:
                 width: int = w
             elif height is None:
                 height: int = h
-        if (w * h > width * height) or stretch:
-            original_image = original_image.resize((width, height))
-        original_image.save(output_path)
-        if self.logger is not None:
-            self.logger.resizing_message(path, (h, w), (height, width), input_size, os.path.getsize(output_path))
-        return output_path
+        return width, height
@@ -0,0 +1,167 @@
+import argparse
+import asyncio
+import hashlib
+import os
+import typing
+from aiohttp import web
+from .image_io import ImageIO
+from .resizer import Resizer
+from .compressor import Compressor as LocalCompressor
+from .encoders import Encoder
+from .worker_pool import WorkerPool
+from .rendition_cache import MemoryCache, DiskCache
+
+
+class RenditionServer:
+    def __init__(self,
+                 directory: str,
+                 pool: WorkerPool = None,
+                 compressor: LocalCompressor = None,
+                 memory_cache_size: int = 64 * 1024 ** 2,
+                 disk_cache_directory: str or None = '.rendition_cache',
+                 disk_cache_size: int = 1024 ** 3,
+                 max_size: int = 4096,
+                 max_age: int = 86400):
+        self.directory: str = os.path.realpath(directory)
+        self.pool: WorkerPool = pool if pool is not None else WorkerPool()
+        self.resizer: Resizer = Resizer()
+        self.compressor: LocalCompressor = compressor if compressor is not None else LocalCompressor()
+        self.memory_cache: MemoryCache = MemoryCache(memory_cache_size)
+        if disk_cache_directory is not None:
+            self.disk_cache: DiskCache or None = DiskCache(disk_cache_directory, disk_cache_size)
+        else:
+            self.disk_cache: DiskCache or None = None
+        self.max_size: int = max_size
+        self.max_age: int = max_age
+        self.statistics: typing.Dict[str, int] = {'requests': 0, 'not_modified': 0, 'memory_hits': 0,
+                                                  'disk_hits': 0, 'coalesced': 0, 'renders': 0}
+        self.__renderings: typing.Dict[str, asyncio.Task] = dict()
+
+    def create_application(self) -> web.Application:
+        application: web.Application = web.Application()
+        application.router.add_get('/{path:.+}', self.handle)
+        return application
+
+    def run(self, host: str = '127.0.0.1', port: int = 8080):
+        web.run_app(self.create_application(), host=host, port=port)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.statistics['requests'] += 1
+        try:
+            width: int or None = self.__get_parameter(request, 'w', self.max_size)
+            height: int or None = self.__get_parameter(request, 'h', self.max_size)
+            quality: int or None = self.__get_parameter(request, 'q', 100)
+        except ValueError as err:
+            raise web.HTTPBadRequest(text=str(err))
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        source: typing.Tuple[str, os.stat_result] or None = await loop.run_in_executor(
+            None, self.__resolve_path, request.match_info['path'])
+        if source is None:
+            raise web.HTTPNotFound()
+        path: str
+        stat: os.stat_result
+        path, stat = source
+        key: str = hashlib.sha1(f'{path}|{stat.st_mtime_ns}|{stat.st_size}|{width}|{height}|{quality}'
+                                .encode('utf-8')).hexdigest()
+        headers: typing.Dict[str, str] = {'ETag': f'"{key}"', 'Cache-Control': f'public, max-age={self.max_age}'}
+        if self.__is_not_modified(request, headers['ETag']):
+            self.statistics['not_modified'] += 1
+            return web.Response(status=304, headers=headers)
+        data: bytes
+        content_type: str
+        data, content_type = await self.get_rendition(key, path, width, height, quality)
+        return web.Response(body=data, content_type=content_type, headers=headers)
+
+    async def get_rendition(self, key: str, path: str, width: int = None, height: int = None,
+                            quality: int = None) -> typing.Tuple[bytes, str]:
+        entry: typing.Tuple[bytes, str] or None = self.memory_cache.get(key)
+        if entry is not None:
+            self.statistics['memory_hits'] += 1
+            return entry
+        task: asyncio.Task or None = self.__renderings.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.__render(key, path, width, height, quality))
+            self.__renderings[key] = task
+            task.add_done_callback(lambda _: self.__renderings.pop(key, None))
+        else:
+            self.statistics['coalesced'] += 1
+        return await asyncio.shield(task)
+
+    async def __render(self, key: str, path: str, width: int or None, height: int or None,
+                       quality: int or None) -> typing.Tuple[bytes, str]:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        if self.disk_cache is not None:
+            entry: typing.Tuple[bytes, str] or None = await loop.run_in_executor(None, self.disk_cache.get, key)
+            if entry is not None:
+                self.statistics['disk_hits'] += 1
+                self.memory_cache.put(key, *entry)
+                return entry
+        self.statistics['renders'] += 1
+        cost: int = 0
+        if self.pool.memory_budget is not None:
+            cost = await loop.run_in_executor(None, WorkerPool.estimate_memory, path)
+        data: bytes
+        extension: str
+        data, extension = await self.pool.apply(RenditionServer.render,
+                                                (path, width, height, quality, self.resizer, self.compressor), cost)
+        content_type: str = DiskCache.get_content_type(extension)
+        self.memory_cache.put(key, data, content_type)
+        if self.disk_cache is not None:
+            await loop.run_in_executor(None, self.disk_cache.put, key, data, extension)
+        return data, content_type
+
+    def __resolve_path(self, relative_path: str) -> typing.Tuple[str, os.stat_result] or None:
+        path: str = os.path.realpath(os.path.join(self.directory, relative_path))
+        if os.path.commonpath((self.directory, path)) != self.directory or not os.path.isfile(path):
+            return None
+        try:
+            return path, os.stat(path)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def render(path: str, width: int or None, height: int or None, quality: int or None,
+               resizer: Resizer, compressor: LocalCompressor) -> typing.Tuple[bytes, str]:
+        with ImageIO.read(path) as source_data, ImageIO.open_image(source_data) as image:
+            image_format: str = image.format
+            if width is not None or height is not None:
+                image = resizer.resize_image(image, width, height)
+            encoder: Encoder
+            data: bytes
+            encoder, data = compressor.encode(image, quality, image_format)
+        return data, encoder.extension
+
+    @staticmethod
+    def __get_parameter(request: web.Request, name: str, max_value: int) -> int or None:
+        value: str or None = request.query.get(name)
+        if value is None or value == '':
+            return None
+        if not value.isdigit() or not 1 <= int(value) <= max_value:
+            raise ValueError(f'Parameter "{name}" must be an integer in range 1..{max_value}.')
+        return int(value)
+
+    @staticmethod
+    def __is_not_modified(request: web.Request, etag: str) -> bool:
+        if_none_match: str or None = request.headers.get('If-None-Match')
+        if if_none_match is None:
+            return False
+        tags: typing.List[str] = [tag.strip() for tag in if_none_match.split(',')]
+        tags = [tag[2:] if tag.startswith('W/') else tag for tag in tags]
+        return '*' in tags or etag in tags
+
+
+if __name__ == '__main__':
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='On-demand image rendition server.')
+    parser.add_argument('directory', help='Directory of source images.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--cache-directory', default='.rendition_cache')
+    parser.add_argument('--memory-cache-size', type=int, default=64 * 1024 ** 2)
+    parser.add_argument('--disk-cache-size', type=int, default=1024 ** 3)
+    arguments: argparse.Namespace = parser.parse_args()
+    RenditionServer(arguments.directory,
+                    pool=WorkerPool(arguments.processes),
+                    memory_cache_size=arguments.memory_cache_size,
+                    disk_cache_directory=arguments.cache_directory,
+                    disk_cache_size=arguments.disk_cache_size).run(arguments.host, arguments.port)
@@ -0,0 +1,389 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import typing
+import uuid
+from . import processor
+from .progress_bar import ProgressBar
+
+
+class JobSpool:
+    QUEUED: str = 'queued'
+    LEASED: str = 'leased'
+    DONE: str = 'done'
+    FAILED: str = 'failed'
+
+    def __init__(self, path: str, lease_time: float = 60.0, max_attempts: int = 3):
+        self.path: str = path
+        self.lease_time: float = lease_time
+        self.max_attempts: int = max_attempts
+        self.__connection: sqlite3.Connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.__connection.executescript('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                stage TEXT NOT NULL,
+                options TEXT NOT NULL,
+                args TEXT NOT NULL,
+                lease_time REAL NOT NULL,
+                created REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id INTEGER NOT NULL REFERENCES jobs (id),
+                path TEXT NOT NULL,
+                state TEXT NOT NULL,
+                owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                output TEXT,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, lease_expires);
+            CREATE INDEX IF NOT EXISTS tasks_job ON tasks (job_id, state);
+        ''')
+
+    def enqueue(self, stage: str, options: dict, files: list, args: tuple = ()) -> int:
+        with self.__transaction():
+            cursor: sqlite3.Cursor = self.__connection.execute(
+                'INSERT INTO jobs (stage, options, args, lease_time, created) VALUES (?, ?, ?, ?, ?)',
+                (stage, json.dumps(options), json.dumps(list(args)), self.lease_time, time.time()))
+            job_id: int = cursor.lastrowid
+            self.__connection.executemany('INSERT INTO tasks (job_id, path, state) VALUES (?, ?, ?)',
+                                          [(job_id, file, JobSpool.QUEUED) for file in files])
+        return job_id
+
+    def claim(self, owner: str) -> typing.Tuple[int, str, int, str, dict, tuple, float] or None:
+        now: float = time.time()
+        with self.__transaction():
+            while True:
+                row: tuple or None = self.__connection.execute(
+                    'SELECT tasks.id, tasks.path, tasks.attempts, tasks.job_id, jobs.stage, jobs.options, jobs.args, '
+                    'jobs.lease_time '
+                    'FROM tasks JOIN jobs ON jobs.id = tasks.job_id '
+                    'WHERE tasks.state = ? OR (tasks.state = ? AND tasks.lease_expires < ?) '
+                    'ORDER BY tasks.id LIMIT 1',
+                    (JobSpool.QUEUED, JobSpool.LEASED, now)).fetchone()
+                if row is None:
+                    return None
+                task_id: int = row[0]
+                if row[2] >= self.max_attempts:
+                    self.__connection.execute('UPDATE tasks SET state = ?, owner = NULL, error = ? WHERE id = ?',
+                                              (JobSpool.FAILED, 'Lease expired too many times.', task_id))
+                    continue
+                self.__connection.execute(
+                    'UPDATE tasks SET state = ?, owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?',
+                    (JobSpool.LEASED, owner, now + row[7], task_id))
+                return task_id, row[1], row[3], row[4], json.loads(row[5]), tuple(json.loads(row[6])), row[7]
+
+    def heartbeat(self, task_id: int, owner: str) -> bool:
+        cursor: sqlite3.Cursor = self.__connection.execute(
+            'UPDATE tasks SET lease_expires = ? + (SELECT lease_time FROM jobs WHERE jobs.id = tasks.job_id) '
+            'WHERE id = ? AND owner = ? AND state = ?',
+            (time.time(), task_id, owner, JobSpool.LEASED))
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: int, owner: str, output: str) -> bool:
+        cursor: sqlite3.Cursor = self.__connection.execute(
+            'UPDATE tasks SET state = ?, output = ?, lease_expires = NULL WHERE id = ? AND owner = ? AND state = ?',
+            (JobSpool.DONE, output, task_id, owner, JobSpool.LEASED))
+        return cursor.rowcount == 1
+
+    def fail(self, task_id: int, owner: str, error: str) -> bool:
+        cursor: sqlite3.Cursor = self.__connection.execute(
+            'UPDATE tasks SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, '
+            'owner = NULL, lease_expires = NULL, error = ? WHERE id = ? AND owner = ? AND state = ?',
+            (self.max_attempts, JobSpool.FAILED, JobSpool.QUEUED, error, task_id, owner, JobSpool.LEASED))
+        return cursor.rowcount == 1
+
+    def get_status(self, job_id: int) -> typing.Dict[str, int]:
+        status: typing.Dict[str, int] = {JobSpool.QUEUED: 0, JobSpool.LEASED: 0, JobSpool.DONE: 0, JobSpool.FAILED: 0}
+        for state, count in self.__connection.execute('SELECT state, COUNT(*) FROM tasks WHERE job_id = ? '
+                                                      'GROUP BY state', (job_id,)):
+            status[state] = count
+        return status
+
+    def get_results(self, job_id: int) -> typing.List[tuple]:
+        return self.__connection.execute('SELECT path, state, output, error FROM tasks WHERE job_id = ? ORDER BY id',
+                                         (job_id,)).fetchall()
+
+    def wait(self, job_id: int, poll_interval: float = 1.0, progress: ProgressBar = None) -> typing.List[tuple]:
+        while True:
+            status: typing.Dict[str, int] = self.get_status(job_id)
+            if progress is not None:
+                progress.inc(status[JobSpool.DONE] + status[JobSpool.FAILED] - progress.counter)
+                progress.show()
+            if status[JobSpool.QUEUED] == 0 and status[JobSpool.LEASED] == 0:
+                return self.get_results(job_id)
+            time.sleep(poll_interval)
+
+    def close(self):
+        self.__connection.close()
+
+    @staticmethod
+    def open(path: str, lease_time: float = 60.0, max_attempts: int = 3) -> 'JobSpool' or 'LeaseSpool':
+        if path.endswith(('/', os.sep)) or os.path.isdir(path):
+            return LeaseSpool(path, lease_time, max_attempts)
+        return JobSpool(path, lease_time, max_attempts)
+
+    @contextlib.contextmanager
+    def __transaction(self):
+        self.__connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.__connection.execute('ROLLBACK')
+            raise
+        else:
+            self.__connection.execute('COMMIT')
+
+
+class LeaseSpool:
+    QUEUED: str = JobSpool.QUEUED
+    LEASED: str = JobSpool.LEASED
+    DONE: str = JobSpool.DONE
+    FAILED: str = JobSpool.FAILED
+    RESULTS: str = 'results'
+
+    def __init__(self, path: str, lease_time: float = 60.0, max_attempts: int = 3):
+        self.path: str = os.path.abspath(path)
+        self.lease_time: float = lease_time
+        self.max_attempts: int = max_attempts
+        self.__jobs: typing.Dict[str, dict] = dict()
+        os.makedirs(self.path, exist_ok=True)
+
+    def enqueue(self, stage: str, options: dict, files: list, args: tuple = ()) -> str:
+        job_id: str = f'{time.time_ns():020d}-{uuid.uuid4().hex[:12]}'
+        temp_path: str = os.path.join(self.path, f'.{job_id}.tmp')
+        for state in (LeaseSpool.QUEUED, LeaseSpool.LEASED, LeaseSpool.DONE, LeaseSpool.FAILED, LeaseSpool.RESULTS):
+            os.makedirs(os.path.join(temp_path, state))
+        with open(os.path.join(temp_path, 'job.json'), 'w', encoding='utf-8') as job_file:
+            json.dump({'stage': stage, 'options': options, 'args': list(args), 'files': list(files),
+                       'lease_time': self.lease_time, 'created': time.time()}, job_file)
+        for index in range(len(files)):
+            open(os.path.join(temp_path, LeaseSpool.QUEUED, f'{index:08d}.0'), 'wb').close()
+        os.rename(temp_path, os.path.join(self.path, job_id))
+        return job_id
+
+    def claim(self, owner: str) -> typing.Tuple[str, str, str, str, dict, tuple, float] or None:
+        for job_id in sorted(name for name in os.listdir(self.path) if not name.startswith('.')):
+            job: dict = self.__get_job(job_id)
+            for name in self.__list(job_id, LeaseSpool.QUEUED):
+                task_id: str or None = self.__take(job_id, LeaseSpool.QUEUED, name)
+                if task_id is not None:
+                    return self.__get_task(job_id, job, task_id)
+            now: float = time.time()
+            for name in self.__list(job_id, LeaseSpool.LEASED):
+                lease_path: str = os.path.join(self.path, job_id, LeaseSpool.LEASED, name)
+                try:
+                    if os.stat(lease_path).st_mtime + job['lease_time'] >= now:
+                        continue
+                except FileNotFoundError:
+                    continue
+                if int(name.split('.')[1]) >= self.max_attempts:
+                    self.__write_result(job_id, name, {'error': 'Lease expired too many times.'})
+                    self.__move(job_id, LeaseSpool.LEASED, name, LeaseSpool.FAILED, name)
+                    continue
+                task_id = self.__take(job_id, LeaseSpool.LEASED, name)
+                if task_id is not None:
+                    return self.__get_task(job_id, job, task_id)
+        return None
+
+    def heartbeat(self, task_id: str, owner: str) -> bool:
+        job_id: str
+        name: str
+        job_id, name = task_id.split('/')
+        try:
+            os.utime(os.path.join(self.path, job_id, LeaseSpool.LEASED, name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def complete(self, task_id: str, owner: str, output: str) -> bool:
+        job_id: str
+        name: str
+        job_id, name = task_id.split('/')
+        self.__write_result(job_id, name, {'output': output})
+        return self.__move(job_id, LeaseSpool.LEASED, name, LeaseSpool.DONE, name)
+
+    def fail(self, task_id: str, owner: str, error: str) -> bool:
+        job_id: str
+        name: str
+        job_id, name = task_id.split('/')
+        self.__write_result(job_id, name, {'error': error})
+        state: str = LeaseSpool.FAILED if int(name.split('.')[1]) >= self.max_attempts else LeaseSpool.QUEUED
+        return self.__move(job_id, LeaseSpool.LEASED, name, state, name)
+
+    def get_status(self, job_id: str) -> typing.Dict[str, int]:
+        status: typing.Dict[str, int] = {state: len(self.__list(job_id, state))
+                                         for state in (LeaseSpool.QUEUED, LeaseSpool.DONE, LeaseSpool.FAILED)}
+        status[LeaseSpool.LEASED] = max(0, len(self.__get_job(job_id)['files']) - sum(status.values()))
+        return status
+
+    def get_results(self, job_id: str) -> typing.List[tuple]:
+        states: typing.Dict[int, str] = dict()
+        for state in (LeaseSpool.QUEUED, LeaseSpool.FAILED, LeaseSpool.DONE):
+            states.update({int(name.split('.')[0]): state for name in self.__list(job_id, state)})
+        results: typing.List[tuple] = []
+        for index, path in enumerate(self.__get_job(job_id)['files']):
+            state: str = states.get(index, LeaseSpool.LEASED)
+            result: dict = self.__read_result(job_id, index) if state in (LeaseSpool.DONE, LeaseSpool.FAILED) else {}
+            results.append((path, state, result.get('output'), result.get('error')))
+        return results
+
+    def wait(self, job_id: str, poll_interval: float = 1.0, progress: ProgressBar = None) -> typing.List[tuple]:
+        while True:
+            status: typing.Dict[str, int] = self.get_status(job_id)
+            if progress is not None:
+                progress.inc(status[LeaseSpool.DONE] + status[LeaseSpool.FAILED] - progress.counter)
+                progress.show()
+            if status[LeaseSpool.QUEUED] == 0 and status[LeaseSpool.LEASED] == 0:
+                return self.get_results(job_id)
+            time.sleep(poll_interval)
+
+    def close(self):
+        self.__jobs.clear()
+
+    def __get_job(self, job_id: str) -> dict:
+        if job_id not in self.__jobs:
+            with open(os.path.join(self.path, job_id, 'job.json'), 'r', encoding='utf-8') as job_file:
+                self.__jobs[job_id] = json.load(job_file)
+        return self.__jobs[job_id]
+
+    def __get_task(self, job_id: str, job: dict, task_id: str) -> typing.Tuple[str, str, str, str, dict, tuple, float]:
+        path: str = job['files'][int(task_id.split('/')[1].split('.')[0])]
+        return task_id, path, job_id, job['stage'], job['options'], tuple(job['args']), job['lease_time']
+
+    def __list(self, job_id: str, state: str) -> typing.List[str]:
+        return sorted(name for name in os.listdir(os.path.join(self.path, job_id, state)) if not name.startswith('.'))
+
+    def __take(self, job_id: str, state: str, name: str) -> str or None:
+        index: str
+        attempts: str
+        index, attempts = name.split('.')
+        lease_name: str = f'{index}.{int(attempts) + 1}'
+        try:
+            os.utime(os.path.join(self.path, job_id, state, name))
+        except FileNotFoundError:
+            return None
+        if not self.__move(job_id, state, name, LeaseSpool.LEASED, lease_name):
+            return None
+        return f'{job_id}/{lease_name}'
+
+    def __move(self, job_id: str, state: str, name: str, target_state: str, target_name: str) -> bool:
+        try:
+            os.rename(os.path.join(self.path, job_id, state, name),
+                      os.path.join(self.path, job_id, target_state, target_name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def __write_result(self, job_id: str, name: str, result: dict):
+        directory: str = os.path.join(self.path, job_id, LeaseSpool.RESULTS)
+        index: str = name.split('.')[0]
+        temp_path: str = os.path.join(directory, f'.{index}.{uuid.uuid4().hex}.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as result_file:
+            json.dump(result, result_file)
+            result_file.flush()
+            os.fsync(result_file.fileno())
+        os.replace(temp_path, os.path.join(directory, f'{index}.json'))
+
+    def __read_result(self, job_id: str, index: int) -> dict:
+        try:
+            with open(os.path.join(self.path, job_id, LeaseSpool.RESULTS, f'{index:08d}.json'), 'r',
+                      encoding='utf-8') as result_file:
+                return json.load(result_file)
+        except FileNotFoundError:
+            return {}
+
+
+class SpoolWorker:
+    def __init__(self,
+                 spool_path: str,
+                 owner: str = None,
+                 poll_interval: float = 1.0,
+                 idle_timeout: float = None):
+        self.spool_path: str = spool_path
+        self.owner: str = owner if owner is not None else f'{socket.gethostname()}:{os.getpid()}'
+        self.poll_interval: float = poll_interval
+        self.idle_timeout: float or None = idle_timeout
+        self.processed_count: int = 0
+        self.__processors: typing.Dict[int or str, 'processor.Processor'] = dict()
+
+    def run(self) -> int:
+        spool: JobSpool or LeaseSpool = JobSpool.open(self.spool_path)
+        idle_since: float = time.monotonic()
+        try:
+            while True:
+                task: tuple or None = spool.claim(self.owner)
+                if task is None:
+                    if self.idle_timeout is not None and time.monotonic() - idle_since >= self.idle_timeout:
+                        return self.processed_count
+                    time.sleep(self.poll_interval)
+                    continue
+                self.__execute(spool, *task)
+                idle_since = time.monotonic()
+        finally:
+            spool.close()
+
+    def __execute(self, spool: JobSpool or LeaseSpool, task_id: int or str, path: str, job_id: int or str,
+                  stage: str, options: dict, args: tuple, lease_time: float):
+        stop_event: threading.Event = threading.Event()
+        heartbeat: threading.Thread = threading.Thread(target=self.__heartbeat,
+                                                       args=(task_id, lease_time, stop_event), daemon=True)
+        heartbeat.start()
+        try:
+            if job_id not in self.__processors:
+                self.__processors[job_id] = processor.Processor(**options)
+            output: str = self.__processors[job_id].process_file(stage, path, args)
+        except Exception as err:
+            spool.fail(task_id, self.owner, repr(err))
+        else:
+            spool.complete(task_id, self.owner, output)
+            self.processed_count += 1
+        finally:
+            stop_event.set()
+            heartbeat.join()
+
+    def __heartbeat(self, task_id: int or str, lease_time: float, stop_event: threading.Event):
+        spool: JobSpool or LeaseSpool = JobSpool.open(self.spool_path)
+        try:
+            while not stop_event.wait(lease_time / 3):
+                if not spool.heartbeat(task_id, self.owner):
+                    return
+        finally:
+            spool.close()
+
+    @staticmethod
+    def run_processes(spool_path: str, processes: int = None, idle_timeout: float = None,
+                      poll_interval: float = 1.0) -> typing.List[multiprocessing.Process]:
+        workers: typing.List[multiprocessing.Process] = []
+        for _ in range(processes or os.cpu_count() or 1):
+            worker: SpoolWorker = SpoolWorker(spool_path, poll_interval=poll_interval, idle_timeout=idle_timeout)
+            process: multiprocessing.Process = multiprocessing.Process(target=SpoolWorker.run_in_process,
+                                                                       args=(worker,))
+            process.start()
+            workers.append(process)
+        return workers
+
+    @staticmethod
+    def run_in_process(worker: 'SpoolWorker'):
+        worker.owner = f'{socket.gethostname()}:{os.getpid()}'
+        worker.run()
+
+
+if __name__ == '__main__':
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='Process tasks from a shared job spool.')
+    parser.add_argument('spool', help='Path of the SQLite spool database or of a lease spool directory.')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--idle-timeout', type=float, default=None)
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    arguments: argparse.Namespace = parser.parse_args()
+    for worker_process in SpoolWorker.run_processes(arguments.spool, arguments.processes, arguments.idle_timeout,
+                                                    arguments.poll_interval):
+        worker_process.join()
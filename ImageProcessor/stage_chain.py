@@ -0,0 +1,24 @@
+import os
+import typing
+from .image_io import ImageIO
+
+
+class StageChain:
+    def __init__(self, output_directory: str, stages: typing.List[typing.Tuple[typing.Callable, dict]]):
+        if len(stages) == 0:
+            raise TypeError('At least one stage required.')
+        self.output_directory: str = output_directory
+        self.stages: typing.List[typing.Tuple[typing.Callable, dict]] = stages
+        if not os.path.exists(output_directory):
+            os.makedirs(output_directory, exist_ok=True)
+
+    def run(self, path: str) -> str:
+        if not os.path.exists(path):
+            raise RuntimeError('File not found!')
+        name: str = os.path.basename(path)
+        with ImageIO.read(path) as data:
+            for function, options in self.stages:
+                data, name = function(data, name, **options)
+        output_path: str = f'{self.output_directory}/{os.path.basename(name)}'
+        ImageIO.write(output_path, data)
+        return output_path
@@ -0,0 +1,4 @@
+from .storage import Storage
+from .local_storage import LocalStorage
+from .archive_storage import ArchiveStorage
+from .s3_storage import S3Storage
@@ -0,0 +1,98 @@
+import io
+import os
+import tarfile
+import time
+import typing
+import zipfile
+from .storage import Storage
+
+
+class ArchiveStorage(Storage):
+    def __init__(self, path: str = None, mode: str = 'r', fileobj: typing.BinaryIO = None, archive_format: str = None):
+        if mode not in ('r', 'w'):
+            raise TypeError('Archive mode must be "r" or "w".')
+        if path is None and fileobj is None:
+            raise TypeError('Archive path or file object required.')
+        if archive_format is None:
+            archive_format: str = 'zip' if path is not None and path.lower().endswith('.zip') else 'tar'
+        if archive_format not in ('zip', 'tar'):
+            raise TypeError(f'Unsupported archive format "{archive_format}".')
+        self.path: str or None = path
+        self.mode: str = mode
+        self.archive_format: str = archive_format
+        self.__fileobj: typing.BinaryIO or None = fileobj
+        self.__zip: zipfile.ZipFile or None = None
+        self.__tar: tarfile.TarFile or None = None
+        self.__members: typing.Dict[str, tarfile.TarInfo] or None = None
+        if archive_format == 'zip':
+            self.__zip = zipfile.ZipFile(fileobj if fileobj is not None else path, mode)
+        elif mode == 'w':
+            self.__tar = tarfile.open(path, 'w|', fileobj=fileobj)
+
+    def list(self) -> typing.List[str]:
+        self.__check_mode('r')
+        if self.__zip is not None:
+            return [info.filename for info in self.__zip.infolist() if not info.is_dir()]
+        with self.__open_tar_stream() as tar:
+            return [member.name for member in tar if member.isfile()]
+
+    def read(self, key: str) -> bytes:
+        self.__check_mode('r')
+        if self.__zip is not None:
+            return self.__zip.read(key)
+        if self.__members is None:
+            self.__open_tar_index()
+        if key not in self.__members:
+            raise KeyError(key)
+        return self.__tar.extractfile(self.__members[key]).read()
+
+    def prefetch(self, keys: typing.List[str]) -> typing.Iterator[typing.Tuple[str, bytes]]:
+        self.__check_mode('r')
+        if self.__zip is not None:
+            yield from super().prefetch(keys)
+            return
+        wanted_keys: set = set(keys)
+        with self.__open_tar_stream() as tar:
+            for member in tar:
+                if member.isfile() and member.name in wanted_keys:
+                    wanted_keys.remove(member.name)
+                    yield member.name, tar.extractfile(member).read()
+        if wanted_keys:
+            raise KeyError(f'Keys not found in archive: {", ".join(sorted(wanted_keys))}')
+
+    def write(self, key: str, data: bytes):
+        self.__check_mode('w')
+        if self.__zip is not None:
+            self.__zip.writestr(key, data, compress_type=zipfile.ZIP_STORED)
+            return
+        info: tarfile.TarInfo = tarfile.TarInfo(key)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self.__tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        if self.__zip is not None:
+            self.__zip.close()
+        if self.__tar is not None:
+            self.__tar.close()
+
+    def __open_tar_stream(self) -> tarfile.TarFile:
+        if self.__fileobj is not None:
+            if self.__fileobj.seekable():
+                self.__fileobj.seek(0)
+            return tarfile.open(mode='r|*', fileobj=self.__fileobj)
+        return tarfile.open(self.path, 'r|*')
+
+    def __open_tar_index(self):
+        if self.__fileobj is not None:
+            if not self.__fileobj.seekable():
+                raise RuntimeError('Reading single keys of a tar stream requires a seekable file object.')
+            self.__fileobj.seek(0)
+            self.__tar = tarfile.open(mode='r:*', fileobj=self.__fileobj)
+        else:
+            self.__tar = tarfile.open(self.path, 'r:*')
+        self.__members = {member.name: member for member in self.__tar.getmembers() if member.isfile()}
+
+    def __check_mode(self, mode: str):
+        if self.mode != mode:
+            raise RuntimeError(f'Archive {os.path.basename(self.path or "stream")} is opened with mode "{self.mode}".')
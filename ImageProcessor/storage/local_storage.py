@@ -0,0 +1,31 @@
+import os
+import typing
+from .storage import Storage
+from ..atomic_file import AtomicFile
+
+
+class LocalStorage(Storage):
+    def __init__(self, directory: str):
+        self.directory: str = directory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def list(self) -> typing.List[str]:
+        keys: typing.List[str] = []
+        for root, directories, files in os.walk(self.directory):
+            for file_name in files:
+                if not AtomicFile.is_temp(file_name):
+                    keys.append(os.path.relpath(os.path.join(root, file_name), self.directory).replace(os.sep, '/'))
+        return sorted(keys)
+
+    def read(self, key: str) -> bytes:
+        with open(self.get_path(key), 'rb') as file:
+            return file.read()
+
+    def write(self, key: str, data: bytes):
+        path: str = self.get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        AtomicFile.write(path, data)
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.directory, *key.split('/'))
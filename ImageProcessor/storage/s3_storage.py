@@ -0,0 +1,81 @@
+import collections
+import concurrent.futures
+import io
+import typing
+from .storage import Storage
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config
+except ImportError:
+    boto3 = None
+
+
+class S3Storage(Storage):
+    def __init__(self,
+                 bucket: str,
+                 prefix: str = '',
+                 endpoint_url: str = None,
+                 max_connections: int = 32,
+                 prefetch_count: int = 16,
+                 multipart_threshold: int = 8 * 1024 ** 2,
+                 multipart_chunk_size: int = 8 * 1024 ** 2,
+                 client=None,
+                 **client_options):
+        if client is None and boto3 is None:
+            raise RuntimeError('S3 storage requires the "boto3" package.')
+        self.bucket: str = bucket
+        self.prefix: str = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.prefetch_count: int = prefetch_count
+        if client is None:
+            client = boto3.client('s3', endpoint_url=endpoint_url,
+                                  config=Config(max_pool_connections=max_connections), **client_options)
+        self.client = client
+        self.transfer_config = TransferConfig(multipart_threshold=multipart_threshold,
+                                              multipart_chunksize=multipart_chunk_size,
+                                              max_concurrency=max(1, max_connections // 4)) \
+            if boto3 is not None else None
+        self.__executor: concurrent.futures.ThreadPoolExecutor = \
+            concurrent.futures.ThreadPoolExecutor(max_workers=max_connections)
+
+    def list(self) -> typing.List[str]:
+        keys: typing.List[str] = []
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get('Contents', []):
+                if not item['Key'].endswith('/'):
+                    keys.append(item['Key'][len(self.prefix):])
+        return keys
+
+    def read(self, key: str) -> bytes:
+        response: dict = self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        return response['Body'].read()
+
+    def write(self, key: str, data: bytes):
+        if self.transfer_config is not None:
+            self.client.upload_fileobj(io.BytesIO(data), self.bucket, self.prefix + key, Config=self.transfer_config)
+        else:
+            self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def write_async(self, key: str, data: bytes) -> concurrent.futures.Future:
+        return self.__executor.submit(self.write, key, data)
+
+    def prefetch(self, keys: typing.List[str]) -> typing.Iterator[typing.Tuple[str, bytes]]:
+        pending: collections.deque = collections.deque()
+        keys_iterator: typing.Iterator[str] = iter(keys)
+        for key in keys_iterator:
+            pending.append((key, self.__executor.submit(self.read, key)))
+            if len(pending) >= self.prefetch_count:
+                break
+        while pending:
+            key: str
+            future: concurrent.futures.Future
+            key, future = pending.popleft()
+            next_key: str or None = next(keys_iterator, None)
+            if next_key is not None:
+                pending.append((next_key, self.__executor.submit(self.read, next_key)))
+            yield key, future.result()
+
+    def close(self):
+        self.__executor.shutdown(wait=True)
@@ -0,0 +1,41 @@
+import abc
+import concurrent.futures
+import typing
+
+
+class Storage(abc.ABC):
+    @abc.abstractmethod
+    def list(self) -> typing.List[str]:
+        pass
+
+    @abc.abstractmethod
+    def read(self, key: str) -> bytes:
+        pass
+
+    @abc.abstractmethod
+    def write(self, key: str, data: bytes):
+        pass
+
+    def write_async(self, key: str, data: bytes) -> concurrent.futures.Future:
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        try:
+            self.write(key, data)
+        except Exception as err:
+            future.set_exception(err)
+        else:
+            future.set_result(None)
+        return future
+
+    def prefetch(self, keys: typing.List[str]) -> typing.Iterator[typing.Tuple[str, bytes]]:
+        for key in keys:
+            yield key, self.read(key)
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> 'Storage':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self.close()
+        return False
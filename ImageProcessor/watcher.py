@@ -0,0 +1,246 @@
+import ctypes
+import ctypes.util
+import mimetypes
+import os
+import queue
+import re
+import select
+import statistics
+import struct
+import sys
+import threading
+import time
+import typing
+from .atomic_file import AtomicFile
+from .logger import Logger
+from .stage_chain import StageChain
+from .worker_pool import WorkerPool, TaskResult
+
+
+class Watcher:
+    IN_CLOSE_WRITE: int = 0x00000008
+    IN_MOVED_FROM: int = 0x00000040
+    IN_MOVED_TO: int = 0x00000080
+    IN_DELETE: int = 0x00000200
+    IN_Q_OVERFLOW: int = 0x00004000
+    IN_NONBLOCK: int = os.O_NONBLOCK
+    IN_CLOEXEC: int = 0o2000000
+    __event_header: struct.Struct = struct.Struct('iIII')
+
+    def __init__(self,
+                 chain: StageChain,
+                 pool: WorkerPool,
+                 directory: str,
+                 debounce: float = 0.5,
+                 poll_interval: float = 1.0,
+                 use_inotify: bool = True,
+                 process_existing: bool = False,
+                 on_output: typing.Callable[[str, str], None] = None,
+                 logger: Logger = None):
+        if os.path.realpath(chain.output_directory) == os.path.realpath(directory):
+            raise TypeError('The output directory of a watched directory must be a different directory.')
+        self.chain: StageChain = chain
+        self.pool: WorkerPool = pool
+        self.directory: str = directory
+        self.debounce: float = debounce
+        self.poll_interval: float = poll_interval
+        self.process_existing: bool = process_existing
+        self.on_output: typing.Callable[[str, str], None] or None = on_output
+        self.logger: Logger or None = logger
+        self.statistics: dict = {'processed': 0, 'failed': 0, 'latencies': []}
+        self.__pending: typing.Dict[str, typing.Tuple[int, int, float, float]] = dict()
+        self.__known: typing.Dict[str, typing.Tuple[int, int]] = dict()
+        self.__completed: queue.Queue = queue.Queue()
+        self.__active_tasks: int = 0
+        self.__lock: threading.Lock = threading.Lock()
+        self.__stop_reader: int or None
+        self.__stop_writer: int or None
+        self.__stop_reader, self.__stop_writer = os.pipe()
+        os.set_blocking(self.__stop_writer, False)
+        self.__running: bool = False
+        self.__inotify: int or None = self.__create_inotify() if use_inotify else None
+
+    def run(self):
+        self.__running = True
+        for path, stat in self.__scan():
+            if self.process_existing:
+                self.__on_event(path)
+            else:
+                self.__known[path] = stat
+        next_poll: float = time.monotonic() + self.poll_interval
+        try:
+            while self.__running:
+                now: float = time.monotonic()
+                timeout: float or None = self.__get_timeout(now)
+                if self.__inotify is None:
+                    timeout = max(next_poll - now, 0.0) if timeout is None else min(timeout, max(next_poll - now, 0))
+                sources: typing.List[int] = [self.__stop_reader] + ([self.__inotify] if self.__inotify is not None
+                                                                    else [])
+                readable: list = select.select(sources, [], [], timeout)[0]
+                if self.__stop_reader in readable:
+                    os.read(self.__stop_reader, 1024)
+                self.__finish_completed(False)
+                if self.__inotify is not None and self.__inotify in readable:
+                    self.__read_events()
+                if self.__inotify is None and time.monotonic() >= next_poll:
+                    self.__poll()
+                    next_poll = time.monotonic() + self.poll_interval
+                self.__check_pending(time.monotonic())
+        finally:
+            self.__finish_completed(True)
+            if self.__inotify is not None:
+                os.close(self.__inotify)
+                self.__inotify = None
+            with self.__lock:
+                os.close(self.__stop_reader)
+                os.close(self.__stop_writer)
+                self.__stop_reader = None
+                self.__stop_writer = None
+
+    def stop(self):
+        self.__running = False
+        self.__wake()
+
+    def get_statistics(self) -> dict:
+        with self.__lock:
+            latencies: typing.List[float] = sorted(self.statistics['latencies'])
+            return {'processed': self.statistics['processed'],
+                    'failed': self.statistics['failed'],
+                    'pending': len(self.__pending) + self.__active_tasks,
+                    'latency_median': statistics.median(latencies) if latencies else None,
+                    'latency_max': latencies[-1] if latencies else None}
+
+    def __get_timeout(self, now: float) -> float or None:
+        deadlines: typing.List[float] = [changed + self.debounce for _, _, changed, _ in self.__pending.values()]
+        if len(deadlines) == 0:
+            return None
+        return max(min(deadlines) - now, 0.0)
+
+    def __on_event(self, path: str):
+        name: str = os.path.basename(path)
+        if name.startswith('.') or AtomicFile.is_temp(name) or \
+                not re.fullmatch('image/.*', str(mimetypes.guess_type(name)[0])):
+            return
+        try:
+            stat: os.stat_result = os.stat(path)
+        except FileNotFoundError:
+            return
+        now: float = time.monotonic()
+        arrived: float = self.__pending[path][3] if path in self.__pending else now
+        self.__pending[path] = (stat.st_size, stat.st_mtime_ns, now, arrived)
+
+    def __check_pending(self, now: float):
+        for path, (size, mtime, changed, arrived) in list(self.__pending.items()):
+            if now - changed < self.debounce:
+                continue
+            try:
+                stat: os.stat_result = os.stat(path)
+            except FileNotFoundError:
+                del self.__pending[path]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+                self.__pending[path] = (stat.st_size, stat.st_mtime_ns, now, arrived)
+                continue
+            del self.__pending[path]
+            self.__known[path] = (size, mtime)
+            self.__submit(path, arrived)
+
+    def __submit(self, path: str, arrived: float):
+        cost: int = WorkerPool.estimate_memory(path) if self.pool.memory_budget is not None else 0
+        result: TaskResult = self.pool.apply_async(self.chain.run, (path,), cost)
+        self.__active_tasks += 1
+        result.add_done_callback(lambda task_result: self.__on_task_done(path, arrived, task_result))
+
+    def __on_task_done(self, path: str, arrived: float, result: TaskResult):
+        self.__completed.put((path, arrived, time.monotonic(), result))
+        self.__wake()
+
+    def __wake(self):
+        with self.__lock:
+            if self.__stop_writer is None:
+                return
+            try:
+                os.write(self.__stop_writer, b'\0')
+            except BlockingIOError:
+                pass
+
+    def __finish_completed(self, wait: bool):
+        while self.__active_tasks != 0 and (wait or not self.__completed.empty()):
+            path: str
+            arrived: float
+            finished: float
+            result: TaskResult
+            path, arrived, finished, result = self.__completed.get()
+            self.__active_tasks -= 1
+            try:
+                output_path: str = result.get(0)
+            except Exception as err:
+                with self.__lock:
+                    self.statistics['failed'] += 1
+                self.__write_error(f'\n{path} was not processed: {err!r}')
+                continue
+            with self.__lock:
+                self.statistics['processed'] += 1
+                self.statistics['latencies'].append(finished - arrived)
+                del self.statistics['latencies'][:-1000]
+            if self.on_output is not None:
+                try:
+                    self.on_output(path, output_path)
+                except Exception as err:
+                    self.__write_error(f'\non_output failed for {path}: {err!r}')
+
+    def __write_error(self, text: str):
+        print(text)
+        if self.logger is not None:
+            self.logger.error_message(text)
+
+    def __scan(self) -> typing.Iterator[typing.Tuple[str, typing.Tuple[int, int]]]:
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat: os.stat_result = entry.stat()
+                    yield os.path.join(self.directory, entry.name), (stat.st_size, stat.st_mtime_ns)
+
+    def __poll(self):
+        present: typing.Dict[str, typing.Tuple[int, int]] = dict(self.__scan())
+        self.__known = {path: stat for path, stat in self.__known.items() if path in present}
+        for path, stat in present.items():
+            if self.__known.get(path) != stat and path not in self.__pending:
+                self.__on_event(path)
+
+    def __read_events(self):
+        while True:
+            try:
+                buffer: bytes = os.read(self.__inotify, 64 * 1024)
+            except BlockingIOError:
+                return
+            offset: int = 0
+            while offset < len(buffer):
+                mask: int
+                name_length: int
+                _, mask, _, name_length = self.__event_header.unpack_from(buffer, offset)
+                offset += self.__event_header.size
+                name: str = os.fsdecode(buffer[offset:offset + name_length].rstrip(b'\0'))
+                offset += name_length
+                if mask & Watcher.IN_Q_OVERFLOW:
+                    self.__poll()
+                elif name and mask & (Watcher.IN_DELETE | Watcher.IN_MOVED_FROM):
+                    self.__known.pop(os.path.join(self.directory, name), None)
+                elif name and mask & (Watcher.IN_CLOSE_WRITE | Watcher.IN_MOVED_TO):
+                    self.__on_event(os.path.join(self.directory, name))
+
+    def __create_inotify(self) -> int or None:
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            libc: ctypes.CDLL = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            descriptor: int = libc.inotify_init1(Watcher.IN_NONBLOCK | Watcher.IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if descriptor < 0:
+            return None
+        if libc.inotify_add_watch(descriptor, os.fsencode(self.directory), Watcher.IN_CLOSE_WRITE |
+                                  Watcher.IN_MOVED_TO | Watcher.IN_DELETE | Watcher.IN_MOVED_FROM) < 0:
+            os.close(descriptor)
+            return None
+        return descriptor
@@ -0,0 +1,226 @@
+import asyncio
+import multiprocessing
+import multiprocessing.pool
+import os
+import threading
+import typing
+from io import BytesIO
+from PIL import Image
+from .image_io import ImageIO
+
+
+class TaskResult:
+    def __init__(self):
+        self.__event: threading.Event = threading.Event()
+        self.__value: typing.Any = None
+        self.__error: BaseException or None = None
+        self.__callbacks: typing.List[typing.Callable] = []
+        self.__lock: threading.Lock = threading.Lock()
+
+    def set_result(self, value: typing.Any):
+        self.__value = value
+        self.__finish()
+
+    def set_error(self, error: BaseException):
+        self.__error = error
+        self.__finish()
+
+    def add_done_callback(self, callback: typing.Callable):
+        with self.__lock:
+            if not self.__event.is_set():
+                self.__callbacks.append(callback)
+                return
+        callback(self)
+
+    def ready(self) -> bool:
+        return self.__event.is_set()
+
+    def successful(self) -> bool:
+        return self.ready() and self.__error is None
+
+    def get(self, timeout: float = None) -> typing.Any:
+        if not self.__event.wait(timeout):
+            raise multiprocessing.TimeoutError
+        if self.__error is not None:
+            raise self.__error
+        return self.__value
+
+    def __finish(self):
+        with self.__lock:
+            self.__event.set()
+            callbacks: typing.List[typing.Callable] = self.__callbacks
+            self.__callbacks = []
+        for callback in callbacks:
+            callback(self)
+
+
+class WorkerPool:
+    def __init__(self,
+                 processes: int = None,
+                 max_tasks_per_child: int = None,
+                 max_worker_rss: int = None,
+                 memory_budget: int = None,
+                 max_pending_tasks: int = None):
+        self.processes: int = processes or os.cpu_count() or 1
+        self.max_tasks_per_child: int or None = max_tasks_per_child
+        self.max_worker_rss: int or None = max_worker_rss
+        self.memory_budget: int or None = memory_budget
+        self.max_pending_tasks: int = max_pending_tasks or self.processes * 2
+        self.recycle_count: int = 0
+        self.liveness_interval: float = 0.1
+        self.__condition: threading.Condition = threading.Condition()
+        self.__reserved_memory: int = 0
+        self.__tasks: typing.Dict[int, typing.Tuple[TaskResult, int]] = dict()
+        self.__task_count: int = 0
+        self.__recycle_required: bool = False
+        self.__pool: multiprocessing.pool.Pool or None = None
+        self.__workers: typing.Set[multiprocessing.Process] = set()
+        self.__stop_event: threading.Event = threading.Event()
+        self.__watchdog: threading.Thread or None = None
+
+    def apply_async(self, function: typing.Callable, args: tuple = (), cost: int = 0) -> TaskResult:
+        task_result: TaskResult = TaskResult()
+        with self.__condition:
+            self.__condition.wait_for(lambda: self.__can_admit(cost))
+            if self.__recycle_required:
+                self.__recycle()
+            if self.__pool is None:
+                self.__pool = self.__create_pool()
+            if self.__watchdog is None:
+                self.__watchdog = threading.Thread(target=self.__watch_workers, daemon=True)
+                self.__watchdog.start()
+            self.__reserved_memory += cost
+            self.__task_count += 1
+            task_id: int = self.__task_count
+            self.__tasks[task_id] = (task_result, cost)
+            self.__pool.apply_async(WorkerPool.execute, (function, args),
+                                    callback=lambda outcome: self.__on_success(task_id, outcome),
+                                    error_callback=lambda error: self.__on_error(task_id, error))
+        return task_result
+
+    async def apply(self, function: typing.Callable, args: tuple = (), cost: int = 0) -> typing.Any:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        task_result: TaskResult = await loop.run_in_executor(None, self.apply_async, function, args, cost)
+        future: asyncio.Future = loop.create_future()
+        task_result.add_done_callback(lambda result: loop.call_soon_threadsafe(WorkerPool.__set_future, future, result))
+        return await future
+
+    def get_pending_tasks(self) -> int:
+        return len(self.__tasks)
+
+    def close(self):
+        self.__stop_event.set()
+        if self.__watchdog is not None:
+            self.__watchdog.join()
+            self.__watchdog = None
+        self.__stop_event.clear()
+        if self.__pool is not None:
+            self.__pool.close()
+            self.__pool.join()
+
+    def __can_admit(self, cost: int) -> bool:
+        if len(self.__tasks) == 0:
+            return True
+        if self.__recycle_required or len(self.__tasks) >= self.max_pending_tasks:
+            return False
+        return self.memory_budget is None or self.__reserved_memory + cost <= self.memory_budget
+
+    def __create_pool(self) -> multiprocessing.pool.Pool:
+        return multiprocessing.Pool(self.processes, maxtasksperchild=self.max_tasks_per_child)
+
+    def __recycle(self):
+        self.__pool.close()
+        self.__pool.join()
+        self.__pool = self.__create_pool()
+        self.__recycle_required = False
+        self.recycle_count += 1
+
+    def __watch_workers(self):
+        while not self.__stop_event.wait(self.liveness_interval):
+            with self.__condition:
+                pool: multiprocessing.pool.Pool or None = self.__pool
+                if pool is None:
+                    continue
+                self.__workers.update(getattr(pool, '_pool', ()))
+            dead_worker: multiprocessing.Process or None = None
+            for worker in list(self.__workers):
+                if worker.exitcode == 0:
+                    self.__workers.discard(worker)
+                elif worker.exitcode is not None:
+                    dead_worker = worker
+            if dead_worker is not None:
+                self.__break_pool(pool, dead_worker)
+
+    def __break_pool(self, pool: multiprocessing.pool.Pool, dead_worker: multiprocessing.Process):
+        with self.__condition:
+            tasks: typing.List[typing.Tuple[TaskResult, int]] = list(self.__tasks.values())
+            self.__tasks.clear()
+            self.__reserved_memory = 0
+            self.__workers.clear()
+            if self.__pool is pool:
+                self.__pool = None
+                self.__recycle_required = False
+            self.__condition.notify_all()
+        pool.terminate()
+        for task_result, _ in tasks:
+            task_result.set_error(RuntimeError(f'Worker process {dead_worker.pid} exited unexpectedly with code '
+                                               f'{dead_worker.exitcode}, the pending tasks were abandoned.'))
+
+    def __release(self, task_id: int, rss: int = 0) -> TaskResult or None:
+        with self.__condition:
+            task: typing.Tuple[TaskResult, int] or None = self.__tasks.pop(task_id, None)
+            if task is None:
+                return None
+            self.__reserved_memory -= task[1]
+            if self.max_worker_rss is not None and rss > self.max_worker_rss:
+                self.__recycle_required = True
+            self.__condition.notify_all()
+        return task[0]
+
+    def __on_success(self, task_id: int, outcome: typing.Tuple[typing.Any, int, typing.Dict[str, int]]):
+        task_result: TaskResult or None = self.__release(task_id, outcome[1])
+        if task_result is None:
+            return
+        ImageIO.count(**outcome[2])
+        task_result.set_result(outcome[0])
+
+    def __on_error(self, task_id: int, error: BaseException):
+        task_result: TaskResult or None = self.__release(task_id)
+        if task_result is not None:
+            task_result.set_error(error)
+
+    @staticmethod
+    def __set_future(future: asyncio.Future, task_result: TaskResult):
+        if future.done():
+            return
+        try:
+            future.set_result(task_result.get(0))
+        except Exception as err:
+            future.set_exception(err)
+
+    @staticmethod
+    def execute(function: typing.Callable, args: tuple) -> typing.Tuple[typing.Any, int, typing.Dict[str, int]]:
+        ImageIO.reset_statistics()
+        result: typing.Any = function(*args)
+        return result, WorkerPool.get_rss(), ImageIO.reset_statistics()
+
+    @staticmethod
+    def get_rss() -> int:
+        try:
+            with open('/proc/self/statm', 'r') as statm:
+                return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, AttributeError):
+            pass
+        try:
+            import resource
+        except ImportError:
+            return 0
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    @staticmethod
+    def estimate_memory(source: str or bytes) -> int:
+        try:
+            with Image.open(BytesIO(source) if isinstance(source, bytes) else source) as image:
+                return image.width * image.height * len(image.getbands())
+        except (OSError, ValueError):
+            return len(source) if isinstance(source, bytes) else os.path.getsize(source)
@@ -0,0 +1,76 @@
+import asyncio
+import os
+import shutil
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+Image = pytest.importorskip('PIL.Image')
+
+from ImageProcessor.compression_router import CompressionRouter
+from ImageProcessor.compressor import Compressor
+from ImageProcessor.cycle_iterator import CycleIterator
+from ImageProcessor.errors import TinyPNGAccountError
+from ImageProcessor.worker_pool import WorkerPool
+
+
+class FakeTinyPng:
+    def __init__(self, output_directory: str, quotas: dict):
+        self.output_directory: str = output_directory
+        self.quotas: dict = quotas
+        self.api_keys: CycleIterator = CycleIterator(list(quotas))
+        self.session: aiohttp.ClientSession or None = None
+        self.sessions: list = []
+        self.key: str or None = None
+        self.compressed: dict = {key: [] for key in quotas}
+
+    async def create_web_session(self):
+        while True:
+            try:
+                key: str = next(self.api_keys)
+            except StopIteration:
+                raise RuntimeError('No valid API keys found or keys have reached the images processing limit.')
+            self.session = aiohttp.ClientSession()
+            self.sessions.append(self.session)
+            self.key = key
+            if self.quotas[key] > 0:
+                return
+            await self.session.close()
+            self.api_keys.delete(key)
+
+    async def compress(self, path: str):
+        key: str = self.key
+        await asyncio.sleep(0.01)
+        if self.quotas[key] <= 0:
+            raise TinyPNGAccountError(f'API key {key} has reached the images processing limit.')
+        self.quotas[key] -= 1
+        self.compressed[key].append(path)
+        shutil.copyfile(path, f'{self.output_directory}/{os.path.basename(path)}')
+
+
+def create_pngs(directory: str, count: int) -> list:
+    os.makedirs(directory)
+    files: list = []
+    for index in range(count):
+        path: str = f'{directory}/image{index}.png'
+        Image.effect_noise((64, 64), 50).save(path)
+        files.append(path)
+    return files
+
+
+def test_exhausted_keys_rotate_and_fall_back_to_local(tmp_path):
+    files: list = create_pngs(f'{tmp_path}/input', 12)
+    os.makedirs(f'{tmp_path}/tiny_png')
+    tiny_png: FakeTinyPng = FakeTinyPng(f'{tmp_path}/tiny_png', {'a': 3, 'b': 4})
+    pool: WorkerPool = WorkerPool(2)
+    try:
+        router: CompressionRouter = CompressionRouter(pool, Compressor(f'{tmp_path}/output'), tiny_png,
+                                                      f'{tmp_path}/output', CompressionRouter.TINY_PNG, max_uploads=3)
+        outputs: list = asyncio.run(router.compress_all(files))
+    finally:
+        pool.close()
+    assert {key: len(paths) for key, paths in tiny_png.compressed.items()} == {'a': 3, 'b': 4}
+    assert router.report['tiny_png'] == 7 and router.report['local'] == 5
+    assert router.report['api_calls'] >= 9
+    assert [os.path.basename(output) for output in outputs] == [os.path.basename(file) for file in files]
+    assert all(os.path.exists(output) for output in outputs)
+    assert all(session.closed for session in tiny_png.sessions)
@@ -0,0 +1,56 @@
+import io
+import pytest
+
+numpy = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+ImageFilter = pytest.importorskip('PIL.ImageFilter')
+
+from ImageProcessor.compressor import Compressor
+
+
+def create_jpeg(quality: int) -> bytes:
+    generator: numpy.random.Generator = numpy.random.default_rng(0)
+    noise: numpy.ndarray = generator.integers(0, 256, (300, 400, 3), dtype=numpy.uint8)
+    buffer: io.BytesIO = io.BytesIO()
+    Image.fromarray(noise).filter(ImageFilter.GaussianBlur(2)).save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def searched_qualities(monkeypatch) -> list:
+    qualities: list = []
+    get_ssim_at_quality = Compressor._Compressor__get_ssim_at_quality
+
+    def record(image, quality: int, encoder, use_gpu: bool = False) -> float:
+        qualities.append(quality)
+        return get_ssim_at_quality(image, quality, encoder, use_gpu)
+
+    monkeypatch.setattr(Compressor, '_Compressor__get_ssim_at_quality', staticmethod(record))
+    return qualities
+
+
+def test_source_below_range_is_passed_through(searched_qualities):
+    source_data: bytes = create_jpeg(60)
+    output_data: bytes
+    output_data, _ = Compressor(dynamic_quality_range=(80, 85)).compress_data(source_data, 'photo.jpg')
+    assert output_data == source_data
+    assert searched_qualities == []
+
+
+def test_source_inside_range_narrows_search(searched_qualities):
+    source_data: bytes = create_jpeg(82)
+    output_data: bytes
+    output_data, _ = Compressor(dynamic_quality_range=(75, 90)).compress_data(source_data, 'photo.jpg')
+    assert len(searched_qualities) > 1
+    assert all(75 <= quality <= 82 for quality in searched_qualities[1:])
+    assert len(output_data) <= len(source_data)
+    with Image.open(io.BytesIO(output_data)) as image:
+        assert Compressor.estimate_jpeg_quality(image) <= 82
+
+
+def test_source_above_range_searches_whole_range(searched_qualities):
+    source_data: bytes = create_jpeg(95)
+    output_data: bytes
+    output_data, _ = Compressor(dynamic_quality_range=(80, 85)).compress_data(source_data, 'photo.jpg')
+    assert all(80 <= quality <= 85 for quality in searched_qualities[1:])
+    assert len(output_data) < len(source_data)
@@ -0,0 +1,44 @@
+import pytest
+
+numpy = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+ImageDraw = pytest.importorskip('PIL.ImageDraw')
+ImageFilter = pytest.importorskip('PIL.ImageFilter')
+
+from ImageProcessor.deduplicator import Deduplicator
+
+
+@pytest.fixture
+def images(tmp_path) -> dict:
+    generator: numpy.random.Generator = numpy.random.default_rng(0)
+    noise: numpy.ndarray = generator.normal(0, 20, (60, 90, 3)).repeat(10, 0).repeat(10, 1)
+    gradient: numpy.ndarray = numpy.linspace(0, 200, 900)[None, :, None].repeat(600, 0).repeat(3, 2)
+    photo: Image.Image = Image.fromarray(numpy.clip(gradient + noise, 0, 255).astype(numpy.uint8)).filter(
+        ImageFilter.GaussianBlur(3))
+    paths: dict = {name: f'{tmp_path}/{name}' for name in ('photo.jpg', 'reencoded.jpg', 'thumbnail.jpg',
+                                                            'mug.jpg', 'shoe.jpg', 'photo.png')}
+    photo.save(paths['photo.jpg'], quality=92)
+    photo.save(paths['reencoded.jpg'], quality=85)
+    photo.resize((300, 200)).save(paths['thumbnail.jpg'], quality=92)
+    photo.convert('RGBA').save(paths['photo.png'])
+    for name, box, color in (('mug.jpg', (300, 200, 450, 400), (200, 30, 30)),
+                             ('shoe.jpg', (350, 250, 600, 400), (30, 30, 200))):
+        product: Image.Image = Image.new('RGB', (900, 600), 'white')
+        ImageDraw.Draw(product).ellipse(box, fill=color)
+        product.save(paths[name], quality=90)
+    return paths
+
+
+def test_perceptual_duplicates_require_same_image(images):
+    deduplicator: Deduplicator = Deduplicator('perceptual', 64)
+    duplicates: dict = deduplicator.find_duplicates(list(images.values()))
+    assert duplicates == {images['reencoded.jpg']: images['photo.jpg']}
+
+
+def test_exact_duplicates(images, tmp_path):
+    copy_path: str = f'{tmp_path}/copy.jpg'
+    with open(images['photo.jpg'], 'rb') as source, open(copy_path, 'wb') as destination:
+        destination.write(source.read())
+    deduplicator: Deduplicator = Deduplicator('exact')
+    assert deduplicator.find_duplicates([images['photo.jpg'], images['reencoded.jpg'], copy_path]) == \
+           {copy_path: images['photo.jpg']}
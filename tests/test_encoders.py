@@ -0,0 +1,54 @@
+import os
+import pytest
+
+numpy = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+ImageFilter = pytest.importorskip('PIL.ImageFilter')
+
+from ImageProcessor.compressor import Compressor
+from ImageProcessor.encoders import Encoder, JpegEncoder, WebPEncoder, WebPLosslessEncoder
+
+
+@pytest.fixture
+def photo() -> Image.Image:
+    generator: numpy.random.Generator = numpy.random.default_rng(0)
+    noise: numpy.ndarray = generator.integers(0, 256, (300, 400, 3), dtype=numpy.uint8)
+    return Image.fromarray(noise).filter(ImageFilter.GaussianBlur(2))
+
+
+def test_create_rejects_unknown_format_and_speed():
+    with pytest.raises(TypeError, match='Supported'):
+        Encoder.create('gif')
+    with pytest.raises(TypeError, match='speed'):
+        Encoder.create('jpeg', 11)
+    assert isinstance(Encoder.create('webp_lossless'), WebPLosslessEncoder)
+
+
+def test_smallest_encoder_is_selected(photo):
+    compressor: Compressor = Compressor(output_formats=('jpeg', 'webp', 'webp_lossless'))
+    encoder: Encoder
+    data: bytes
+    encoder, data = compressor.encode(photo, 80, 'JPEG')
+    sizes: dict = {type(candidate): len(candidate.encode(candidate.prepare(photo), 80))
+                   for candidate in (JpegEncoder(), WebPEncoder(), WebPLosslessEncoder())}
+    assert len(data) == min(sizes.values())
+    assert sizes[type(encoder)] == len(data)
+
+
+def test_output_extension_follows_selected_encoder(tmp_path, photo):
+    photo.save(f'{tmp_path}/photo.jpg', quality=95)
+    jpeg_output: str = Compressor(f'{tmp_path}/jpeg', 80).compress(f'{tmp_path}/photo.jpg')
+    webp_output: str = Compressor(f'{tmp_path}/webp', 80, output_formats=('webp',)).compress(f'{tmp_path}/photo.jpg')
+    assert os.path.basename(jpeg_output) == 'photo.jpg'
+    assert os.path.basename(webp_output) == 'photo.webp'
+    with Image.open(webp_output) as image:
+        assert image.format == 'WEBP' and image.size == photo.size
+
+
+def test_png_never_becomes_jpeg(tmp_path, photo):
+    photo.convert('RGBA').save(f'{tmp_path}/photo.png')
+    output_path: str = Compressor(f'{tmp_path}/output', 80, png_quantize=False).compress(f'{tmp_path}/photo.png')
+    assert os.path.basename(output_path) == 'photo.png'
+    with Image.open(output_path) as image:
+        assert image.format == 'PNG'
+        assert image.convert('RGB').tobytes() == photo.tobytes()
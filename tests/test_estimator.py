@@ -0,0 +1,58 @@
+import os
+import pytest
+
+numpy = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+
+from ImageProcessor import Processor
+from ImageProcessor.worker_pool import WorkerPool
+
+
+@pytest.fixture
+def pool():
+    pool: WorkerPool = WorkerPool(2)
+    yield pool
+    pool.close()
+
+
+def create_images(directory: str, count: int) -> list:
+    os.makedirs(directory)
+    generator: numpy.random.Generator = numpy.random.default_rng(0)
+    files: list = []
+    for index in range(count):
+        path: str = f'{directory}/image{index}.jpg'
+        Image.fromarray(generator.integers(0, 256, (300, 400, 3), dtype=numpy.uint8)).save(path, quality=90)
+        files.append(path)
+    return files
+
+
+@pytest.mark.parametrize('stage', ['resize', 'crop', 'paste'])
+def test_missing_stage_options_fail_before_sampling(tmp_path, pool, stage):
+    create_images(f'{tmp_path}/input', 2)
+    processor: Processor = Processor(output_directory=f'{tmp_path}/output', directory=f'{tmp_path}/input', pool=pool)
+    with pytest.raises(RuntimeError, match='required|not set'):
+        processor.estimate(stages=(stage,))
+
+
+def test_wall_time_is_capped_by_image_count_and_longest_image(tmp_path, pool):
+    create_images(f'{tmp_path}/input', 2)
+    processor: Processor = Processor(output_directory=f'{tmp_path}/output', directory=f'{tmp_path}/input', width=100,
+                                     pool=pool)
+    report: dict = processor.estimate(stages=('resize',), worker_counts=(1, 64))
+    assert report['sample_size'] == 2 and report['failed_samples'] == 0
+    parallelism: int = min(2, os.cpu_count() or 1)
+    assert report['wall_time'][1] == tuple(max(value, report['max_image_time']) for value in report['cpu_time'])
+    assert report['wall_time'][64] == tuple(max(value / parallelism, report['max_image_time'])
+                                            for value in report['cpu_time'])
+    assert report['wall_time'][64][0] >= report['max_image_time'] > 0
+
+
+def test_failing_sample_does_not_abort_estimate(tmp_path, pool):
+    files: list = create_images(f'{tmp_path}/input', 3)
+    with open(files[0], 'wb') as broken:
+        broken.write(b'not an image')
+    processor: Processor = Processor(output_directory=f'{tmp_path}/output', directory=f'{tmp_path}/input', width=100,
+                                     pool=pool)
+    report: dict = processor.estimate(stages=('resize',))
+    assert report['sample_size'] == 3 and report['failed_samples'] == 1
+    assert report['cpu_time'][0] > 0 and report['output_weight'][0] > 0
@@ -0,0 +1,57 @@
+import os
+import pytest
+
+numpy = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+Image = pytest.importorskip('PIL.Image')
+ImageDraw = pytest.importorskip('PIL.ImageDraw')
+
+from ImageProcessor.compressor import Compressor
+from ImageProcessor.cropper import Cropper
+from ImageProcessor.image_io import ImageIO
+from ImageProcessor.resizer import Resizer
+from ImageProcessor.worker_pool import WorkerPool
+
+
+@pytest.fixture
+def image_path(tmp_path) -> str:
+    generator: numpy.random.Generator = numpy.random.default_rng(0)
+    texture: Image.Image = Image.fromarray(generator.integers(0, 80, (1200, 1600, 3), dtype=numpy.uint8))
+    mask: Image.Image = Image.new('L', (1600, 1200), 0)
+    ImageDraw.Draw(mask).ellipse((300, 200, 1100, 1000), fill=255)
+    image: Image.Image = Image.new('RGB', (1600, 1200), 'white')
+    image.paste(texture, (0, 0), mask)
+    ImageDraw.Draw(image).ellipse((500, 400, 900, 800), fill='white')
+    path: str = f'{tmp_path}/product.jpg'
+    image.save(path, quality=92)
+    return path
+
+
+@pytest.mark.parametrize('stage, streamed', [('resize', True), ('crop', False), ('compress', True)])
+def test_worker_statistics_reach_parent(tmp_path, image_path, stage, streamed):
+    functions: dict = {'resize': Resizer(f'{tmp_path}/resize', 400).resize,
+                       'crop': Cropper(f'{tmp_path}/crop', 1.0).crop_image,
+                       'compress': Compressor(f'{tmp_path}/compress').compress}
+    size: int = os.path.getsize(image_path)
+    pool: WorkerPool = WorkerPool(1)
+    try:
+        ImageIO.reset_statistics()
+        output_path: str = pool.apply_async(functions[stage], (image_path,)).get(60)
+        statistics: dict = ImageIO.reset_statistics()
+    finally:
+        pool.close()
+    assert statistics == {'images_read': 1,
+                          'bytes_read': size,
+                          'bytes_streamed': size if streamed else 0,
+                          'bytes_copied': 0,
+                          'bytes_written': os.path.getsize(output_path)}
+
+
+def test_data_variant_counts_copy(image_path):
+    with open(image_path, 'rb') as file:
+        data: bytes = file.read()
+    ImageIO.reset_statistics()
+    Cropper(ratio=1.0).crop_data(data, image_path)
+    statistics: dict = ImageIO.reset_statistics()
+    assert statistics['bytes_read'] == 0
+    assert statistics['bytes_copied'] > 0
@@ -0,0 +1,101 @@
+import os
+import pytest
+
+numpy = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+
+from ImageProcessor.job_runner import JobRunner
+from ImageProcessor.worker_pool import WorkerPool
+
+
+@pytest.fixture
+def directory(tmp_path) -> str:
+    path: str = f'{tmp_path}/input'
+    os.makedirs(path)
+    generator: numpy.random.Generator = numpy.random.default_rng(0)
+    for index in range(4):
+        Image.fromarray(generator.integers(0, 256, (300, 400, 3), dtype=numpy.uint8)).save(f'{path}/image{index}.jpg',
+                                                                                            quality=90)
+    return path
+
+
+def create_jobs(tmp_path, directory: str, use_journal: bool = False) -> list:
+    return [{'name': 'small', 'weight': 2, 'stages': [{'stage': 'resize', 'width': 100}],
+             'processor': {'directory': directory, 'output_directory': f'{tmp_path}/small',
+                           'use_journal': use_journal}},
+            {'name': 'large', 'stages': [{'stage': 'resize', 'width': 200}],
+             'processor': {'directory': directory, 'output_directory': f'{tmp_path}/large',
+                           'use_journal': use_journal}}]
+
+
+def test_run_reports_sizes_from_workers(tmp_path, directory):
+    runner: JobRunner = JobRunner(create_jobs(tmp_path, directory), processes=2)
+    try:
+        metrics: dict = runner.run()
+    finally:
+        runner.close()
+    assert metrics['images_count'] == 8 and metrics['failed_count'] == 0
+    input_weight: int = sum(os.path.getsize(f'{directory}/{name}') for name in os.listdir(directory))
+    for name in ('small', 'large'):
+        assert metrics['jobs'][name]['input_weight'] == input_weight
+        assert metrics['jobs'][name]['output_weight'] == sum(
+            os.path.getsize(f'{tmp_path}/{name}/{file}') for file in os.listdir(f'{tmp_path}/{name}')
+            if not file.startswith('.'))
+
+
+def test_failed_task_does_not_stall_run(tmp_path, directory):
+    jobs: list = create_jobs(tmp_path, directory)
+    jobs[0]['files'] = [f'{directory}/image0.jpg', f'{directory}/missing.jpg']
+    runner: JobRunner = JobRunner(jobs, processes=2)
+    try:
+        metrics: dict = runner.run()
+    finally:
+        runner.close()
+    assert metrics['jobs']['small']['failed_count'] == 1
+    assert metrics['images_count'] == 5
+
+
+def test_resume_skips_journaled_images(tmp_path, directory):
+    pool: WorkerPool = WorkerPool(2)
+    try:
+        JobRunner(create_jobs(tmp_path, directory, True), pool).run()
+        os.remove(f'{tmp_path}/large/image1.jpg')
+        metrics: dict = JobRunner(create_jobs(tmp_path, directory, True), pool, resume=True).run()
+    finally:
+        pool.close()
+    assert metrics['jobs']['small']['skipped_count'] == 4 and metrics['jobs']['small']['images_count'] == 0
+    assert metrics['jobs']['large']['skipped_count'] == 3 and metrics['jobs']['large']['images_count'] == 1
+    assert os.path.exists(f'{tmp_path}/large/image1.jpg')
+
+
+@pytest.mark.parametrize('jobs, message', [
+    ([{'name': 'a', 'stages': ['resize']}, {'name': 'a', 'stages': ['crop']}], 'unique'),
+    ([{'stages': ['resize'], 'processor': {'processes': 4}}], 'processes'),
+    ([{'stages': ['resize'], 'processor': {'max_tasks_per_child': 10}}], 'max_tasks_per_child')])
+def test_invalid_jobs_are_rejected(jobs, message):
+    with pytest.raises(TypeError, match=message):
+        JobRunner(jobs, WorkerPool(1))
+
+
+def test_stride_scheduling_follows_weights(tmp_path, directory):
+    jobs: list = [{'name': 'light', 'weight': 1, 'stages': [{'stage': 'resize', 'width': 100}],
+                   'files': [f'{directory}/image{index}.jpg' for index in range(2)],
+                   'processor': {'output_directory': f'{tmp_path}/light'}},
+                  {'name': 'heavy', 'weight': 3, 'stages': [{'stage': 'resize', 'width': 100}],
+                   'files': [f'{directory}/image{index % 4}.jpg' for index in range(6)],
+                   'processor': {'output_directory': f'{tmp_path}/heavy'}}]
+    pool: WorkerPool = WorkerPool(2)
+    submitted: list = []
+    apply_async = pool.apply_async
+
+    def record(function, args: tuple = (), cost: int = 0):
+        submitted.append(os.path.basename(args[0].__self__.output_directory))
+        return apply_async(function, args, cost)
+
+    pool.apply_async = record
+    runner: JobRunner = JobRunner(jobs, pool=pool)
+    try:
+        runner.run()
+    finally:
+        runner.close()
+    assert submitted == ['light', 'heavy', 'heavy', 'heavy', 'light', 'heavy', 'heavy', 'heavy']
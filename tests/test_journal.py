@@ -0,0 +1,71 @@
+import json
+import os
+import pytest
+
+numpy = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+
+from ImageProcessor import Processor
+from ImageProcessor.journal import Journal
+from ImageProcessor.worker_pool import WorkerPool
+
+NAMES: list = [f'image{index}.jpg' for index in range(5)]
+
+
+def create_images(directory: str) -> list:
+    os.makedirs(directory)
+    generator: numpy.random.Generator = numpy.random.default_rng(0)
+    for name in NAMES:
+        Image.fromarray(generator.integers(0, 256, (300, 400, 3), dtype=numpy.uint8)).save(f'{directory}/{name}',
+                                                                                            quality=90)
+    return [f'{directory}/{name}' for name in NAMES]
+
+
+def read_records(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as journal:
+        return [json.loads(line) for line in journal]
+
+
+def resize(tmp_path, width: int, resume: bool) -> list:
+    pool: WorkerPool = WorkerPool(2)
+    try:
+        processor: Processor = Processor(output_directory=f'{tmp_path}/output', directory=f'{tmp_path}/input',
+                                         use_journal=True, pool=pool)
+        return processor.resize_all(width=width, resume=resume)
+    finally:
+        pool.close()
+
+
+def get_started(journal_path: str, start: int) -> set:
+    return {os.path.basename(record['task']) for record in read_records(journal_path)[start:]
+            if record['state'] == Journal.STARTED}
+
+
+def test_resume_redoes_only_unfinished_tasks(tmp_path):
+    files: list = create_images(f'{tmp_path}/input')
+    with open(files[0], 'wb') as broken:
+        broken.write(b'not an image')
+    with pytest.raises(Exception):
+        resize(tmp_path, 100, False)
+    journal_path: str = f'{tmp_path}/output/.journal/resize.jsonl'
+    Image.new('RGB', (400, 300), 'red').save(files[0])
+    with open(f'{tmp_path}/output/image1.jpg', 'ab') as corrupted:
+        corrupted.write(b'\0')
+    records: list = read_records(journal_path)
+    with open(journal_path, 'w', encoding='utf-8') as journal:
+        journal.writelines(f'{json.dumps(record)}\n' for record in records
+                           if not (record['task'] == files[2] and record['state'] == Journal.DONE))
+
+    start: int = len(read_records(journal_path))
+    outputs: list = resize(tmp_path, 100, True)
+    assert get_started(journal_path, start) == {'image0.jpg', 'image1.jpg', 'image2.jpg'}
+    assert sorted(os.path.basename(output) for output in outputs) == NAMES
+    assert all(Image.open(output).width == 100 for output in outputs)
+
+    start = len(read_records(journal_path))
+    resize(tmp_path, 100, True)
+    assert get_started(journal_path, start) == set()
+
+    start = len(read_records(journal_path))
+    resize(tmp_path, 120, True)
+    assert get_started(journal_path, start) == set(NAMES)
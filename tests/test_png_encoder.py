@@ -0,0 +1,62 @@
+import io
+import pytest
+
+numpy = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+ImageDraw = pytest.importorskip('PIL.ImageDraw')
+
+from ImageProcessor.png_encoder import PngEncoder
+
+
+def create_images() -> dict:
+    generator: numpy.random.Generator = numpy.random.default_rng(0)
+    rgb: Image.Image = Image.fromarray(generator.integers(0, 256, (90, 130, 3), dtype=numpy.uint8))
+    rgba: Image.Image = rgb.convert('RGBA')
+    rgba.putalpha(Image.fromarray(generator.integers(0, 256, (90, 130), dtype=numpy.uint8)))
+    graphic: Image.Image = Image.new('RGB', (130, 90), 'white')
+    ImageDraw.Draw(graphic).rectangle((10, 10, 60, 50), fill=(200, 30, 30))
+    gradient: numpy.ndarray = numpy.tile(numpy.linspace(0, 3500, 130).astype(numpy.uint16), (90, 1))
+    return {'rgb': rgb,
+            'rgba': rgba,
+            'gray': rgb.convert('L'),
+            'gray_alpha': rgba.convert('LA'),
+            'bilevel': rgb.convert('1'),
+            'palette': graphic.convert('P'),
+            'graphic': graphic,
+            'gray16': Image.fromarray(gradient),
+            'gray32': Image.fromarray(gradient.astype(numpy.int32), 'I')}
+
+
+def decode(data: bytes) -> Image.Image:
+    image: Image.Image = Image.open(io.BytesIO(data))
+    image.load()
+    assert image.format == 'PNG'
+    return image
+
+
+def get_pixels(image: Image.Image) -> numpy.ndarray:
+    if image.mode in PngEncoder.sixteen_bit_modes:
+        return numpy.asarray(image).astype(numpy.int64)
+    return numpy.asarray(image.convert('RGBA'))
+
+
+@pytest.mark.parametrize('speed', [None, 0, 5, 10])
+@pytest.mark.parametrize('name', list(create_images()))
+def test_lossless_round_trip(name, speed):
+    image: Image.Image = create_images()[name]
+    decoded: Image.Image = decode(PngEncoder(speed, quantize=False).encode(image))
+    assert decoded.size == image.size
+    assert numpy.array_equal(get_pixels(decoded), get_pixels(image))
+
+
+def test_sixteen_bit_depth_is_kept():
+    data: bytes = PngEncoder(quantize=False).encode(create_images()['gray16'])
+    assert data[24] == 16
+    assert decode(data).getextrema() == (0, 3500)
+
+
+def test_quantization_is_kept_only_when_smaller():
+    images: dict = create_images()
+    for name in ('rgb', 'graphic'):
+        lossless_data: bytes = PngEncoder(quantize=False).encode(images[name])
+        assert len(PngEncoder().encode(images[name])) <= len(lossless_data)
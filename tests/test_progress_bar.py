@@ -0,0 +1,30 @@
+import io
+
+from ImageProcessor.progress_bar import ProgressBar
+
+
+def test_final_line_is_written_once():
+    stream: io.StringIO = io.StringIO()
+    progress: ProgressBar = ProgressBar(2, stream=stream)
+    progress.show()
+    progress.inc(size=10)
+    progress.show()
+    progress.inc(size=10)
+    progress.show()
+    progress.show()
+    progress.finish()
+    lines: list = stream.getvalue().splitlines()
+    assert [line.split(' ')[1] for line in lines] == ['0/2', '2/2']
+
+
+def test_finish_writes_last_state_when_not_shown():
+    stream: io.StringIO = io.StringIO()
+    progress: ProgressBar = ProgressBar(3, stream=stream)
+    progress.show()
+    progress.inc()
+    progress.show()
+    progress.finish()
+    assert [line.split(' ')[1] for line in stream.getvalue().splitlines()] == ['0/3', '1/3']
+    progress.inc(2)
+    progress.finish()
+    assert stream.getvalue().splitlines()[-1].split(' ')[1] == '3/3'
@@ -0,0 +1,27 @@
+import os
+import pytest
+
+pytest.importorskip('aiohttp')
+numpy = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+
+from ImageProcessor.compressor import Compressor
+from ImageProcessor.image_io import ImageIO
+from ImageProcessor.resizer import Resizer
+from ImageProcessor.server import RenditionServer
+
+
+def test_render_reads_through_image_io(tmp_path):
+    generator: numpy.random.Generator = numpy.random.default_rng(0)
+    path: str = f'{tmp_path}/photo.jpg'
+    Image.fromarray(generator.integers(0, 256, (300, 400, 3), dtype=numpy.uint8)).save(path, quality=90)
+    ImageIO.reset_statistics()
+    data: bytes
+    extension: str
+    data, extension = RenditionServer.render(path, 200, None, 80, Resizer(), Compressor())
+    statistics: dict = ImageIO.reset_statistics()
+    assert extension == '.jpg'
+    assert statistics['images_read'] == 1 and statistics['bytes_read'] == os.path.getsize(path)
+    assert statistics['bytes_copied'] == 0
+    with ImageIO.open_image(data) as image:
+        assert image.size == (200, 150)
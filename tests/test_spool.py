@@ -0,0 +1,112 @@
+import os
+import signal
+import sqlite3
+import time
+import pytest
+
+numpy = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+
+from ImageProcessor import Processor
+from ImageProcessor.spool import JobSpool, LeaseSpool, SpoolWorker
+
+
+def create_images(directory: str, count: int) -> list:
+    os.makedirs(directory)
+    generator: numpy.random.Generator = numpy.random.default_rng(0)
+    files: list = []
+    for index in range(count):
+        path: str = f'{directory}/image{index}.jpg'
+        Image.fromarray(generator.integers(0, 256, (1500, 2000, 3), dtype=numpy.uint8)).save(path, quality=90)
+        files.append(path)
+    return files
+
+
+def wait_for_lease(spool_path: str, timeout: float = 30.0) -> tuple:
+    connection: sqlite3.Connection = sqlite3.connect(spool_path, timeout=60)
+    try:
+        deadline: float = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            row: tuple or None = connection.execute('SELECT id, owner FROM tasks WHERE state = ? ORDER BY id LIMIT 1',
+                                                    (JobSpool.LEASED,)).fetchone()
+            if row is not None:
+                return row
+            time.sleep(0.005)
+    finally:
+        connection.close()
+    raise AssertionError('No task was leased.')
+
+
+def test_killed_worker_lease_is_reclaimed(tmp_path):
+    files: list = create_images(f'{tmp_path}/input', 12)
+    spool_path: str = f'{tmp_path}/spool.db'
+    processor: Processor = Processor(output_directory=f'{tmp_path}/output', directory=f'{tmp_path}/input', width=64)
+    job_id: int = processor.distribute_all('resize', spool_path, wait=False, lease_time=1.0)
+    workers: list = SpoolWorker.run_processes(spool_path, 3, idle_timeout=3.0, poll_interval=0.1)
+    task_id: int
+    owner: str
+    task_id, owner = wait_for_lease(spool_path)
+    killed_pid: int = int(owner.rsplit(':', 1)[1])
+    os.kill(killed_pid, signal.SIGKILL)
+    for worker in workers:
+        worker.join(60)
+        assert not worker.is_alive()
+    spool: JobSpool = JobSpool(spool_path)
+    try:
+        results: list = spool.get_results(job_id)
+        assert [state for _, state, _, _ in results] == [JobSpool.DONE] * len(files)
+        outputs: list = [output for _, _, output, _ in results]
+        assert len(set(outputs)) == len(files)
+        assert all(os.path.exists(output) for output in outputs)
+        connection: sqlite3.Connection = sqlite3.connect(spool_path)
+        try:
+            reclaimed_owner: str
+            attempts: int
+            reclaimed_owner, attempts = connection.execute('SELECT owner, attempts FROM tasks WHERE id = ?',
+                                                           (task_id,)).fetchone()
+        finally:
+            connection.close()
+        assert reclaimed_owner != owner
+        assert attempts == 2
+    finally:
+        spool.close()
+
+
+def test_lease_spool_reclaims_expired_lease(tmp_path):
+    spool: LeaseSpool = LeaseSpool(f'{tmp_path}/spool', lease_time=0.2, max_attempts=2)
+    job_id: str = spool.enqueue('resize', {}, ['/images/a.jpg', '/images/b.jpg'])
+    dead_task: tuple = spool.claim('dead')
+    live_task: tuple = spool.claim('live')
+    assert (dead_task[1], live_task[1]) == ('/images/a.jpg', '/images/b.jpg')
+    assert spool.claim('other') is None
+    time.sleep(0.15)
+    assert spool.heartbeat(live_task[0], 'live')
+    time.sleep(0.15)
+    reclaimed_task: tuple = spool.claim('other')
+    assert reclaimed_task[1] == '/images/a.jpg' and reclaimed_task[0] != dead_task[0]
+    assert not spool.heartbeat(dead_task[0], 'dead')
+    assert not spool.complete(dead_task[0], 'dead', '/output/a.jpg')
+    assert spool.complete(reclaimed_task[0], 'other', '/output/a.jpg')
+    assert spool.fail(live_task[0], 'live', 'Broken.')
+    assert spool.get_status(job_id) == {JobSpool.QUEUED: 1, JobSpool.LEASED: 0, JobSpool.DONE: 1, JobSpool.FAILED: 0}
+    assert spool.fail(spool.claim('live')[0], 'live', 'Broken again.')
+    assert spool.get_results(job_id) == [('/images/a.jpg', JobSpool.DONE, '/output/a.jpg', None),
+                                         ('/images/b.jpg', JobSpool.FAILED, None, 'Broken again.')]
+
+
+def test_workers_share_lease_spool_with_absolute_paths(tmp_path, monkeypatch):
+    create_images(f'{tmp_path}/input', 6)
+    monkeypatch.chdir(tmp_path)
+    spool_path: str = f'{tmp_path}/spool/'
+    processor: Processor = Processor(output_directory='output', directory='input', width=64)
+    job_id: str = processor.distribute_all('resize', spool_path, wait=False)
+    monkeypatch.chdir('/')
+    workers: list = SpoolWorker.run_processes(spool_path, 3, idle_timeout=1.0, poll_interval=0.1)
+    for worker in workers:
+        worker.join(60)
+        assert not worker.is_alive()
+    results: list = LeaseSpool(spool_path).get_results(job_id)
+    assert [state for _, state, _, _ in results] == [JobSpool.DONE] * 6
+    assert all(os.path.isabs(path) and output.startswith(f'{tmp_path}/output/') for path, _, output, _ in results)
+    assert all(Image.open(output).width == 64 for _, _, output, _ in results)
+    assert sorted(os.listdir(f'{spool_path}/{job_id}/done')) == [f'{index:08d}.1' for index in range(6)]
@@ -0,0 +1,117 @@
+import gzip
+import io
+import os
+import pytest
+
+boto3 = pytest.importorskip('boto3')
+moto = pytest.importorskip('moto')
+
+Image = pytest.importorskip('PIL.Image')
+
+from ImageProcessor import Processor
+from ImageProcessor.storage import ArchiveStorage, LocalStorage, S3Storage, Storage
+from ImageProcessor.worker_pool import WorkerPool
+
+FILES: dict = {'a.jpg': b'a' * 1000, 'b/c.png': b'c' * 2000, 'd.jpg': os.urandom(4096)}
+
+
+@pytest.fixture
+def s3_client():
+    with moto.mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket='images')
+        yield client
+
+
+def test_storage_is_abstract():
+    with pytest.raises(TypeError):
+        Storage()
+
+
+def test_s3_list_read_write(s3_client):
+    with S3Storage('images', prefix='input', client=s3_client, prefetch_count=2) as storage:
+        for key, data in FILES.items():
+            storage.write(key, data)
+        assert sorted(storage.list()) == sorted(FILES)
+        assert storage.read('b/c.png') == FILES['b/c.png']
+        assert dict(storage.prefetch(list(FILES))) == FILES
+        storage.write_async('e.jpg', b'e').result()
+    assert s3_client.get_object(Bucket='images', Key='input/e.jpg')['Body'].read() == b'e'
+
+
+def test_s3_multipart_upload(s3_client):
+    data: bytes = os.urandom(12 * 1024 ** 2)
+    with S3Storage('images', client=s3_client, multipart_threshold=5 * 1024 ** 2,
+                   multipart_chunk_size=5 * 1024 ** 2) as storage:
+        storage.write('large.png', data)
+        assert storage.read('large.png') == data
+    assert s3_client.head_object(Bucket='images', Key='large.png')['ETag'].strip('"').endswith('-3')
+
+
+@pytest.mark.parametrize('name', ['archive.tar', 'archive.tar.gz', 'archive.zip'])
+def test_archive_round_trip(tmp_path, name):
+    path: str = f'{tmp_path}/{name}'
+    if name.endswith('.gz'):
+        with ArchiveStorage(f'{tmp_path}/archive.tar', 'w') as archive:
+            for key, data in FILES.items():
+                archive.write(key, data)
+        with open(f'{tmp_path}/archive.tar', 'rb') as source, gzip.open(path, 'wb') as destination:
+            destination.write(source.read())
+    else:
+        with ArchiveStorage(path, 'w') as archive:
+            for key, data in FILES.items():
+                archive.write(key, data)
+    with ArchiveStorage(path) as archive:
+        assert archive.list() == list(FILES)
+        assert dict(archive.prefetch(list(FILES))) == FILES
+        for key in reversed(list(FILES)):
+            assert archive.read(key) == FILES[key]
+        with pytest.raises(KeyError):
+            archive.read('missing.jpg')
+
+
+def test_archive_file_object_round_trip():
+    buffer: io.BytesIO = io.BytesIO()
+    with ArchiveStorage(mode='w', fileobj=buffer) as archive:
+        for key, data in FILES.items():
+            archive.write(key, data)
+    with ArchiveStorage(fileobj=io.BytesIO(buffer.getvalue())) as archive:
+        assert archive.list() == list(FILES)
+        assert dict(archive.prefetch(list(FILES))) == FILES
+        assert archive.read('a.jpg') == FILES['a.jpg']
+
+
+def test_local_storage_round_trip(tmp_path):
+    storage: LocalStorage = LocalStorage(f'{tmp_path}/local')
+    for key, data in FILES.items():
+        storage.write(key, data)
+    assert storage.list() == sorted(FILES)
+    assert dict(storage.prefetch(list(FILES))) == FILES
+
+
+def test_tar_prefetch_raises_on_missing_keys(tmp_path):
+    with ArchiveStorage(f'{tmp_path}/archive.tar', 'w') as archive:
+        for key, data in FILES.items():
+            archive.write(key, data)
+    with ArchiveStorage(f'{tmp_path}/archive.tar') as archive:
+        assert dict(archive.prefetch(['d.jpg', 'a.jpg'])) == {'d.jpg': FILES['d.jpg'], 'a.jpg': FILES['a.jpg']}
+        with pytest.raises(KeyError, match='missing.jpg'):
+            list(archive.prefetch(['a.jpg', 'missing.jpg']))
+
+
+def test_process_storage_keeps_requested_key_order(tmp_path):
+    keys: list = [f'image{index}.png' for index in range(4)]
+    with ArchiveStorage(f'{tmp_path}/archive.tar', 'w') as archive:
+        for index, key in enumerate(keys):
+            buffer: io.BytesIO = io.BytesIO()
+            Image.new('RGB', (40 + index, 30), 'red').save(buffer, 'PNG')
+            archive.write(key, buffer.getvalue())
+    pool: WorkerPool = WorkerPool(2)
+    try:
+        processor: Processor = Processor(output_directory=f'{tmp_path}/output', width=20, pool=pool)
+        with ArchiveStorage(f'{tmp_path}/archive.tar') as source:
+            output_keys: list = processor.process_storage('resize', source, LocalStorage(f'{tmp_path}/resized'),
+                                                          list(reversed(keys)))
+    finally:
+        pool.close()
+    assert output_keys == list(reversed(keys))
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+import pytest
+
+numpy = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+
+from ImageProcessor import Processor
+from ImageProcessor.watcher import Watcher
+from ImageProcessor.worker_pool import WorkerPool
+
+
+def write_image(directory: str, name: str, seed: int):
+    generator: numpy.random.Generator = numpy.random.default_rng(seed)
+    temp_path: str = f'{directory}/.{name}'
+    Image.fromarray(generator.integers(0, 256, (600, 800, 3), dtype=numpy.uint8)).save(temp_path, 'JPEG', quality=90)
+    os.rename(temp_path, f'{directory}/{name}')
+
+
+def wait_for(condition, timeout: float = 30.0):
+    deadline: float = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'Timed out.'
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def pool():
+    pool: WorkerPool = WorkerPool(1)
+    pool.apply_async(os.getpid).get(30)
+    yield pool
+    pool.close()
+
+
+def start_watcher(tmp_path, pool: WorkerPool, outputs: list, use_inotify: bool = True,
+                  on_output=None) -> tuple:
+    os.makedirs(f'{tmp_path}/input', exist_ok=True)
+    processor: Processor = Processor(output_directory=f'{tmp_path}/output', directory=f'{tmp_path}/input', pool=pool)
+    watcher: Watcher = Watcher(processor.create_chain([{'stage': 'resize', 'width': 200}]), pool,
+                               f'{tmp_path}/input', debounce=0.2, poll_interval=0.05, use_inotify=use_inotify,
+                               on_output=on_output or (lambda path, output_path: outputs.append(output_path)))
+    thread: threading.Thread = threading.Thread(target=watcher.run)
+    thread.start()
+    return watcher, thread
+
+
+@pytest.mark.parametrize('use_inotify', [True, False])
+def test_latency_is_debounce_plus_processing(tmp_path, pool, use_inotify):
+    outputs: list = []
+    watcher, thread = start_watcher(tmp_path, pool, outputs, use_inotify)
+    try:
+        time.sleep(0.1)
+        write_image(f'{tmp_path}/input', 'photo.jpg', 0)
+        wait_for(lambda: len(outputs) == 1)
+    finally:
+        watcher.stop()
+        thread.join(30)
+    assert not thread.is_alive()
+    statistics: dict = watcher.get_statistics()
+    assert statistics['processed'] == 1 and statistics['pending'] == 0
+    assert 0.2 <= statistics['latency_max'] < 0.2 + 2.0
+
+
+def test_failing_on_output_does_not_stall_watcher(tmp_path, pool):
+    outputs: list = []
+
+    def on_output(path: str, output_path: str):
+        outputs.append(output_path)
+        if len(outputs) == 1:
+            raise ValueError('Broken callback.')
+
+    watcher, thread = start_watcher(tmp_path, pool, outputs, on_output=on_output)
+    try:
+        time.sleep(0.1)
+        write_image(f'{tmp_path}/input', 'first.jpg', 0)
+        wait_for(lambda: len(outputs) == 1)
+        write_image(f'{tmp_path}/input', 'second.jpg', 1)
+        wait_for(lambda: len(outputs) == 2)
+    finally:
+        watcher.stop()
+        thread.join(30)
+    assert watcher.get_statistics()['processed'] == 2
+
+
+def test_polling_forgets_deleted_files(tmp_path, pool):
+    outputs: list = []
+    watcher, thread = start_watcher(tmp_path, pool, outputs, False)
+    try:
+        time.sleep(0.1)
+        write_image(f'{tmp_path}/input', 'photo.jpg', 0)
+        wait_for(lambda: len(outputs) == 1)
+        stat: os.stat_result = os.stat(f'{tmp_path}/input/photo.jpg')
+        os.remove(f'{tmp_path}/input/photo.jpg')
+        time.sleep(0.2)
+        write_image(f'{tmp_path}/input', 'photo.jpg', 0)
+        os.utime(f'{tmp_path}/input/photo.jpg', ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        wait_for(lambda: len(outputs) == 2)
+    finally:
+        watcher.stop()
+        thread.join(30)
@@ -0,0 +1,87 @@
+import os
+import signal
+import time
+import pytest
+
+pytest.importorskip('PIL.Image')
+
+from ImageProcessor.worker_pool import WorkerPool
+
+retained: list = []
+
+
+def hold_memory(size: int) -> int:
+    retained.append(bytearray(b'\1' * size))
+    return os.getpid()
+
+
+def record_interval(duration: float) -> tuple:
+    start: float = time.monotonic()
+    time.sleep(duration)
+    return start, time.monotonic()
+
+
+def report_pid_and_sleep(path: str, duration: float):
+    with open(path, 'w') as pid_file:
+        pid_file.write(str(os.getpid()))
+    time.sleep(duration)
+
+
+def test_worker_above_rss_limit_is_recycled():
+    pool: WorkerPool = WorkerPool(1, max_worker_rss=WorkerPool.get_rss() + 64 * 1024 ** 2)
+    try:
+        first_pid: int = pool.apply_async(hold_memory, (1024,)).get(30)
+        assert pool.apply_async(os.getpid).get(30) == first_pid
+        assert pool.recycle_count == 0
+        assert pool.apply_async(hold_memory, (128 * 1024 ** 2,)).get(30) == first_pid
+        assert pool.apply_async(os.getpid).get(30) != first_pid
+        assert pool.recycle_count == 1
+    finally:
+        pool.close()
+
+
+def test_memory_budget_limits_concurrent_tasks():
+    pool: WorkerPool = WorkerPool(4, memory_budget=100)
+    try:
+        results: list = [pool.apply_async(record_interval, (0.2,), 60) for _ in range(3)]
+        results.append(pool.apply_async(record_interval, (0.2,), 500))
+        intervals: list = sorted(result.get(30) for result in results)
+    finally:
+        pool.close()
+    for (_, end), (start, _) in zip(intervals, intervals[1:]):
+        assert start >= end - 0.01
+
+
+def test_tasks_within_budget_run_concurrently():
+    pool: WorkerPool = WorkerPool(2, memory_budget=100)
+    try:
+        pool.apply_async(os.getpid).get(30)
+        results: list = [pool.apply_async(record_interval, (0.5,), 40) for _ in range(2)]
+        intervals: list = sorted(result.get(30) for result in results)
+    finally:
+        pool.close()
+    assert intervals[1][0] < intervals[0][1]
+
+
+def test_killed_worker_fails_pending_tasks(tmp_path):
+    pool: WorkerPool = WorkerPool(2)
+    try:
+        killed_result = pool.apply_async(report_pid_and_sleep, (f'{tmp_path}/pid', 30))
+        queued_results: list = [pool.apply_async(time.sleep, (0.1,)) for _ in range(3)]
+        deadline: float = time.monotonic() + 30
+        while not os.path.exists(f'{tmp_path}/pid') or os.path.getsize(f'{tmp_path}/pid') == 0:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        with open(f'{tmp_path}/pid') as pid_file:
+            os.kill(int(pid_file.read()), signal.SIGKILL)
+        with pytest.raises(RuntimeError, match='exited unexpectedly'):
+            killed_result.get(10)
+        for result in queued_results:
+            try:
+                result.get(10)
+            except RuntimeError:
+                pass
+        assert pool.get_pending_tasks() == 0
+        assert pool.apply_async(os.getpid).get(30) > 0
+    finally:
+        pool.close()